@@ -9,18 +9,88 @@ import time
 import os
 from google.cloud import bigquery
 from google.oauth2 import service_account
+from tail_reader import CsvTailReader
+from dedup_store import SqliteDedupStore
+from bigquery_batcher import BigQueryBatcher
+from upload_outbox import UploadOutbox
+from parquet_archive import ParquetArchiveWriter
+from rollups import RollupWriter, batch_key
+from device_registry import DeviceRegistry
+from query_layer import ensure_health_table, health_table_problems
+from live_broker import LivePublisher
+from alert_stream import StreamingAlertEvaluator, AlertEventStore
+
+FLOAT_COLUMNS = ['temp', 'ax', 'ay', 'az', 'gx', 'gy', 'gz', 'humidity']
+INT_COLUMNS = ['spo2', 'hr']
+PAYLOAD_COLUMNS = [
+    'id_user', 'timestamp', 'temp', 'spo2', 'hr', 'ax', 'ay', 'az',
+    'gx', 'gy', 'gz', 'humidity', 'activity', 'activity_confidence'
+]
+
+ARCHIVE_BUFFER_SECONDS = 30
 
 class CloudUploader:
-    def __init__(self):
+    def __init__(self, tail_mode=True, use_bloom_filter=False, client=None,
+                 archive_dir="archive", live_url=None, alert_db="alert_events.db"):
         self.ml_results_file = "ml_results.csv"
         self.uploaded_log = "uploaded_log.txt"
+        self.dedup_db = "uploaded_ids.db"
+        self.tail_mode = tail_mode  # Parse only rows appended since last poll
+        self.tail_reader = CsvTailReader(self.ml_results_file) if tail_mode else None
         self.project_id = "monitoring-system-with-lora"
         self.dataset_id = "sdp2_live_monitoring_system"
         self.table_id = "lora_health_data_clean2"
-        self.full_table_id = f"{self.project_id}.{self.dataset_id}.{self.table_id}"
+        # Raw table; UPLOAD_TABLE switches it after migrate_health_table.py.
+        # Rollups and the registry stay next to table_id either way.
+        self.full_table_id = os.environ.get(
+            "UPLOAD_TABLE", f"{self.project_id}.{self.dataset_id}.{self.table_id}"
+        )
+        
+        # Indexed dedup store with a 30-day retention window
+        self.dedup_store = SqliteDedupStore(
+            self.dedup_db,
+            retention_days=30,
+            use_bloom_filter=use_bloom_filter
+        )
+        if self.dedup_store.is_new:
+            self.dedup_store.import_log(self.uploaded_log)
+        
+        # Rows wait here until BigQuery acknowledges them
+        self.outbox = UploadOutbox(self.dedup_store)
+        self.outbox_batch_size = 10000
+        
+        # Read the CSV tail (alerts, live push) every second; upload every 5 s
+        self.poll_interval = 1.0
+        self.upload_interval = 5.0
+        
+        # Typed, hour-partitioned Parquet copy of everything read from the CSV,
+        # a closed file per node every 30 s instead of one per poll
+        self.archive = ParquetArchiveWriter(
+            archive_dir, max_buffer_seconds=ARCHIVE_BUFFER_SECONDS
+        ) if archive_dir else None
         
-        # Initialize BigQuery client
-        self.client = self.setup_bigquery()
+        # Initialize BigQuery client (pass a FakeBigQueryClient to run offline)
+        self.client = client if client is not None else self.setup_bigquery()
+        self.batcher = BigQueryBatcher(self.client, self.full_table_id, max_workers=4)
+        
+        # Per-minute / per-hour rollups next to the raw table, for the dashboard
+        self.rollups = RollupWriter(
+            self.client, self.project_id, self.dataset_id, self.table_id,
+            outbox=UploadOutbox(self.dedup_store, table="rollup_outbox", marks_uploaded=False)
+        )
+        
+        # One row per device, so the dashboard's user list is a tiny read
+        self.registry = DeviceRegistry(
+            self.client, f"{self.project_id}.{self.dataset_id}.device_registry"
+        )
+        
+        # Optional push channel for live dashboard tiles (see live_broker.py);
+        # LivePublisher sends LIVE_BROKER_TOKEN with every batch
+        live_url = live_url or os.environ.get("LIVE_BROKER_URL")
+        self.live = LivePublisher(live_url) if live_url else None
+        
+        # Headless alerting on every row read, whether or not anyone watches
+        self.alerts = StreamingAlertEvaluator(AlertEventStore(alert_db)) if alert_db else None
     
     def setup_bigquery(self):
         """Setup BigQuery connection"""
@@ -43,17 +113,12 @@ class CloudUploader:
             return None
     
     def load_uploaded_ids(self):
-        """Load already uploaded record IDs"""
-        if not os.path.exists(self.uploaded_log):
-            return set()
-        
-        with open(self.uploaded_log, 'r') as f:
-            return set(line.strip() for line in f)
+        """Return the uploaded-ID store (supports `in` lookups)"""
+        return self.dedup_store
     
     def save_uploaded_id(self, record_id):
-        """Save uploaded record ID to log"""
-        with open(self.uploaded_log, 'a') as f:
-            f.write(f"{record_id}\n")
+        """Queue uploaded record ID for the next batched write"""
+        self.dedup_store.add(record_id)
     
     def generate_record_id(self, row):
         """Generate unique ID for record"""
@@ -82,103 +147,230 @@ class CloudUploader:
             'processing_stage': 'ml_processed'
         }
     
-    def upload_to_bigquery(self, rows):
-        """Upload rows to BigQuery"""
+    def column_or_default(self, df, names, default):
+        """First column present among names, else a constant column"""
+        for name in names:
+            if name in df.columns:
+                return df[name]
+        return pd.Series(default, index=df.index)
+    
+    def generate_record_ids(self, df):
+        """Vectorized generate_record_id over a whole DataFrame"""
+        timestamps = self.column_or_default(df, ['ml_timestamp', 'timestamp'], '').astype(str)
+        devices = self.column_or_default(df, ['device_id'], 'unknown').astype(str)
+        return devices + '_' + timestamps
+    
+    def filter_new_rows(self, df):
+        """Anti-join df against the dedup store; adds a record_id column"""
+        df = df.assign(record_id=self.generate_record_ids(df))
+        df = df[~df['record_id'].duplicated()]
+        
+        record_ids = df['record_id'].tolist()
+        uploaded = self.dedup_store.existing(record_ids) | self.outbox.existing(record_ids)
+        if uploaded:
+            df = df[~df['record_id'].isin(uploaded)]
+        return df
+    
+    def prepare_bigquery_rows(self, df):
+        """Vectorized prepare_bigquery_row with column-wise dtype casting"""
+        col = lambda names, default: self.column_or_default(df, names, default)
+        
+        payload = pd.DataFrame({
+            'id_user': col(['device_id'], 'UNKNOWN'),
+            'timestamp': col(['ml_timestamp', 'timestamp'], datetime.now().isoformat()).astype(str)
+        })
+        for name in FLOAT_COLUMNS:
+            payload[name] = pd.to_numeric(col([name], 0.0), errors='coerce').fillna(0.0).astype(float)
+        for name in INT_COLUMNS:
+            payload[name] = pd.to_numeric(col([name], 0), errors='coerce').fillna(0).astype(int)
+        payload['activity'] = col(['ml_activity', 'activity'], 'UNKNOWN')
+        payload['activity_confidence'] = pd.to_numeric(
+            col(['ml_confidence'], 0.0), errors='coerce'
+        ).fillna(0.0).astype(float)
+        
+        # Same key order as prepare_bigquery_row; zipping native lists
+        # is much cheaper than DataFrame.to_dict('records')
+        keys = PAYLOAD_COLUMNS + ['source', 'processing_stage']
+        columns = [payload[name].tolist() for name in PAYLOAD_COLUMNS]
+        constants = ('LoRa_ML_System', 'ml_processed')
+        return [dict(zip(keys, values + constants)) for values in zip(*columns)]
+    
+    def upload_to_bigquery(self, rows, record_ids=None):
+        """
+        Upload rows to BigQuery in size-bounded, concurrent chunks.
+        Returns the rows that were not acknowledged.
+        """
         if not self.client or not rows:
-            return False
+            return rows
         
         try:
-            errors = self.client.insert_rows_json(self.full_table_id, rows)
+            uploaded, failed_rows = self.batcher.insert(rows, row_ids=record_ids)
             
-            if errors == []:
-                print(f"✅ Uploaded {len(rows)} records to BigQuery")
-                return True
-            else:
-                print(f"❌ BigQuery errors: {errors}")
-                return False
+            if uploaded:
+                print(f"✅ Uploaded {uploaded} records to BigQuery")
+            if failed_rows:
+                print(f"❌ {len(failed_rows)} records kept pending")
+            return failed_rows
         except Exception as e:
             print(f"❌ Upload error: {e}")
-            return False
+            return rows
+    
+    def flush_outbox(self):
+        """Upload pending outbox rows; commit only the acknowledged ones"""
+        record_ids, rows = self.outbox.pending(limit=self.outbox_batch_size)
+        if not rows:
+            self.rollups.flush()  # Retry partials still waiting
+            return []
+        
+        failed = {id(row) for row in self.upload_to_bigquery(rows, record_ids)}
+        acked = [rid for rid, row in zip(record_ids, rows) if id(row) not in failed]
+        nacked = [rid for rid, row in zip(record_ids, rows) if id(row) in failed]
+        
+        # Rollups only count rows that actually landed in the raw table; their
+        # partials are queued in the same transaction that acks those rows
+        uploaded_rows = [row for row in rows if id(row) not in failed]
+        partial_ids, partials = self.rollups.partials(uploaded_rows, batch_key(acked))
+        self.outbox.ack(acked, derived=(self.rollups.outbox, partial_ids, partials))
+        self.outbox.nack(nacked)
+        
+        self.rollups.flush()
+        self.registry.update(uploaded_rows)
+        return uploaded_rows
+    
+    def report_alerts(self, events):
+        icons = {'raised': "🚨", 'cleared': "✅", 'expired': "⌛"}
+        for event in events:
+            print(f"   {icons.get(event['state'], '•')} {event['id_user']}: {event['message']}")
+    
+    def archive_flushed(self):
+        return self.archive is None or self.archive.is_flushed()
     
     def check_new_data(self):
         """Check for new ML results to upload"""
         if not os.path.exists(self.ml_results_file):
             print("ℹ️ No ML results file found")
-            return []
+            return pd.DataFrame()
         
         try:
-            # Load ML results
-            df = pd.read_csv(self.ml_results_file)
+            # Load ML results (only the appended tail in tail mode)
+            if self.tail_mode:
+                df = self.tail_reader.read_new_rows()
+            else:
+                df = pd.read_csv(self.ml_results_file)
             
             if df.empty:
-                return []
+                if self.tail_mode:
+                    self.tail_reader.commit(save=self.archive_flushed())
+                return pd.DataFrame()
             
-            # Load already uploaded IDs
-            uploaded_ids = self.load_uploaded_ids()
+            # Find new records (vectorized anti-join against uploaded IDs)
+            new_rows = self.filter_new_rows(df)
             
-            # Find new records
-            new_rows = []
-            for _, row in df.iterrows():
-                record_id = self.generate_record_id(row)
-                
-                if record_id not in uploaded_ids:
-                    new_rows.append(row)
-                    self.save_uploaded_id(record_id)
+            # The archive buffers rows for up to ARCHIVE_BUFFER_SECONDS, and
+            # the tail offset is only saved once they are in closed files. A
+            # crash re-reads the unarchived tail; those rows are already
+            # queued, so the tail itself is archived, not just the new rows
+            # (the copies archived twice are dropped by compaction)
+            if self.archive:
+                self.archive.write(df if self.tail_mode else new_rows)
+            
+            # Durably queue them; IDs are committed only after BigQuery acks
+            payload = self.prepare_bigquery_rows(new_rows)
+            self.outbox.enqueue(new_rows['record_id'].tolist(), payload)
+            self.dedup_store.flush()
+            
+            # Live tiles get the rows as soon as they are read, not after
+            # the next BigQuery upload
+            if self.live:
+                self.live.publish(payload)
+            
+            if self.alerts:
+                self.report_alerts(self.alerts.process(payload))
+            
+            if self.tail_mode:
+                self.tail_reader.commit(save=self.archive_flushed())
             
             return new_rows
         
         except Exception as e:
             print(f"❌ Data check error: {e}")
-            return []
+            return pd.DataFrame()
     
     def run(self):
         """Main upload loop"""
         print("\n☁️ Cloud Uploader Started")
         print("=========================")
         print(f"Source: {self.ml_results_file}")
+        print(f"Mode: {'tail (incremental)' if self.tail_mode else 'full rescan'}")
         print(f"Target: {self.full_table_id}")
+        
+        # Day-partitioned, user-clustered raw table. An existing table is left
+        # as it is, so say so if it lacks the layout (see migrate_health_table.py)
+        if self.client:
+            try:
+                ensure_health_table(self.client, self.full_table_id)
+                for problem in health_table_problems(self.client, self.full_table_id):
+                    print(f"⚠️ {problem}; migrate it with migrate_health_table.py")
+            except Exception as e:
+                print(f"❌ Table setup error: {e}")
+        
+        pending = self.outbox.size()
+        if pending:
+            print(f"♻️ Resuming {pending} unacknowledged records from outbox")
         print("\nPress Ctrl+C to stop\n")
         
         upload_count = 0
+        last_upload = 0.0
         
         try:
             while True:
                 # Check for new data
                 new_data = self.check_new_data()
                 
-                if new_data:
+                if not new_data.empty:
                     print(f"📦 Found {len(new_data)} new records")
-                    
-                    # Prepare rows for BigQuery
-                    rows_to_upload = []
-                    for row in new_data:
-                        rows_to_upload.append(self.prepare_bigquery_row(row))
-                    
-                    # Upload to BigQuery
-                    if rows_to_upload:
-                        success = self.upload_to_bigquery(rows_to_upload)
-                        if success:
-                            upload_count += len(rows_to_upload)
+                
+                # Silent devices must not keep their alerts forever
+                if self.alerts:
+                    self.report_alerts(self.alerts.expire())
+                
+                # Upload pending outbox rows to BigQuery
+                uploaded_rows = []
+                if time.time() - last_upload >= self.upload_interval:
+                    last_upload = time.time()
+                    uploaded_rows = self.flush_outbox()
+                    self.rollups.compact()  # Folds partials every few minutes
+                
+                if uploaded_rows:
+                    upload_count += len(uploaded_rows)
                     
                     # Display summary
-                    for row in rows_to_upload[:3]:  # Show first 3
+                    for row in uploaded_rows[:3]:  # Show first 3
                         print(f"   👤 {row['id_user']}: {row['activity']} "
                               f"(HR:{row['hr']}, Temp:{row['temp']:.1f})")
                     
-                    if len(rows_to_upload) > 3:
-                        print(f"   ... and {len(rows_to_upload)-3} more")
+                    if len(uploaded_rows) > 3:
+                        print(f"   ... and {len(uploaded_rows)-3} more")
+                    
+                    # Periodic status
+                    if upload_count % 10 == 0:
+                        print(f"\n📊 Total uploaded: {upload_count} records")
                 
                 # Wait before next check
-                time.sleep(5)
-                
-                # Periodic status
-                if upload_count > 0 and upload_count % 10 == 0:
-                    print(f"\n📊 Total uploaded: {upload_count} records")
+                time.sleep(self.poll_interval)
                 
         except KeyboardInterrupt:
             print(f"\n🛑 Uploader stopped. Total uploaded: {upload_count} records")
         except Exception as e:
             print(f"❌ Uploader error: {e}")
+        finally:
+            if self.archive:
+                self.archive.close()
+            if self.tail_reader:
+                self.tail_reader.save()  # Everything read is archived now
+            if self.alerts:
+                self.alerts.store.close()
+            self.dedup_store.close()
 
 if __name__ == "__main__":
     uploader = CloudUploader()
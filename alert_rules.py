@@ -0,0 +1,331 @@
+"""
+🚦 ALERT RULES
+Declarative health-alert table evaluated over whole windows with NumPy.
+
+Each rule is a row of ALERT_RULES: all `when` conditions must hold, plus
+at least one `any` condition if given, for at least `min_duration`
+seconds. A window is evaluated column-wise: one vectorized boolean mask
+per distinct condition, combined per rule and packed into one bit per
+rule. Alert spans are runs of a rule's bit that last long enough.
+"""
+
+import operator
+import numpy as np
+import pandas as pd
+
+LEVELS = ['info', 'warning', 'critical']  # Ascending severity
+CHUNK_SAMPLES = 131072  # Samples evaluated at a time
+
+ALERT_RULES = [
+    {'name': 'no_finger', 'level': 'info',
+     'when': [('hr', '==', 0), ('spo2', '==', 0)], 'min_duration': 0,
+     'message': "👆 No Finger Detected on Sensor",
+     'recommendation': "Place finger on MAX30102 sensor to measure heart rate and SpO2"},
+    {'name': 'hr_critical_high', 'level': 'critical',
+     'when': [('hr', '>', 120)], 'min_duration': 3,
+     'message': "🚨 CRITICAL: Heart Rate {hr:.0f} BPM is too high!",
+     'recommendation': "Seek immediate medical attention"},
+    {'name': 'hr_critical_low', 'level': 'critical',
+     'when': [('hr', '>', 0), ('hr', '<', 40)], 'min_duration': 3,
+     'message': "🚨 CRITICAL: Heart Rate {hr:.0f} BPM is too low!",
+     'recommendation': "Seek immediate medical attention"},
+    {'name': 'spo2_critical', 'level': 'critical',
+     'when': [('spo2', '>', 0), ('spo2', '<', 90)], 'min_duration': 5,
+     'message': "🚨 CRITICAL: SpO2 {spo2:.0f}% is dangerously low!",
+     'recommendation': "Immediate oxygen support may be needed"},
+    {'name': 'hr_elevated', 'level': 'warning',
+     'when': [('hr', '>', 100), ('hr', '<=', 120)], 'min_duration': 10,
+     'message': "⚠️ WARNING: Elevated Heart Rate ({hr:.0f} BPM)",
+     'recommendation': "Check for physical activity, stress, or environmental factors"},
+    {'name': 'hr_low', 'level': 'warning',
+     'when': [('hr', '>=', 40), ('hr', '<', 60)], 'min_duration': 10,
+     'message': "⚠️ WARNING: Low Heart Rate ({hr:.0f} BPM)",
+     'recommendation': "Monitor for symptoms of dizziness or fatigue"},
+    {'name': 'spo2_low', 'level': 'warning',
+     'when': [('spo2', '>=', 90), ('spo2', '<', 95)], 'min_duration': 10,
+     'message': "⚠️ WARNING: Low SpO2 ({spo2:.0f}%)",
+     'recommendation': "Ensure adequate ventilation and monitor breathing"},
+    {'name': 'temp_high', 'level': 'info',
+     'when': [('temp', '>', 30)], 'min_duration': 60,
+     'message': "🌡️ High Temperature: {temp:.1f}°C may affect vitals",
+     'recommendation': "Consider cooling the environment"},
+    {'name': 'humidity_high', 'level': 'info',
+     'when': [('humidity', '>', 70)], 'min_duration': 60,
+     'message': "💧 High Humidity: {humidity:.1f}% may cause discomfort",
+     'recommendation': "Increase ventilation or use dehumidifier"},
+    {'name': 'humidity_vitals', 'level': 'info',
+     'when': [('humidity', '>', 70)], 'any': [('hr', '>', 90), ('spo2', '<', 97)], 'min_duration': 60,
+     'message': "⚡ Humidity may be affecting heart rate and oxygen levels",
+     'recommendation': "High humidity reduces breathing efficiency"},
+    {'name': 'humidity_low', 'level': 'info',
+     'when': [('humidity', '<', 30)], 'min_duration': 60,
+     'message': "💧 Low Humidity: {humidity:.1f}% detected",
+     'recommendation': "Low humidity can cause respiratory irritation"},
+    {'name': 'heat_index', 'level': 'warning',
+     'when': [('temp', '>', 28), ('humidity', '>', 60)], 'min_duration': 60,
+     'message': "🔥 High Heat Index: Temperature + Humidity combination detected",
+     'recommendation': "Risk of heat stress - ensure hydration and rest"},
+    {'name': 'temp_low', 'level': 'info',
+     'when': [('temp', '<', 18)], 'min_duration': 60,
+     'message': "❄️ Low Temperature: {temp:.1f}°C may affect circulation",
+     'recommendation': "Ensure adequate heating and warm clothing"},
+]
+
+OPERATORS = {
+    '>': operator.gt, '>=': operator.ge,
+    '<': operator.lt, '<=': operator.le,
+    '==': operator.eq, '!=': operator.ne,
+}
+COMPARISONS = {  # Same operators as ufuncs, written into preallocated masks
+    '>': np.greater, '>=': np.greater_equal,
+    '<': np.less, '<=': np.less_equal,
+    '==': np.equal, '!=': np.not_equal,
+}
+
+def level_rank(level):
+    return LEVELS.index(level) + 1 if level in LEVELS else 0
+
+def highest_level(levels):
+    """Most severe of the given levels, or None"""
+    ranked = [level for level in levels if level in LEVELS]
+    return max(ranked, key=level_rank) if ranked else None
+
+def rule_matches(rule, values):
+    """Scalar check of one rule's conditions against a dict of values"""
+    def holds(condition):
+        column, op, threshold = condition
+        value = values.get(column)
+        return value is not None and not pd.isna(value) and OPERATORS[op](float(value), threshold)
+
+    if not all(holds(condition) for condition in rule['when']):
+        return False
+    return not rule.get('any') or any(holds(condition) for condition in rule['any'])
+
+def status_from_row(row, rules=ALERT_RULES):
+    """
+    (alert_level, alerts, recommendations) for a single reading. One sample
+    has no duration, so min_duration is not applied here.
+    """
+    values = {column: row[column] for column in ('hr', 'spo2', 'temp', 'humidity') if column in row}
+    formatted = {column: float(value) for column, value in values.items() if not pd.isna(value)}
+    alerts = []
+    recommendations = []
+    levels = []
+    for rule in rules:
+        if rule_matches(rule, values):
+            alerts.append(rule['message'].format(**formatted))
+            recommendations.append(rule['recommendation'])
+            levels.append(rule['level'])
+    return highest_level(levels), alerts, recommendations
+
+class CompiledRules:
+    def __init__(self, rules=ALERT_RULES):
+        self.rules = rules
+        if len(rules) > 64:
+            raise ValueError(f"{len(rules)} rules exceed the 64-bit rule mask")
+        self.dtype = next(dtype for dtype in (np.uint8, np.uint16, np.uint32, np.uint64)
+                          if np.iinfo(dtype).bits >= len(rules))
+        self.rule_masks = [1 << index for index in range(len(rules))]
+        self.names = np.array([rule['name'] for rule in rules])
+        self.levels = np.array([rule['level'] for rule in rules])
+
+        # Rules share thresholds: each distinct condition is compared once
+        self.conditions = sorted({condition for rule in rules
+                                  for condition in list(rule['when']) + list(rule.get('any') or [])})
+        self.columns = sorted({column for column, _, _ in self.conditions})
+
+    def _holds(self, rule, masks, holds, alternatives):
+        """A rule's mask from its condition masks; one condition is used as is"""
+        when = [masks[condition] for condition in rule['when']]
+        if len(when) == 1 and not rule.get('any'):
+            return when[0]
+
+        if not when:
+            holds[...] = True
+        elif len(when) == 1:
+            np.copyto(holds, when[0])
+        else:
+            np.logical_and(when[0], when[1], out=holds)
+        for mask in when[2:]:
+            np.logical_and(holds, mask, out=holds)
+        if rule.get('any'):
+            choices = [masks[condition] for condition in rule['any']]
+            np.copyto(alternatives, choices[0])
+            for mask in choices[1:]:
+                np.logical_or(alternatives, mask, out=alternatives)
+            np.logical_and(holds, alternatives, out=holds)
+        return holds
+
+    def chunk_bits(self, columns):
+        """
+        (start, rule bits) per chunk of samples. The bits array is reused for
+        the next chunk, so consume it before advancing.
+        """
+        columns = {column: np.asarray(values) for column, values in columns.items()}
+        n = len(next(iter(columns.values()))) if columns else 0
+        size = min(n, CHUNK_SAMPLES)
+        if n == 0:
+            return
+
+        # Buffers are allocated once and reused for every chunk, so the whole
+        # evaluation stays in cache. Missing columns keep an all-False mask.
+        masks = {condition: np.zeros(size, dtype=bool) for condition in self.conditions}
+        holds = np.empty(size, dtype=bool)
+        alternatives = np.empty(size, dtype=bool)
+        weighted = np.empty(size, dtype=np.uint8)
+        planes = [np.empty(size, dtype=np.uint8) for _ in range(np.dtype(self.dtype).itemsize)]
+        wide = np.empty(size, dtype=self.dtype)
+        bits = np.empty(size, dtype=self.dtype)
+
+        for start in range(0, n, size):
+            stop = min(start + size, n)
+            k = stop - start
+            chunk_masks = {condition: mask[:k] for condition, mask in masks.items()}
+            for (column, op, threshold), mask in chunk_masks.items():
+                if column in columns:
+                    # Python scalars keep the column's own dtype (uint8 stays uint8)
+                    COMPARISONS[op](columns[column][start:stop], threshold, out=mask)
+
+            # Rule bits are gathered one byte plane at a time: a uint8
+            # multiply by the bit weight vectorizes, shifts and where= do not
+            for plane in planes:
+                plane[:k] = 0
+            # Most rules never fire in most chunks: skip those that cannot
+            hits = {condition for condition, mask in chunk_masks.items() if mask.any()}
+            for index, rule in enumerate(self.rules):
+                if not hits.issuperset(rule['when']) or \
+                        (rule.get('any') and hits.isdisjoint(rule['any'])):
+                    continue
+                held = self._holds(rule, chunk_masks, holds[:k], alternatives[:k])
+                if not held.any():
+                    continue
+                plane = planes[index // 8][:k]
+                np.multiply(held.view(np.uint8), np.uint8(1 << index % 8), out=weighted[:k])
+                np.bitwise_or(plane, weighted[:k], out=plane)
+
+            out = bits[:k]
+            np.copyto(out, planes[0][:k])
+            for byte, plane in enumerate(planes[1:], 1):
+                if not plane[:k].any():
+                    continue
+                np.multiply(plane[:k], self.dtype(1 << 8 * byte), out=wide[:k], dtype=self.dtype)
+                np.bitwise_or(out, wide[:k], out=out)
+            yield start, out
+
+    def rule_bits(self, columns):
+        """Per-sample bit set of satisfied rules (bit i = rule i)"""
+        n = len(next(iter(columns.values()))) if columns else 0
+        bits = np.zeros(n, dtype=self.dtype)
+        for start, chunk in self.chunk_bits(columns):
+            bits[start:start + len(chunk)] = chunk
+        return bits
+
+    def segments(self, columns, groups=None):
+        """
+        Runs of samples with the same rule outcome: (starts, rule bits per
+        run). A new run also starts wherever the group changes. Runs are
+        found chunk by chunk, without materializing the per-sample bits.
+        """
+        if groups is not None:
+            groups = np.asarray(groups)
+        starts, seg_bits = [], []
+        previous = None
+        for start, chunk in self.chunk_bits(columns):
+            stop = start + len(chunk)
+            change = np.empty(len(chunk), dtype=bool)
+            change[0] = previous is None or chunk[0] != previous
+            np.not_equal(chunk[1:], chunk[:-1], out=change[1:])
+            if groups is not None:
+                change[0] |= start > 0 and groups[start] != groups[start - 1]
+                change[1:] |= groups[start + 1:stop] != groups[start:stop - 1]
+            index = np.flatnonzero(change)
+            starts.append(index + start)
+            seg_bits.append(chunk[index])
+            previous = chunk[-1]
+
+        if not starts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=self.dtype)
+        return np.concatenate(starts), np.concatenate(seg_bits)
+
+    def masks(self, columns):
+        """{rule name: boolean mask} per sample, ignoring durations"""
+        bits = self.rule_bits(columns)
+        return {rule['name']: (bits & self.dtype(mask)) != 0
+                for rule, mask in zip(self.rules, self.rule_masks)}
+
+    def spans(self, timestamps, columns, groups=None):
+        """
+        Alert spans as a DataFrame (group, rule, level, start, end,
+        duration_s, samples). Samples must be sorted by (group, time);
+        `groups` is an integer code per sample or None.
+        """
+        times = np.asarray(timestamps)
+        if times.dtype.kind == 'M':
+            times = times.astype('datetime64[ns]', copy=False).view(np.int64)
+        n = len(times)
+        if n == 0:
+            return self._no_spans()
+
+        seg_starts, seg_bits = self.segments(columns, groups)
+        seg_ends = np.append(seg_starts[1:], n) - 1  # Inclusive
+        if groups is not None:
+            seg_groups = np.asarray(groups)[seg_starts]
+        else:
+            seg_groups = np.zeros(len(seg_starts), dtype=np.int64)
+        same_group_as_prev = np.concatenate(([False], seg_groups[1:] == seg_groups[:-1]))
+
+        parts = []
+        for index, mask in enumerate(self.rule_masks):
+            active = (seg_bits & self.dtype(mask)) != 0
+            prev_active = np.concatenate(([False], active[:-1])) & same_group_as_prev
+            next_active = np.append(active[1:] & same_group_as_prev[1:], False)
+            run_first = np.flatnonzero(active & ~prev_active)
+            if len(run_first) == 0:
+                continue
+            run_last = np.flatnonzero(active & ~next_active)
+
+            first, last = seg_starts[run_first], seg_ends[run_last]
+            keep = times[last] - times[first] >= self.rules[index].get('min_duration', 0) * 1e9
+            if keep.any():
+                parts.append((index, seg_groups[run_first][keep], first[keep], last[keep]))
+
+        if not parts:
+            return self._no_spans()
+        rule_index = np.concatenate([np.full(len(part[1]), part[0]) for part in parts])
+        span_groups = np.concatenate([part[1] for part in parts])
+        first = np.concatenate([part[2] for part in parts])
+        last = np.concatenate([part[3] for part in parts])
+
+        # Sorted by (group, start) in NumPy; a pandas sort costs more than the rest
+        order = np.lexsort((first, span_groups))
+        rule_index, span_groups, first, last = rule_index[order], span_groups[order], first[order], last[order]
+        return pd.DataFrame({
+            'group': span_groups,
+            'rule': self.names[rule_index],
+            'level': self.levels[rule_index],
+            'start': pd.to_datetime(times[first], utc=True),
+            'end': pd.to_datetime(times[last], utc=True),
+            'duration_s': (times[last] - times[first]) / 1e9,
+            'samples': last - first + 1,
+        })
+
+    @staticmethod
+    def _no_spans():
+        return pd.DataFrame(columns=['group', 'rule', 'level', 'start', 'end', 'duration_s', 'samples'])
+
+def alert_spans(df, rules=ALERT_RULES, time_col='timestamp', group_col='id_user'):
+    """Alert spans of a DataFrame window, per user when group_col is present"""
+    compiled = rules if isinstance(rules, CompiledRules) else CompiledRules(rules)
+    if group_col in df.columns:
+        df = df.sort_values([group_col, time_col], kind='stable')
+        codes, names = pd.factorize(df[group_col])
+    else:
+        df = df.sort_values(time_col, kind='stable')
+        codes, names = None, None
+
+    columns = {column: df[column].to_numpy() for column in compiled.columns if column in df.columns}
+    spans = compiled.spans(pd.to_datetime(df[time_col], utc=True).dt.tz_localize(None).to_numpy(),
+                           columns, codes)
+    if names is not None and not spans.empty:
+        spans['group'] = names[spans['group'].to_numpy()]
+    return spans.rename(columns={'group': group_col}) if names is not None else spans.drop(columns='group')
@@ -0,0 +1,367 @@
+"""
+🚨 ALERT STREAM
+Headless, incremental alert evaluation over the rows the uploader reads.
+Each user keeps O(1) rolling state: an EWMA per vital, a ring buffer of
+the last N raw samples, and per-rule debounce / hysteresis timers.
+
+- Raise: the raw ALERT_RULES condition held for the rule's min_duration
+- Clear: the rule no longer holds on the EWMA even with thresholds
+  relaxed by HYSTERESIS_MARGINS, for CLEAR_SECONDS. Equality conditions
+  (the 0 = no reading sentinel) are held on the raw values instead
+- Expire: the device sent nothing for GAP_SECONDS while an alert was active
+
+Active alerts survive restarts: a new evaluator reloads them from its
+store and clears or expires them like any other.
+
+Batches are evaluated with alert_rules.CompiledRules: the state machine
+only steps once per run of samples with identical rule outcomes.
+Raised/cleared events go to a small SQLite store the dashboards read.
+"""
+
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+from alert_rules import ALERT_RULES, CompiledRules, highest_level
+
+VITALS = ['hr', 'spo2', 'temp', 'humidity']
+HYSTERESIS_MARGINS = {'hr': 3.0, 'spo2': 1.0, 'temp': 0.5, 'humidity': 2.0}
+CLEAR_SECONDS = 5.0
+GAP_SECONDS = 10.0  # A longer silence restarts pending onsets and expires active alerts
+
+def raw_column(column):
+    """Name under which the hold rules see a vital's unsmoothed values"""
+    return f"raw_{column}"
+
+def relaxed_rules(rules=ALERT_RULES, margins=HYSTERESIS_MARGINS):
+    """
+    Copy of the rule table with every threshold widened by its margin.
+    `==` / `!=` conditions are moved onto the raw column: an EWMA only
+    approaches a sentinel like hr == 0 and would never hold it.
+    """
+    def relax(condition):
+        column, op, threshold = condition
+        margin = margins.get(column, 0.0)
+        if op in ('==', '!='):
+            return (raw_column(column), op, threshold)
+        if op in ('>', '>='):
+            return (column, op, threshold - margin)
+        if op in ('<', '<='):
+            return (column, op, threshold + margin)
+        return condition
+
+    relaxed = []
+    for rule in rules:
+        copy = dict(rule)
+        copy['when'] = [relax(condition) for condition in rule['when']]
+        if rule.get('any'):
+            copy['any'] = [relax(condition) for condition in rule['any']]
+        relaxed.append(copy)
+    return relaxed
+
+class UserAlertState:
+    __slots__ = ('ewma', 'ring', 'ring_pos', 'ring_count', 'last_ns',
+                 'pending_since', 'clear_since', 'active', 'seen_at')
+
+    def __init__(self, rule_count, ring_size):
+        self.ewma = None  # float64[len(VITALS)]
+        self.ring = np.full((ring_size, len(VITALS)), np.nan, dtype=np.float32)
+        self.ring_pos = 0
+        self.ring_count = 0
+        self.last_ns = None
+        self.pending_since = [None] * rule_count  # Onset start (ns) per rule
+        self.clear_since = [None] * rule_count  # Start of recovery (ns) per rule
+        self.active = [None] * rule_count  # Raised event per rule
+        self.seen_at = None  # Wall-clock time of the device's last batch
+
+    def remember(self, values):
+        """Append the newest rows of a batch to the ring buffer"""
+        size = len(self.ring)
+        values = values[-size:]
+        for row in values:
+            self.ring[self.ring_pos] = row
+            self.ring_pos = (self.ring_pos + 1) % size
+        self.ring_count = min(self.ring_count + len(values), size)
+
+    def recent(self):
+        """Ring buffer contents, oldest first"""
+        if self.ring_count < len(self.ring):
+            return self.ring[:self.ring_count]
+        return np.roll(self.ring, -self.ring_pos, axis=0)
+
+class StreamingAlertEvaluator:
+    def __init__(self, store=None, rules=ALERT_RULES, alpha=0.2, ring_size=90,
+                 clear_seconds=CLEAR_SECONDS, margins=HYSTERESIS_MARGINS, gap_seconds=GAP_SECONDS):
+        self.store = store
+        self.rules = rules
+        self.onset = CompiledRules(rules)
+        self.hold = CompiledRules(relaxed_rules(rules, margins))
+        self.alpha = alpha
+        self.ring_size = ring_size  # 90 samples = 3 s at 30 Hz
+        self.clear_ns = int(clear_seconds * 1e9)
+        self.gap_seconds = gap_seconds
+        self.users = {}
+        self.events = 0
+        if store is not None:
+            self.restore(store.load_active())
+
+    def _state(self, user):
+        state = self.users.get(user)
+        if state is None:
+            state = self.users[user] = UserAlertState(len(self.rules), self.ring_size)
+        return state
+
+    def restore(self, active_rows, now=None):
+        """
+        Re-adopt alerts left active by a previous run. The device gets
+        gap_seconds from now to report; its readings then clear the alerts
+        normally, silence expires them.
+        """
+        now = now or time.time()
+        indices = {rule['name']: index for index, rule in enumerate(self.rules)}
+        for row in active_rows:
+            index = indices.get(row['rule'])
+            if index is None:
+                continue
+            state = self._state(row['id_user'])
+            state.active[index] = dict(row, state='raised')
+            state.seen_at = now
+
+    def expire(self, now=None):
+        """Close active alerts of devices silent for gap_seconds; returns the events"""
+        now = now or time.time()
+        event_at = pd.Timestamp(now, unit='s', tz='UTC').isoformat()
+        events = []
+        for user, state in self.users.items():
+            if state.seen_at is None or now - state.seen_at <= self.gap_seconds:
+                continue
+            for index, active in enumerate(state.active):
+                if active is None:
+                    continue
+                rule = self.rules[index]
+                events.append({
+                    'id_user': user, 'rule': rule['name'], 'level': rule['level'], 'state': 'expired',
+                    'started_at': active['started_at'], 'event_at': event_at,
+                    'value': None, 'ewma': None, 'recent_min': None, 'recent_max': None,
+                    'message': f"⌛ Expired: {rule['name']} (no data for {self.gap_seconds:.0f}s)",
+                    'recommendation': rule['recommendation'],
+                })
+                state.active[index] = None
+            state.pending_since = [None] * len(self.rules)
+            state.clear_since = [None] * len(self.rules)
+
+        if events and self.store is not None:
+            self.store.record(events)
+        self.events += len(events)
+        return events
+
+    def _ewma(self, state, values):
+        """EWMA of each vital, continuing from the state's last value"""
+        frame = pd.DataFrame(values, columns=VITALS)
+        if state.ewma is not None:
+            frame = pd.concat([pd.DataFrame([state.ewma], columns=VITALS), frame], ignore_index=True)
+        smoothed = frame.ewm(alpha=self.alpha, adjust=False, ignore_na=True).mean().to_numpy()
+        if state.ewma is not None:
+            smoothed = smoothed[1:]
+        state.ewma = smoothed[-1].copy()
+        return smoothed
+
+    def _event(self, user, index, state, kind, at_ns, since_ns, raw, smoothed, i):
+        rule = self.rules[index]
+        values = {column: float(raw[i, k]) for k, column in enumerate(VITALS) if not np.isnan(raw[i, k])}
+        column = rule['when'][0][0]
+        recent = np.concatenate([state.recent(), raw[max(0, i + 1 - self.ring_size):i + 1]])[-self.ring_size:]
+        recent = recent[:, VITALS.index(column)]
+        return {
+            'id_user': user,
+            'rule': rule['name'],
+            'level': rule['level'],
+            'state': kind,
+            'started_at': pd.Timestamp(since_ns, tz='UTC').isoformat(),
+            'event_at': pd.Timestamp(at_ns, tz='UTC').isoformat(),
+            'value': values.get(column),
+            'ewma': float(smoothed[i, VITALS.index(column)]),
+            'recent_min': float(np.nanmin(recent)) if np.isfinite(recent).any() else None,
+            'recent_max': float(np.nanmax(recent)) if np.isfinite(recent).any() else None,
+            'message': rule['message'].format(**values) if kind == 'raised' else f"✅ Cleared: {rule['name']}",
+            'recommendation': rule['recommendation'],
+        }
+
+    def _step_user(self, user, times, raw):
+        state = self._state(user)
+
+        if state.last_ns is not None and times[0] - state.last_ns > self.gap_seconds * 1e9:
+            state.pending_since = [None] * len(self.rules)
+            state.clear_since = [None] * len(self.rules)
+
+        smoothed = self._ewma(state, raw)
+        raw_columns = {column: raw[:, k] for k, column in enumerate(VITALS)}
+        hold_columns = {column: smoothed[:, k] for k, column in enumerate(VITALS)}
+        hold_columns.update({raw_column(column): values for column, values in raw_columns.items()})
+        onset_starts, onset_bits = self.onset.segments(raw_columns)
+        hold_starts, hold_bits = self.hold.segments(hold_columns)
+
+        # Walk the union of run boundaries of both views
+        starts = np.union1d(onset_starts, hold_starts)
+        ends = np.append(starts[1:], len(times)) - 1
+        onset_at = onset_bits[np.searchsorted(onset_starts, starts, side='right') - 1]
+        hold_at = hold_bits[np.searchsorted(hold_starts, starts, side='right') - 1]
+
+        events = []
+        for start, end, onset, hold in zip(starts, ends, onset_at, hold_at):
+            first_ns, last_ns = times[start], times[end]
+            for index, rule in enumerate(self.rules):
+                mask = self.onset.rule_masks[index]
+                if state.active[index] is None:
+                    if not onset & mask:
+                        state.pending_since[index] = None
+                        continue
+                    if state.pending_since[index] is None:
+                        state.pending_since[index] = first_ns
+                    due = state.pending_since[index] + int(rule.get('min_duration', 0) * 1e9)
+                    if last_ns >= due:
+                        i = start + int(np.searchsorted(times[start:end + 1], max(due, first_ns)))
+                        event = self._event(user, index, state, 'raised', times[i],
+                                            state.pending_since[index], raw, smoothed, i)
+                        state.active[index] = event
+                        state.clear_since[index] = None
+                        events.append(event)
+                elif hold & self.hold.rule_masks[index]:
+                    state.clear_since[index] = None
+                else:
+                    if state.clear_since[index] is None:
+                        state.clear_since[index] = first_ns
+                    due = state.clear_since[index] + self.clear_ns
+                    if last_ns >= due:
+                        i = start + int(np.searchsorted(times[start:end + 1], max(due, first_ns)))
+                        events.append(self._event(user, index, state, 'cleared', times[i],
+                                                  state.clear_since[index], raw, smoothed, i))
+                        state.active[index] = None
+                        state.pending_since[index] = None
+                        state.clear_since[index] = None
+
+        state.remember(raw)
+        state.last_ns = times[-1]
+        state.seen_at = time.time()
+        return events
+
+    def process(self, rows):
+        """Feed payload rows (id_user, timestamp, vitals); returns new events"""
+        expired = self.expire()
+        if not rows:
+            return expired
+        try:
+            df = pd.DataFrame(rows)
+            df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True, errors='coerce', format='ISO8601')
+            df = df.dropna(subset=['timestamp']).sort_values(['id_user', 'timestamp'], kind='stable')
+            for column in VITALS:
+                if column not in df.columns:
+                    df[column] = np.nan
+
+            events = []
+            times_all = df['timestamp'].dt.tz_localize(None).to_numpy().astype('datetime64[ns]').view(np.int64)
+            values_all = df[VITALS].to_numpy(dtype=np.float64)
+            users = df['id_user'].to_numpy()
+            bounds = np.flatnonzero(users[1:] != users[:-1]) + 1
+            for start, end in zip(np.concatenate(([0], bounds)), np.append(bounds, len(df))):
+                events += self._step_user(users[start], times_all[start:end], values_all[start:end])
+
+            if events and self.store is not None:
+                self.store.record(events)
+            self.events += len(events)
+            return expired + events
+        except Exception as e:
+            print(f"❌ Alert evaluation error: {e}")
+            return expired
+
+    def status(self, user):
+        """(alert_level, alerts, recommendations) of a user's active alerts"""
+        state = self.users.get(user)
+        active = [event for event in (state.active if state else []) if event]
+        return (highest_level([event['level'] for event in active]),
+                [event['message'] for event in active],
+                [event['recommendation'] for event in active])
+
+class AlertEventStore:
+    """SQLite log of alert events plus the currently active alerts"""
+    def __init__(self, db_file="alert_events.db"):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS alert_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                id_user TEXT, rule TEXT, level TEXT, state TEXT,
+                started_at TEXT, event_at TEXT, value REAL, ewma REAL,
+                recent_min REAL, recent_max REAL,
+                message TEXT, recommendation TEXT, recorded_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_alert_events_user ON alert_events(id_user, id);
+            CREATE TABLE IF NOT EXISTS active_alerts (
+                id_user TEXT, rule TEXT, level TEXT, started_at TEXT,
+                message TEXT, recommendation TEXT, updated_at REAL,
+                PRIMARY KEY (id_user, rule)
+            ) WITHOUT ROWID;
+        """)
+        self.conn.commit()
+
+    def record(self, events):
+        """Append events and update the active set in one transaction"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO alert_events (id_user, rule, level, state, started_at, event_at, value, ewma, "
+                "recent_min, recent_max, message, recommendation, recorded_at) "
+                "VALUES (:id_user, :rule, :level, :state, :started_at, :event_at, :value, :ewma, "
+                ":recent_min, :recent_max, :message, :recommendation, :recorded_at)",
+                [dict(event, recorded_at=now) for event in events]
+            )
+            for event in events:
+                if event['state'] == 'raised':
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO active_alerts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (event['id_user'], event['rule'], event['level'], event['started_at'],
+                         event['message'], event['recommendation'], now)
+                    )
+                else:
+                    self.conn.execute("DELETE FROM active_alerts WHERE id_user = ? AND rule = ?",
+                                      (event['id_user'], event['rule']))
+
+    def load_active(self):
+        """Alerts left active by a previous run, as event dicts"""
+        cursor = self.conn.execute(
+            "SELECT id_user, rule, level, started_at, message, recommendation FROM active_alerts"
+        )
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def close(self):
+        self.conn.close()
+
+def read_active_alerts(db_file, selected_user="All Users"):
+    """Active alerts from an AlertEventStore file (read-only) as a DataFrame"""
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        query = "SELECT * FROM active_alerts"
+        params = ()
+        if selected_user != "All Users":
+            query += " WHERE id_user = ?"
+            params = (selected_user,)
+        return pd.read_sql_query(query + " ORDER BY started_at", conn, params=params)
+    finally:
+        conn.close()
+
+def read_recent_events(db_file, selected_user="All Users", limit=20):
+    """Newest alert events (raised and cleared) from an AlertEventStore file"""
+    conn = sqlite3.connect(f"file:{db_file}?mode=ro", uri=True)
+    try:
+        query = "SELECT id_user, rule, level, state, started_at, event_at, value, message FROM alert_events"
+        params = []
+        if selected_user != "All Users":
+            query += " WHERE id_user = ?"
+            params.append(selected_user)
+        params.append(limit)
+        return pd.read_sql_query(query + " ORDER BY id DESC LIMIT ?", conn, params=params)
+    finally:
+        conn.close()
@@ -0,0 +1,97 @@
+"""
+⏱️ CHART BENCHMARK
+Per-refresh cost of the six dashboard charts: rebuilding a go.Figure with
+a full layout dict every time vs the ChartStore (template + in-place
+trace updates + typed arrays). Measures build + to_json, as st.plotly_chart
+does, and the JSON payload size sent to the browser.
+
+Usage: python benchmark_charts.py [points] [refreshes]
+"""
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+from chart_engine import ChartStore, register_template
+
+COLORS = {'dark_olive': '#556B2F', 'olive': '#808000', 'text_light': '#6B6B47'}
+CHARTS = ['hr', 'spo2', 'temp', 'humidity', 'ax']
+
+def legacy_line(df, y_col, title):
+    """The former create_minimal_line_chart, minus downsampling"""
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=df['timestamp'], y=df[y_col], mode='lines',
+        line=dict(color=COLORS['dark_olive'], width=2),
+        fill='tozeroy', fillcolor='rgba(85, 107, 47, 0.1)'
+    ))
+    fig.update_layout(
+        title=dict(text=title, font=dict(size=14, color=COLORS['dark_olive'], family='Arial'), x=0),
+        paper_bgcolor='rgba(247, 231, 206, 0.95)',
+        plot_bgcolor='rgba(247, 231, 206, 0.5)',
+        font=dict(color=COLORS['text_light'], size=11),
+        xaxis=dict(gridcolor='rgba(85, 107, 47, 0.15)', showgrid=True, zeroline=False),
+        yaxis=dict(gridcolor='rgba(85, 107, 47, 0.15)', showgrid=True, zeroline=False),
+        height=280, margin=dict(l=50, r=30, t=40, b=40), hovermode='x unified'
+    )
+    return fig
+
+def legacy_bar(df):
+    counts = df['activity'].value_counts()
+    fig = go.Figure(go.Bar(x=counts.index, y=counts.values,
+                           marker=dict(color=COLORS['dark_olive'], line=dict(color=COLORS['olive'], width=1))))
+    fig.update_layout(
+        title=dict(text='Activity Distribution', font=dict(size=14, color=COLORS['dark_olive']), x=0),
+        paper_bgcolor='rgba(247, 231, 206, 0.95)', plot_bgcolor='rgba(247, 231, 206, 0.5)',
+        font=dict(color=COLORS['text_light'], size=11), height=280, margin=dict(l=50, r=30, t=40, b=40)
+    )
+    return fig
+
+def make_window(points, offset):
+    rng = np.random.default_rng(offset)
+    start = pd.Timestamp('2025-01-01', tz='UTC') + pd.Timedelta(seconds=offset)
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=points, freq='33333us'),
+        'hr': rng.normal(75, 3, points), 'spo2': rng.normal(97, 1, points),
+        'temp': rng.normal(36.6, 0.2, points), 'humidity': rng.normal(55, 2, points),
+        'ax': rng.normal(0, 0.1, points),
+        'activity': rng.choice(['walk', 'rest', 'run'], points),
+    })
+
+def run(label, refreshes, windows, render):
+    total_bytes = 0
+    start = time.perf_counter()
+    for i in range(refreshes):
+        for fig in render(windows[i % len(windows)]):
+            total_bytes += len(pio.to_json(fig, validate=False))
+    elapsed = (time.perf_counter() - start) / refreshes * 1000
+    print(f"{label:>11}: {elapsed:7.1f} ms/refresh | {total_bytes / refreshes / 1024:7.1f} KB/refresh")
+
+def main():
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    refreshes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    windows = [make_window(points, i) for i in range(5)]
+
+    register_template(COLORS)
+    store = ChartStore()
+
+    def legacy(df):
+        return [legacy_line(df, col, col) for col in CHARTS] + [legacy_bar(df)]
+
+    def engine(df):
+        figures = [store.line(('line', col), df['timestamp'], df[col], col, COLORS['dark_olive'])
+                   for col in CHARTS]
+        counts = df['activity'].value_counts()
+        figures.append(store.bar(('bar',), counts.index, counts.values, 'Activity Distribution',
+                                 COLORS['dark_olive'], COLORS['olive']))
+        return figures
+
+    print(f"📊 6 charts x {points} points, {refreshes} refreshes\n")
+    run("rebuild", refreshes, windows, legacy)
+    run("ChartStore", refreshes, windows, engine)
+    print(f"\n   figures built {store.builds}, updated {store.updates}, unchanged {store.skips}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+⏱️ DOWNSAMPLING BENCHMARK
+Time to reduce 1M points to a chart's worth, and whether a single-sample
+HR spike survives, for iloc[::step] vs LTTB vs min/max envelope
+
+Usage: python benchmark_downsampling.py [points] [target_points]
+"""
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+from downsampling import lttb_indices, minmax_indices
+
+def main():
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    target = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    rng = np.random.default_rng(7)
+    timestamps = pd.date_range('2025-01-01', periods=points, freq='33333us').to_numpy()
+    hr = rng.normal(75, 3, points)
+    spike = points // 2 + 17  # One-sample tachycardia event, off the stride grid
+    hr[spike] = 180
+
+    def strided():
+        return np.arange(0, points, max(points // target, 1))
+
+    print(f"📊 {points:,} points → ~{target} points\n")
+    for name, fn in (
+        ("iloc[::step]", strided),
+        ("LTTB", lambda: lttb_indices(timestamps, hr, target)),
+        ("min/max", lambda: minmax_indices(hr, target)),
+    ):
+        fn()  # Warm-up
+        runs = 5
+        start = time.perf_counter()
+        for _ in range(runs):
+            indices = fn()
+        ms = (time.perf_counter() - start) / runs * 1000
+        kept_spike = "✅" if spike in set(indices.tolist()) else "❌"
+        print(f"{name:>13}: {ms:7.1f} ms | {len(indices):>4} points | peak HR {hr[indices].max():5.0f} {kept_spike}")
+
+if __name__ == "__main__":
+    main()
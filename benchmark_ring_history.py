@@ -0,0 +1,56 @@
+"""
+⏱️ RING HISTORY BENCHMARK
+Per-refresh cost of the local dashboard history as it fills: append one
+sample and build the chart frame, deque of dicts + pd.DataFrame(list(...))
+vs the preallocated SampleRing with a downsampled view
+
+Usage: python benchmark_ring_history.py [capacity]
+"""
+
+import sys
+import time
+from collections import deque
+import pandas as pd
+from ring_history import SampleRing, SAMPLE_RATE_HZ
+
+CHART_POINTS = 600
+
+def sample(i):
+    return {'hr': 70 + i % 30, 'spo2': 97, 'temp': 36.6, 'movement': 0.1,
+            'timestamp': 1_700_000_000 + i / SAMPLE_RATE_HZ}
+
+def deque_refresh(history, i):
+    history.append(sample(i))
+    return pd.DataFrame(list(history))[['hr', 'spo2']]
+
+def ring_refresh(history, i):
+    history.append(sample(i))
+    return history.chart_frame(['hr', 'spo2'], max_points=CHART_POINTS)
+
+def timed(fn, history, start, runs=20):
+    began = time.perf_counter()
+    for i in range(start, start + runs):
+        fn(history, i)
+    return (time.perf_counter() - began) / runs * 1000
+
+def main():
+    capacity = int(sys.argv[1]) if len(sys.argv) > 1 else SAMPLE_RATE_HZ * 3600
+
+    history_deque = deque(maxlen=capacity)
+    history_ring = SampleRing(capacity)
+    print(f"📊 Capacity {capacity:,} samples | ring memory {history_ring.nbytes / 1e6:.1f} MB\n")
+    print(f"{'filled':>10} | {'deque+DataFrame':>16} | {'SampleRing':>10}")
+
+    filled = 0
+    for target in (100, 1_000, 10_000, capacity // 2, capacity):
+        for i in range(filled, target):
+            history_deque.append(sample(i))
+            history_ring.append(sample(i))
+        filled = target
+        deque_ms = timed(deque_refresh, history_deque, filled)
+        ring_ms = timed(ring_refresh, history_ring, filled)
+        filled += 20
+        print(f"{target:>10,} | {deque_ms:>13.2f} ms | {ring_ms:>7.2f} ms")
+
+if __name__ == "__main__":
+    main()
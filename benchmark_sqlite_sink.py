@@ -0,0 +1,76 @@
+"""
+⏱️ SQLITE SINK BENCHMARK
+Sustained insert throughput of per-row commits vs SqliteSink for
+1/10/100 simulated 30 Hz nodes
+
+Usage: python benchmark_sqlite_sink.py [simulated_seconds]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlite_sink import SqliteSink
+
+NODE_RATE_HZ = 30
+
+def make_rows(nodes, seconds):
+    """Readings from `nodes` devices at 30 Hz over `seconds`"""
+    start = datetime(2025, 1, 1)
+    total = nodes * NODE_RATE_HZ * seconds
+    return [
+        ((start + timedelta(seconds=i / (nodes * NODE_RATE_HZ))).isoformat(),
+         36.5, 78 + i % 20, 97, 55.0)
+        for i in range(total)
+    ]
+
+def legacy_insert(db_file, rows):
+    """Original insert_data_dual path: one INSERT + commit per reading"""
+    conn = sqlite3.connect(db_file)
+    cursor = conn.cursor()
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS health_data (
+        timestamp TEXT, temp REAL, hr INTEGER, spo2 INTEGER, humidity REAL
+    )
+    """)
+    conn.commit()
+    for row in rows:
+        cursor.execute("INSERT INTO health_data VALUES (?, ?, ?, ?, ?)", row)
+        conn.commit()
+    conn.close()
+
+def sink_insert(db_file, rows, synchronous):
+    sink = SqliteSink(db_file, synchronous=synchronous)
+    for row in rows:
+        sink.write(row)
+    sink.close()
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    workdir = tempfile.mkdtemp(prefix="sqlite_sink_bench_")
+    print(f"📂 {workdir} | {seconds}s of simulated data per run\n")
+    print(f"{'nodes':>5} {'needed':>9} {'per-row commit':>16} {'sink NORMAL':>14} {'sink OFF':>12}")
+
+    for nodes in (1, 10, 100):
+        rows = make_rows(nodes, seconds)
+        needed = nodes * NODE_RATE_HZ
+        results = []
+        for label, fn, extra in (
+            ("legacy", legacy_insert, ()),
+            ("normal", sink_insert, ("NORMAL",)),
+            ("off", sink_insert, ("OFF",)),
+        ):
+            db_file = os.path.join(workdir, f"{label}_{nodes}.db")
+            results.append(len(rows) / timed(fn, db_file, rows, *extra))
+
+        print(f"{nodes:>5} {needed:>7}/s {results[0]:>14,.0f}/s {results[1]:>12,.0f}/s {results[2]:>10,.0f}/s")
+
+if __name__ == "__main__":
+    main()
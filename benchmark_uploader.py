@@ -0,0 +1,86 @@
+"""
+⏱️ UPLOADER BENCHMARK
+Rows/s of the legacy iterrows path vs the vectorized batch path
+on a synthetic ml_results.csv
+
+Usage: python benchmark_uploader.py [rows] [legacy_rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from Uploader import CloudUploader
+
+def make_ml_results(path, rows, nodes=10):
+    """Write a synthetic 30 Hz ml_results.csv"""
+    rng = np.random.default_rng(42)
+    start = pd.Timestamp('2025-01-01T00:00:00')
+    df = pd.DataFrame({
+        'device_id': np.array([f"NODE_{i:04x}" for i in range(nodes)])[np.arange(rows) % nodes],
+        'ml_timestamp': (start + pd.to_timedelta(np.arange(rows) // nodes / 30, unit='s'))
+                        .strftime('%Y-%m-%dT%H:%M:%S.%f'),
+        'temp': rng.normal(36.6, 0.3, rows).round(2),
+        'spo2': rng.integers(90, 100, rows),
+        'hr': rng.integers(55, 130, rows),
+        'ax': rng.normal(0, 1, rows).round(4),
+        'ay': rng.normal(0, 1, rows).round(4),
+        'az': rng.normal(9.8, 1, rows).round(4),
+        'gx': rng.normal(0, 5, rows).round(4),
+        'gy': rng.normal(0, 5, rows).round(4),
+        'gz': rng.normal(0, 5, rows).round(4),
+        'humidity': rng.normal(60, 5, rows).round(1),
+        'ml_activity': rng.choice(['RESTING', 'BRISKWALK', 'RUNNING'], rows),
+        'ml_confidence': rng.random(rows).round(3)
+    })
+    df.to_csv(path, index=False)
+
+def legacy_path(uploader, rows):
+    """The original check_new_data + run loop: iterrows, per-row ID and dict"""
+    df = pd.read_csv(uploader.ml_results_file, nrows=rows)
+    uploaded_ids = set()
+    payload = []
+    with open(uploader.uploaded_log, 'a') as log:
+        for _, row in df.iterrows():
+            record_id = uploader.generate_record_id(row)
+            if record_id not in uploaded_ids:
+                uploaded_ids.add(record_id)
+                log.write(f"{record_id}\n")
+                payload.append(uploader.prepare_bigquery_row(row))
+    return len(payload)
+
+def batch_path(uploader):
+    """Tail read + vectorized IDs, anti-join and payload casting"""
+    total = 0
+    while True:  # The tail reader caps bytes per poll, so drain like run() would
+        new_rows = uploader.check_new_data()
+        if new_rows.empty:
+            return total
+        total += len(uploader.prepare_bigquery_rows(new_rows))
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    legacy_rows = int(sys.argv[2]) if len(sys.argv) > 2 else rows
+
+    os.chdir(tempfile.mkdtemp(prefix="uploader_bench_"))
+    print(f"📝 Generating {rows:,} rows in {os.getcwd()}")
+    make_ml_results("ml_results.csv", rows)
+
+    uploader = CloudUploader()
+
+    start = time.perf_counter()
+    done = legacy_path(uploader, legacy_rows)
+    legacy_secs = time.perf_counter() - start
+    print(f"🐢 Legacy : {done:>9,} rows in {legacy_secs:7.2f}s = {done / legacy_secs:>12,.0f} rows/s")
+
+    start = time.perf_counter()
+    done = batch_path(uploader)
+    batch_secs = time.perf_counter() - start
+    print(f"🚀 Batch  : {done:>9,} rows in {batch_secs:7.2f}s = {done / batch_secs:>12,.0f} rows/s")
+
+    print(f"📈 Speedup: {(done / batch_secs) / (legacy_rows / legacy_secs):.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+📦 BIGQUERY BATCHER
+Splits streaming inserts by row count and payload size and sends the
+chunks concurrently, retrying each chunk independently
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Streaming insert limits are 50,000 rows / 10 MB per request;
+# stay well under them and keep each request fast to retry
+MAX_ROWS_PER_REQUEST = 500
+MAX_BYTES_PER_REQUEST = 5 * 1024 * 1024
+
+class BigQueryBatcher:
+    def __init__(self, client, table_id, max_rows=MAX_ROWS_PER_REQUEST,
+                 max_bytes=MAX_BYTES_PER_REQUEST, max_workers=4,
+                 max_retries=3, backoff_seconds=1.0):
+        self.client = client
+        self.table_id = table_id
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+
+    def split(self, rows, row_ids=None):
+        """Yield (rows, row_ids) chunks within the row and byte limits"""
+        chunk, chunk_ids, chunk_bytes = [], [], 2  # 2 = enclosing brackets
+
+        for i, row in enumerate(rows):
+            row_bytes = len(json.dumps(row, default=str)) + 1  # +1 for comma
+            if chunk and (len(chunk) >= self.max_rows or chunk_bytes + row_bytes > self.max_bytes):
+                yield chunk, chunk_ids
+                chunk, chunk_ids, chunk_bytes = [], [], 2
+
+            chunk.append(row)
+            chunk_ids.append(row_ids[i] if row_ids is not None else None)
+            chunk_bytes += row_bytes
+
+        if chunk:
+            yield chunk, chunk_ids
+
+    def send_chunk(self, rows, row_ids):
+        """
+        Insert one chunk, retrying transport errors with backoff.
+        Returns (failed, rejected): rows that never got through, and rows
+        BigQuery reported as invalid (resending them cannot help).
+        """
+        ids = row_ids if any(r is not None for r in row_ids) else None
+        rejected_rows = []
+        attempt = 0
+
+        while rows:
+            try:
+                errors = self.client.insert_rows_json(self.table_id, rows, row_ids=ids)
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    print(f"❌ Chunk of {len(rows)} rows failed after {attempt + 1} attempts: {e}")
+                    return rows, rejected_rows
+                time.sleep(self.backoff_seconds * (2 ** attempt))
+                attempt += 1
+                continue
+
+            if not errors:
+                return [], rejected_rows
+
+            # Invalid rows are rejected; rows only 'stopped' because a
+            # neighbour was invalid are resent straight away
+            rejected, stopped = set(), set()
+            for error in errors:
+                reasons = {detail.get('reason') for detail in error.get('errors', [])}
+                (stopped if reasons <= {'stopped'} else rejected).add(error['index'])
+
+            if rejected:
+                print(f"⚠️ {len(rejected)}/{len(rows)} rows rejected: {errors[0].get('errors')}")
+                rejected_rows.extend(rows[i] for i in sorted(rejected))
+            elif attempt >= self.max_retries:
+                return rows, rejected_rows
+            else:
+                attempt += 1
+
+            keep = sorted(stopped)
+            rows = [rows[i] for i in keep]
+            ids = [ids[i] for i in keep] if ids is not None else None
+
+        return [], rejected_rows
+
+    def insert_rows(self, rows, row_ids=None):
+        """
+        Upload rows in size-bounded chunks with bounded parallelism.
+        Returns (uploaded_count, failed_rows, rejected_rows).
+        """
+        if not rows:
+            return 0, [], []
+
+        chunks = list(self.split(rows, row_ids))
+        failed_rows, rejected_rows = [], []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for failed, rejected in pool.map(lambda c: self.send_chunk(*c), chunks):
+                failed_rows.extend(failed)
+                rejected_rows.extend(rejected)
+
+        return len(rows) - len(failed_rows) - len(rejected_rows), failed_rows, rejected_rows
+
+    def insert(self, rows, row_ids=None):
+        """insert_rows() with rejected and failed rows together: (uploaded_count, failed_rows)"""
+        uploaded, failed_rows, rejected_rows = self.insert_rows(rows, row_ids)
+        return uploaded, rejected_rows + failed_rows
@@ -0,0 +1,139 @@
+"""
+📈 CHART ENGINE
+Olive/champagne styling is registered once as a Plotly template, and each
+session keeps its figures: a refresh only swaps the trace arrays of an
+existing figure instead of rebuilding traces and layout. Series are sent
+as typed arrays (epoch-ms x, float32 y), which Plotly encodes as base64
+binary rather than JSON lists of ISO strings; dense series switch to
+WebGL (Scattergl).
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+TEMPLATE_NAME = 'umpsa_olive'
+GL_THRESHOLD = 2000  # Points per trace above which WebGL is used
+
+def register_template(colors):
+    """Register the dashboard layout as a named Plotly template (once)"""
+    if TEMPLATE_NAME not in pio.templates:
+        grid = 'rgba(85, 107, 47, 0.15)'
+        pio.templates[TEMPLATE_NAME] = go.layout.Template(layout=dict(
+            title=dict(font=dict(size=14, color=colors['dark_olive'], family='Arial'), x=0),
+            paper_bgcolor='rgba(247, 231, 206, 0.95)',
+            plot_bgcolor='rgba(247, 231, 206, 0.5)',
+            font=dict(color=colors['text_light'], size=11),
+            xaxis=dict(gridcolor=grid, showgrid=True, zeroline=False),
+            yaxis=dict(gridcolor=grid, showgrid=True, zeroline=False),
+            height=280,
+            margin=dict(l=50, r=30, t=40, b=40),
+            hovermode='x unified',
+            showlegend=False,
+        ))
+    return TEMPLATE_NAME
+
+def time_axis(values):
+    """Timestamps as epoch milliseconds (a date axis reads these natively)"""
+    values = pd.to_datetime(pd.Series(values), utc=True)
+    return values.to_numpy(dtype='datetime64[ns]').astype(np.int64) // 1_000_000
+
+def value_axis(values):
+    return np.asarray(values, dtype=np.float32)
+
+def data_signature(*arrays):
+    """Cheap fingerprint of the plotted arrays: any changed x or y value changes it"""
+    return tuple((len(array), hash(np.ascontiguousarray(array).tobytes())) for array in arrays)
+
+def scatter_class(points):
+    return go.Scattergl if points > GL_THRESHOLD else go.Scatter
+
+class ChartStore:
+    """Figures of one session, keyed by chart; updated in place on refresh"""
+    def __init__(self, template=TEMPLATE_NAME):
+        self.template = template
+        self.figures = {}
+        self.signatures = {}
+        self.builds = 0
+        self.updates = 0
+        self.skips = 0
+
+    def _figure(self, key, kind, build):
+        """Existing figure for key if it has the same trace kind, else a new one"""
+        entry = self.figures.get(key)
+        if entry is None or entry[0] != kind:
+            figure = build()
+            figure.update_layout(template=self.template)
+            self.figures[key] = (kind, figure)
+            self.signatures.pop(key, None)
+            self.builds += 1
+        return self.figures[key][1]
+
+    def _changed(self, key, signature):
+        if self.signatures.get(key) == signature:
+            self.skips += 1
+            return False
+        self.signatures[key] = signature
+        self.updates += 1
+        return True
+
+    def line(self, key, x, y, title, color, fill_color='rgba(85, 107, 47, 0.1)'):
+        """Filled line chart; re-uses the figure and only replaces x/y"""
+        x, y = time_axis(x), value_axis(y)
+        trace = scatter_class(len(y))
+
+        def build():
+            figure = go.Figure(trace(mode='lines', line=dict(color=color, width=2),
+                                     fill='tozeroy', fillcolor=fill_color))
+            figure.update_layout(title_text=title, xaxis_type='date')
+            return figure
+
+        figure = self._figure(key, trace.__name__, build)
+        if self._changed(key, data_signature(x, y)):
+            with figure.batch_update():
+                figure.data[0].x = x
+                figure.data[0].y = y
+        return figure
+
+    def envelope(self, key, x, low, high, avg, title, color,
+                 band_color='rgba(85, 107, 47, 0.2)'):
+        """Average line inside a min/max band"""
+        x = time_axis(x)
+        series = [value_axis(values) for values in (high, low, avg)]
+        trace = scatter_class(len(x))
+
+        def build():
+            figure = go.Figure([
+                trace(mode='lines', line=dict(width=0), hoverinfo='skip'),
+                trace(mode='lines', line=dict(width=0), fill='tonexty',
+                      fillcolor=band_color, name='min / max'),
+                trace(mode='lines', line=dict(color=color, width=2), name='avg'),
+            ])
+            figure.update_layout(title_text=title, xaxis_type='date')
+            return figure
+
+        figure = self._figure(key, trace.__name__, build)
+        if self._changed(key, data_signature(x, *series)):
+            with figure.batch_update():
+                for data, values in zip(figure.data, series):
+                    data.x = x
+                    data.y = values
+        return figure
+
+    def bar(self, key, labels, counts, title, color, line_color):
+        """Category counts; bars only change when the counts do"""
+        labels = list(labels)
+        counts = np.asarray(counts, dtype=np.int64)
+
+        def build():
+            figure = go.Figure(go.Bar(marker=dict(color=color, line=dict(color=line_color, width=1))))
+            figure.update_layout(title_text=title, hovermode='closest', xaxis_showgrid=False)
+            return figure
+
+        figure = self._figure(key, 'Bar', build)
+        if self._changed(key, (tuple(labels), tuple(counts.tolist()))):
+            with figure.batch_update():
+                figure.data[0].x = labels
+                figure.data[0].y = counts
+        return figure
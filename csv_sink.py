@@ -0,0 +1,133 @@
+"""
+📄 CSV SINK
+Long-lived buffered CSV appender with size-based rotation, optional gzip
+segments and a crash-safe sidecar index (.idx) recording the last
+complete row
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+class CsvSink:
+    def __init__(self, csv_file="local_health_data.csv", header=None,
+                 max_bytes=64 * 1024 * 1024, compress_segments=False,
+                 flush_interval=1.0, buffer_size=64 * 1024):
+        self.csv_file = csv_file
+        self.index_file = f"{csv_file}.idx"
+        self.header = header
+        self.max_bytes = max_bytes
+        self.compress_segments = compress_segments
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.file = None
+        self.open_segment()
+
+    def open_segment(self):
+        """Open the active file, repairing a torn tail left by a crash"""
+        index = read_index(self.csv_file)
+        size = os.path.getsize(self.csv_file) if os.path.exists(self.csv_file) else 0
+        self.rows = index.get('rows', 0) if index else 0
+        self.last_row = index.get('last_row') if index else None
+        committed = index.get('committed_bytes', 0) if index else 0
+
+        if size > committed:
+            self.repair_tail(committed, size)
+
+        self.file = open(self.csv_file, 'a', newline='', buffering=self.buffer_size)
+        self.writer = csv.writer(self.file)
+        if self.file.tell() == 0 and self.header:
+            self.writer.writerow(self.header)
+        self.last_flush = time.monotonic()
+        self.flush()
+
+    def repair_tail(self, committed, size):
+        """Keep complete rows written after the last index update, drop a partial one"""
+        with open(self.csv_file, 'rb+') as f:
+            f.seek(committed)
+            tail = f.read(size - committed)
+            end = tail.rfind(b'\n') + 1
+            f.truncate(committed + end)
+
+        complete = tail[:end]
+        lines = list(csv.reader(io.StringIO(complete.decode('utf-8', errors='replace'))))
+        if committed == 0 and self.header and lines and lines[0] == self.header:
+            lines = lines[1:]
+        if lines:
+            self.rows += len(lines)
+            self.last_row = lines[-1]
+        if end < len(tail):
+            print(f"🩹 Dropped {len(tail) - end} bytes of partial row from {self.csv_file}")
+
+    def write(self, row):
+        """Append one row; flushed to the OS at most every flush_interval"""
+        self.writer.writerow(row)
+        self.rows += 1
+        self.last_row = list(row)
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def write_many(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        """Push buffered rows to the OS, then publish the index"""
+        self.file.flush()
+        committed = self.file.tell()
+        write_json_atomic(self.index_file, {
+            'rows': self.rows,
+            'committed_bytes': committed,
+            'last_row': self.last_row,
+            'updated_at': time.time()
+        })
+        self.last_flush = time.monotonic()
+
+        if committed >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        """Move the active file to a timestamped segment and start a new one"""
+        self.file.close()
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        base, ext = os.path.splitext(self.csv_file)
+        segment = f"{base}.{stamp}{ext}"
+        os.replace(self.csv_file, segment)
+        os.replace(self.index_file, f"{segment}.idx")
+
+        if self.compress_segments:
+            with open(segment, 'rb') as src, gzip.open(f"{segment}.gz", 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(segment)
+            os.replace(f"{segment}.idx", f"{segment}.gz.idx")
+            segment = f"{segment}.gz"
+
+        print(f"🔄 Rotated CSV segment → {segment}")
+        self.open_segment()
+
+    def close(self):
+        if self.file and not self.file.closed:
+            self.flush()
+            self.file.close()
+
+def write_json_atomic(path, data):
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_file, path)
+
+def read_index(csv_file):
+    """Index of a segment: rows, committed_bytes and last_row (or None)"""
+    index_file = f"{csv_file}.idx"
+    if not os.path.exists(index_file):
+        return None
+    try:
+        with open(index_file, 'r') as f:
+            return json.load(f)
+    except Exception:
+        return None
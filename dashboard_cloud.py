@@ -1,12 +1,22 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 from google.cloud import bigquery
 from google.oauth2 import service_account
 from datetime import datetime, timedelta
-import time
+import os
 import pytz
+from query_cache import SharedQueryCache
+from downsampling import downsample_frame
+from data_export import EXPORT_FORMATS, export_range
+from query_layer import (window_query, aggregate_query, rollup_stats_query,
+                         recent_users_query, ward_query, run_query,
+                         health_table_problems)
+from device_registry import registry_users_query
+from live_broker import LiveSubscriber
+from chart_engine import ChartStore, register_template
+from alert_rules import status_from_row, highest_level, level_rank
+from alert_stream import read_active_alerts, read_recent_events
 
 # ============================================================================
 # 1. PAGE CONFIGURATION
@@ -230,97 +240,72 @@ st.markdown(f"""
 # 4. CONFIGURATION
 # ============================================================================
 PROJECT_ID = "monitoring-system-with-lora"
-DATASET_ID = "realtime_health_monitoring_system_with_lora"
-TABLE_ID = "lora_sensor_logs"
+
+def setting(name, default):
+    """Environment variable, then Streamlit secret, then default"""
+    if name in os.environ:
+        return os.environ[name]
+    try:
+        return st.secrets.get(name, default)
+    except Exception:
+        return default
+
+# Raw table the charts, logs and exports read. Switch it only after
+# migrate_health_table.py has copied the data into the partitioned layout;
+# get_raw_table_problems warns while it is unpartitioned.
+RAW_TABLE = setting(
+    "RAW_TABLE", f"{PROJECT_ID}.realtime_health_monitoring_system_with_lora.lora_sensor_logs"
+)
+
+# Rollup tables maintained by Uploader.py next to its raw table
+ROLLUP_DATASET_ID = "sdp2_live_monitoring_system"
+ROLLUP_BASE_TABLE = "lora_health_data_clean2"
+REGISTRY_TABLE = f"{PROJECT_ID}.{ROLLUP_DATASET_ID}.device_registry"
+ROLLUP_TTL = 30
+STATS_RANGES = [1, 6, 24, 168, 720]  # Hours: up to 30 days
+
+# Shared result cache TTLs (seconds)
+USER_LIST_TTL = 300
+WINDOW_TTL = 2
+UPLOAD_INTERVAL_SECONDS = 5  # Uploader.py's loop period
+# Delta queries re-read this much before the newest cached row: late
+# uploader batches, outbox replays, other users' rows and same-timestamp
+# rows land behind it. merge_window drops the re-read duplicates.
+DELTA_LOOKBACK_SECONDS = 2 * UPLOAD_INTERVAL_SECONDS
+
+# Ranges at or above this are bucketed in BigQuery instead of fetched raw
+AGGREGATE_FROM_HOURS = 6
+CHART_WIDTH_PX = 600  # Approximate plot width of a half-page chart
+BUCKET_STEPS = [1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600]
+CHART_TARGET_POINTS = 500  # Points per series after downsampling
+CHART_DOWNSAMPLER = 'lttb'  # 'lttb' or 'minmax'
+AGGREGATED_VITALS = ['hr', 'spo2', 'temp', 'humidity']
+
+# Live fragments: charts refresh every N status refreshes
+CHART_REFRESH_MULTIPLIER = 2
+
+# Optional push channel (python live_broker.py); tiles then skip BigQuery
+LIVE_BROKER_URL = os.environ.get("LIVE_BROKER_URL", "")
+LIVE_REFRESH_SECONDS = 1
+LIVE_STALE_SECONDS = 10  # Older pushed readings fall back to BigQuery
+
+# Alerts evaluated by the uploader (alert_stream.py); absent file = evaluate here
+ALERT_EVENTS_DB = os.environ.get("ALERT_EVENTS_DB", "alert_events.db")
+
+# Ward overview: one query returns every device's latest row and summary
+WARD_MINUTES = 5
+WARD_STALE_SECONDS = 60  # No reading for this long = device shown as offline
 
 # ============================================================================
 # 5. HEALTH ALERT SYSTEM
 # ============================================================================
 def analyze_health_status(latest_data):
-    """Analyze health status and environmental factors"""
-    alerts = []
-    recommendations = []
-    alert_level = None
-    
-    hr = float(latest_data['hr'])
-    spo2 = float(latest_data['spo2'])
-    temp = float(latest_data['temp'])
-    humidity = float(latest_data['humidity'])
-    
-    # CHECK FOR NO FINGER PLACEMENT
-    if hr == 0 and spo2 == 0:
-        alerts.append("👆 No Finger Detected on Sensor")
-        recommendations.append("Place finger on MAX30102 sensor to measure heart rate and SpO2")
-        if alert_level is None:
-            alert_level = 'info'
-    
-    # CRITICAL ALERTS (only if measuring)
-    if hr > 120 or (hr > 0 and hr < 40):
-        alerts.append(f"🚨 CRITICAL: Heart Rate {hr:.0f} BPM is {'too high' if hr > 120 else 'too low'}!")
-        recommendations.append("Seek immediate medical attention")
-        alert_level = 'critical'
-    
-    if spo2 > 0 and spo2 < 90:
-        alerts.append(f"🚨 CRITICAL: SpO2 {spo2:.0f}% is dangerously low!")
-        recommendations.append("Immediate oxygen support may be needed")
-        alert_level = 'critical'
-    
-    # WARNING ALERTS (only if measuring)
-    if hr > 100 and hr <= 120:
-        alerts.append(f"⚠️ WARNING: Elevated Heart Rate ({hr:.0f} BPM)")
-        recommendations.append("Check for physical activity, stress, or environmental factors")
-        if alert_level != 'critical':
-            alert_level = 'warning'
-    
-    if hr < 60 and hr > 0 and hr >= 40:
-        alerts.append(f"⚠️ WARNING: Low Heart Rate ({hr:.0f} BPM)")
-        recommendations.append("Monitor for symptoms of dizziness or fatigue")
-        if alert_level != 'critical':
-            alert_level = 'warning'
-    
-    if spo2 > 0 and spo2 < 95 and spo2 >= 90:
-        alerts.append(f"⚠️ WARNING: Low SpO2 ({spo2:.0f}%)")
-        recommendations.append("Ensure adequate ventilation and monitor breathing")
-        if alert_level != 'critical':
-            alert_level = 'warning'
-    
-    # ENVIRONMENTAL FACTORS
-    if temp > 30:
-        alerts.append(f"🌡️ High Temperature: {temp:.1f}°C may affect vitals")
-        recommendations.append("Consider cooling the environment")
-        if alert_level is None:
-            alert_level = 'info'
-    
-    if humidity > 70:
-        alerts.append(f"💧 High Humidity: {humidity:.1f}% may cause discomfort")
-        recommendations.append("Increase ventilation or use dehumidifier")
-        
-        if hr > 90 or spo2 < 97:
-            alerts.append("⚡ Humidity may be affecting heart rate and oxygen levels")
-            recommendations.append("High humidity reduces breathing efficiency")
-        
-        if alert_level is None:
-            alert_level = 'info'
-    
-    if humidity < 30:
-        alerts.append(f"💧 Low Humidity: {humidity:.1f}% detected")
-        recommendations.append("Low humidity can cause respiratory irritation")
-        if alert_level is None:
-            alert_level = 'info'
-    
-    if temp > 28 and humidity > 60:
-        alerts.append("🔥 High Heat Index: Temperature + Humidity combination detected")
-        recommendations.append("Risk of heat stress - ensure hydration and rest")
-        if alert_level == 'info':
-            alert_level = 'warning'
-    
-    if temp < 18:
-        alerts.append(f"❄️ Low Temperature: {temp:.1f}°C may affect circulation")
-        recommendations.append("Ensure adequate heating and warm clothing")
-        if alert_level is None:
-            alert_level = 'info'
-    
-    return alert_level, alerts, recommendations
+    """
+    Analyze health status and environmental factors of one reading.
+    Thresholds live in alert_rules.ALERT_RULES; use alert_rules.alert_spans
+    to evaluate the same table over a whole window.
+    """
+    return status_from_row(latest_data)
 
 # ============================================================================
 # 6. BIGQUERY CONNECTION
@@ -349,140 +334,257 @@ def get_bigquery_client():
         st.error(f"❌ Connection failed: {e}")
         return None
 
+@st.cache_resource(ttl=3600)
+def get_raw_table_problems(_client):
+    """Layout check of RAW_TABLE, once an hour per server process"""
+    try:
+        return health_table_problems(_client, RAW_TABLE)
+    except Exception as e:
+        return [f"Could not inspect {RAW_TABLE}: {e}"]
+
+@st.cache_resource
+def get_live_subscriber():
+    """One SSE subscription per server process, or None without a broker"""
+    if not LIVE_BROKER_URL:
+        return None
+    return LiveSubscriber(LIVE_BROKER_URL)
+
+@st.cache_resource
+def get_query_cache():
+    """One result cache for the whole server process, shared by all viewers"""
+    return SharedQueryCache(max_entries=64)
+
 # ============================================================================
 # 7. DATA FETCHING
 # ============================================================================
 def get_user_list(client):
-    """Get list of unique users"""
-    query = f"""
-    SELECT DISTINCT ID_user
-    FROM `{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}`
-    WHERE timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 7 DAY)
-    ORDER BY ID_user
+    """Get list of users from the device registry (raw-table scan as fallback)"""
+    def load(previous):
+        registry_sql, registry_params = registry_users_query(REGISTRY_TABLE)
+        fallback_sql, fallback_params = recent_users_query(RAW_TABLE, days=7)
+        for sql, params in ((registry_sql, registry_params), (fallback_sql, fallback_params)):
+            try:
+                df = run_query(client, sql, params).to_dataframe()
+                if not df.empty:
+                    return ["All Users"] + df['ID_user'].tolist()
+            except Exception as e:
+                print(f"❌ User list query failed: {e}")
+        return previous or ["All Users"]
+    
+    return get_query_cache().get(('users',), load, ttl=USER_LIST_TTL)
+
+def query_window_rows(client, hours, selected_user, limit, since=None):
     """
-    try:
-        df = client.query(query).to_dataframe()
-        if not df.empty:
-            return ["All Users"] + df['ID_user'].tolist()
-        return ["All Users"]
-    except:
-        return ["All Users"]
+    Query the newest rows in the window; with `since`, only rows after
+    it (callers pass an overlap before their newest cached row)
+    """
+    sql, params = window_query(RAW_TABLE, hours, selected_user, limit, since=since)
+    df = run_query(client, sql, params).to_dataframe()
+    
+    if not df.empty:
+        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+        if 'ID_user' in df.columns:
+            df.rename(columns={'ID_user': 'id_user'}, inplace=True)
+    
+    return df
+
+def merge_window(cached, new_rows, hours, limit):
+    """Append new rows, evict rows that left the window, keep newest `limit`"""
+    if cached is None or cached.empty:
+        df = new_rows
+    elif new_rows.empty:
+        df = cached
+    else:
+        df = pd.concat([new_rows, cached], ignore_index=True)
+        df = df.drop_duplicates(subset=['id_user', 'timestamp'])
+    
+    if df.empty:
+        return df
+    
+    window_start = datetime.now(pytz.UTC) - timedelta(hours=hours)
+    df = df[df['timestamp'] >= window_start]
+    return df.sort_values('timestamp', ascending=False).head(limit).reset_index(drop=True)
 
 def fetch_latest_data(client, hours=1, selected_user="All Users", limit=2000):
     """
     Fetch data from BigQuery
     30Hz = 30 packets/second = 1800 packets/minute = 108,000 packets/hour
     Adjusted limit to handle high-frequency data
+    
+    The rolling window is shared by every viewer of the same
+    (user, hours, limit) and refreshed at most every WINDOW_TTL seconds;
+    each refresh only asks BigQuery for rows from DELTA_LOOKBACK_SECONDS
+    before the latest held, and merges them without duplicates
+    """
+    def load(cached):
+        since = None
+        if cached is not None and not cached.empty:
+            since = cached['timestamp'].max() - timedelta(seconds=DELTA_LOOKBACK_SECONDS)
+        try:
+            new_rows = query_window_rows(client, hours, selected_user, limit, since=since)
+        except Exception as e:
+            st.error(f"❌ Query failed: {e}")
+            return cached if cached is not None else pd.DataFrame()
+        return merge_window(cached, new_rows, hours, limit)
+    
+    key = ('window', selected_user, hours, limit)
+    return get_query_cache().get(key, load, ttl=WINDOW_TTL)
+
+def choose_bucket_seconds(hours, width_px=CHART_WIDTH_PX):
+    """Smallest round bucket width giving at most ~one bucket per pixel"""
+    needed = hours * 3600 / width_px
+    for step in BUCKET_STEPS:
+        if step >= needed:
+            return step
+    return BUCKET_STEPS[-1]
+
+def fetch_aggregated_data(client, hours, selected_user="All Users", width_px=CHART_WIDTH_PX):
     """
+    Per-bucket min/max/avg of the vitals computed in BigQuery, covering
+    the whole range in a few hundred rows instead of a truncated raw fetch
+    """
+    bucket = choose_bucket_seconds(hours, width_px)
+    sql, params = aggregate_query(RAW_TABLE, hours, selected_user, bucket, AGGREGATED_VITALS)
+    
+    def load(previous):
+        try:
+            df = run_query(client, sql, params).to_dataframe().rename(columns={'bucket_start': 'timestamp'})
+            if not df.empty:
+                df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+            return df
+        except Exception as e:
+            st.error(f"❌ Aggregate query failed: {e}")
+            return previous if previous is not None else pd.DataFrame()
+    
+    # A new bucket only completes every `bucket` seconds
+    ttl = min(max(bucket / 2, 5), 60)
+    key = ('aggregate', selected_user, hours, bucket)
+    return get_query_cache().get(key, load, ttl=ttl), bucket
+
+def fetch_rollup_stats(client, hours, selected_user="All Users"):
+    """
+    Range statistics from the pre-aggregated rollup tables: combines the
+    partial rows with SUM/MIN/MAX, so 30 days costs about as much as 1 hour.
+    The hour table is rebuilt by the uploader every few minutes.
+    """
+    granularity = 'minute' if hours <= 24 else 'hour'
+    table = f"{PROJECT_ID}.{ROLLUP_DATASET_ID}.{ROLLUP_BASE_TABLE}_rollup_{granularity}"
+    sql, params = rollup_stats_query(table, hours, selected_user)
+    
+    def load(previous):
+        try:
+            return run_query(client, sql, params).to_dataframe()
+        except Exception as e:
+            print(f"❌ Rollup query failed: {e}")
+            return previous if previous is not None else pd.DataFrame()
+    
+    by_activity = get_query_cache().get(('rollup', selected_user, hours), load, ttl=ROLLUP_TTL)
+    if by_activity.empty or by_activity['samples'].sum() == 0:
+        return None
     
-    if selected_user == "All Users":
-        user_filter = ""
-    else:
-        user_filter = f"AND ID_user = '{selected_user}'"
-    
-    query = f"""
-    SELECT 
-        ID_user,
-        timestamp,
-        temp,
-        spo2,
-        hr,
-        ax, ay, az,
-        gx, gy, gz,
-        humidity,
-        activity
-    FROM `{PROJECT_ID}.{DATASET_ID}.{TABLE_ID}`
-    WHERE timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {hours} HOUR)
-    {user_filter}
-    ORDER BY timestamp DESC
-    LIMIT {limit}
+    samples = by_activity['samples'].sum()
+    return {
+        'samples': int(samples),
+        'avg_hr': by_activity['hr_sum'].sum() / samples,
+        'avg_temp': by_activity['temp_sum'].sum() / samples,
+        'hr_min': by_activity['hr_min'].min(),
+        'hr_max': by_activity['hr_max'].max(),
+        'activity_counts': by_activity.set_index('activity')['samples'].sort_values(ascending=False)
+    }
+
+def fetch_ward_overview(client, minutes=WARD_MINUTES):
+    """
+    Latest row and a short summary for every device seen in the last
+    `minutes` - a single query per refresh however many devices there are
     """
+    sql, params = ward_query(RAW_TABLE, minutes)
     
-    try:
-        df = client.query(query).to_dataframe()
-        
-        if not df.empty:
-            df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
-            if 'ID_user' in df.columns:
-                df.rename(columns={'ID_user': 'id_user'}, inplace=True)
-        
-        return df
-    except Exception as e:
-        st.error(f"❌ Query failed: {e}")
-        return pd.DataFrame()
+    def load(previous):
+        try:
+            df = run_query(client, sql, params).to_dataframe()
+            return df.rename(columns={'ID_user': 'id_user'})
+        except Exception as e:
+            print(f"❌ Ward query failed: {e}")
+            return previous if previous is not None else pd.DataFrame()
+    
+    return get_query_cache().get(('ward', minutes), load, ttl=WINDOW_TTL)
+
+def fetch_alert_status(selected_user="All Users"):
+    """
+    (alert_level, alerts, recommendations) from the uploader's alert store,
+    or None when there is no store and alerts must be computed here
+    """
+    if not os.path.exists(ALERT_EVENTS_DB):
+        return None
+    
+    def load(previous):
+        try:
+            return read_active_alerts(ALERT_EVENTS_DB, selected_user)
+        except Exception as e:
+            print(f"❌ Alert store read failed: {e}")
+            return previous
+    
+    active = get_query_cache().get(('alerts', selected_user), load, ttl=LIVE_REFRESH_SECONDS)
+    if active is None:
+        return None
+    
+    alerts = active['message'].tolist()
+    if selected_user == "All Users":
+        alerts = [f"👤 {user}: {message}" for user, message in zip(active['id_user'], alerts)]
+    return highest_level(active['level'].tolist()), alerts, active['recommendation'].unique().tolist()
 
 # ============================================================================
 # 8. CHARTS - DARK OLIVE COLOR SCHEME
 # ============================================================================
+register_template(COLORS)
+
+def get_chart_store():
+    """This session's figures, kept across reruns so refreshes only swap data"""
+    if 'chart_store' not in st.session_state:
+        st.session_state.chart_store = ChartStore()
+    return st.session_state.chart_store
+
 def create_minimal_line_chart(df, y_col, title, color=COLORS['dark_olive']):
     """
     Create minimal line chart with dark olive theme
-    Optimized for 30Hz data - samples every Nth point for smooth rendering
+    Optimized for 30Hz data - LTTB downsampling keeps spikes and dips
     """
-    fig = go.Figure()
+    # For 30Hz data, reduce to ~500 points while preserving extremes
+    df_sampled = downsample_frame(
+        df.sort_values('timestamp'), 'timestamp', y_col,
+        n_out=CHART_TARGET_POINTS, method=CHART_DOWNSAMPLER
+    )
     
-    # For 30Hz data, sample to ~500 points max for smooth chart rendering
-    if len(df) > 500:
-        # Sample every Nth row to get ~500 points
-        step = len(df) // 500
-        df_sampled = df.iloc[::step].copy()
-    else:
-        df_sampled = df
-    
-    fig.add_trace(go.Scatter(
-        x=df_sampled['timestamp'],
-        y=df_sampled[y_col],
-        mode='lines',
-        line=dict(color=color, width=2),
-        fill='tozeroy',
-        fillcolor=f'rgba(85, 107, 47, 0.1)'  # Light olive fill
-    ))
-    
-    fig.update_layout(
-        title=dict(text=title, font=dict(size=14, color=COLORS['dark_olive'], family='Arial'), x=0),
-        paper_bgcolor='rgba(247, 231, 206, 0.95)',
-        plot_bgcolor='rgba(247, 231, 206, 0.5)',
-        font=dict(color=COLORS['text_light'], size=11),
-        xaxis=dict(gridcolor='rgba(85, 107, 47, 0.15)', showgrid=True, zeroline=False),
-        yaxis=dict(gridcolor='rgba(85, 107, 47, 0.15)', showgrid=True, zeroline=False),
-        height=280,
-        margin=dict(l=50, r=30, t=40, b=40),
-        hovermode='x unified'
+    return get_chart_store().line(
+        ('line', y_col, title), df_sampled['timestamp'], df_sampled[y_col], title, color
     )
+
+def create_envelope_chart(agg_df, y_col, title, color=COLORS['dark_olive']):
+    """
+    Bucketed chart for long ranges: average line inside a min/max band,
+    so spikes and dips stay visible however wide the window
+    """
+    agg_df = downsample_frame(agg_df, 'timestamp', y_col, n_out=CHART_TARGET_POINTS, method='minmax')
     
-    return fig
+    return get_chart_store().envelope(
+        ('envelope', y_col, title), agg_df['timestamp'],
+        agg_df[f'{y_col}_min'], agg_df[f'{y_col}_max'], agg_df[y_col], title, color
+    )
 
 def create_minimal_bar_chart(df):
     """Create minimal activity distribution"""
-    activity_counts = df['activity'].value_counts().reset_index()
-    activity_counts.columns = ['activity', 'count']
-    
-    fig = go.Figure()
-    
-    fig.add_trace(go.Bar(
-        x=activity_counts['activity'],
-        y=activity_counts['count'],
-        marker=dict(color=COLORS['dark_olive'], line=dict(color=COLORS['olive'], width=1))
-    ))
-    
-    fig.update_layout(
-        title=dict(text='Activity Distribution', font=dict(size=14, color=COLORS['dark_olive']), x=0),
-        paper_bgcolor='rgba(247, 231, 206, 0.95)',
-        plot_bgcolor='rgba(247, 231, 206, 0.5)',
-        font=dict(color=COLORS['text_light'], size=11),
-        xaxis=dict(gridcolor='rgba(85, 107, 47, 0.15)', showgrid=False),
-        yaxis=dict(gridcolor='rgba(85, 107, 47, 0.15)', showgrid=True),
-        height=280,
-        margin=dict(l=50, r=30, t=40, b=40)
-    )
+    activity_counts = df['activity'].value_counts()
     
-    return fig
+    return get_chart_store().bar(
+        ('bar', 'activity'), activity_counts.index, activity_counts.values,
+        'Activity Distribution', COLORS['dark_olive'], COLORS['olive']
+    )
 
 # ============================================================================
-# 9. MAIN DASHBOARD
+# 9. DASHBOARD SECTIONS
 # ============================================================================
-def main():
-    # Header
+def render_header():
+    """Static page header - rendered once per full run"""
     col1, col2 = st.columns([3, 1])
     
     with col1:
@@ -507,78 +609,10 @@ def main():
         """, unsafe_allow_html=True)
     
     st.markdown("<hr style='margin: 10px 0;'>", unsafe_allow_html=True)
-    
-    # Initialize client
-    client = get_bigquery_client()
-    if not client:
-        return
-    
-    # ============================================================================
-    # SIDEBAR
-    # ============================================================================
-    with st.sidebar:
-        st.markdown("### ⚙️ Settings")
-        st.markdown("<br>", unsafe_allow_html=True)
-        
-        # 30Hz Info Banner
-        st.info("⚡ **30Hz Mode Active**\n\n30 readings/second")
-        
-        st.markdown("**👤 Select User to Monitor:**")
-        user_list = get_user_list(client)
-        selected_user = st.selectbox("User", options=user_list, index=0, label_visibility="collapsed")
-        
-        if selected_user == "All Users":
-            st.info("👥 Monitoring all users")
-        else:
-            st.success(f"✅ Monitoring: {selected_user}")
-        
-        st.markdown("---")
-        
-        st.markdown("**⏱️ Time Range:**")
-        hours = st.select_slider("Time Range", options=[1, 3, 6, 12, 24], value=1,
-                                 format_func=lambda x: f"{x} hour{'s' if x > 1 else ''}",
-                                 label_visibility="collapsed")
-        
-        st.markdown("---")
-        
-        st.markdown("**📋 Log Display:**")
-        log_limit = st.slider("Number of records to show", 10, 100, 50, step=10)
-        
-        st.markdown("---")
-        
-        st.markdown("**🔄 Auto Refresh:**")
-        auto_refresh = st.checkbox("Enable Auto Refresh", value=True, label_visibility="collapsed")
-        if auto_refresh:
-            refresh_rate = st.slider("⏲️ Refresh Rate (seconds)", 3, 30, 5)  # Faster refresh for 30Hz
-        
-        st.markdown("---")
-        
-        if st.button("🔄 Refresh Now", use_container_width=True):
-            st.rerun()
-        
-        st.markdown("---")
-        
-        st.markdown("**ℹ️ System Info:**")
-        current_time = datetime.now(pytz.UTC)
-        st.caption(f"🕐 Updated: {current_time.strftime('%H:%M:%S UTC')}")
-    
-    # ============================================================================
-    # FETCH DATA
-    # ============================================================================
-    with st.spinner("⏳ Loading data..."):
-        df = fetch_latest_data(client, hours=hours, selected_user=selected_user, limit=500)
-    
-    if df.empty:
-        st.warning(f"⚠️ No data found for {selected_user} in the last {hours} hour(s)")
-        st.info("💡 Try selecting 'All Users' or increasing the time range")
-        return
-    
-    latest = df.iloc[0]
-    
-    # ============================================================================
-    # INTELLIGENT HEALTH ALERTS
-    # ============================================================================
-    alert_level, alerts, recommendations = analyze_health_status(latest)
+
+def render_alerts(latest, status=None):
+    """Health alerts: the uploader's active alerts, else the newest reading's"""
+    alert_level, alerts, recommendations = status or analyze_health_status(latest)
     
     if alert_level == 'critical':
         with st.container():
@@ -615,21 +649,22 @@ def main():
     else:
         st.success("✅ **All vital signs within normal range** | Environment conditions optimal")
         st.markdown("---")
-    
-    # ============================================================================
-    # CSV DOWNLOAD
-    # ============================================================================
+
+def render_summary_bar(client, df, hours, selected_user):
+    """On-demand export and record/data-rate summary"""
     col_left, col_right = st.columns([3, 1])
     
     with col_right:
-        csv_data = df.to_csv(index=False).encode('utf-8')
-        filename = f"health_data_{selected_user}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        
+        # Nothing is serialized until the button is clicked, and then the
+        # whole selected range is exported, not just the loaded rows
+        fmt = st.selectbox("Export format", options=list(EXPORT_FORMATS), index=0,
+                           format_func=str.upper, label_visibility="collapsed")
+        filename = f"health_data_{selected_user}_{hours}h_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
         st.download_button(
-            label="📥 Download CSV",
-            data=csv_data,
+            label=f"📥 Download {fmt.upper()}",
+            data=lambda: export_range(client, RAW_TABLE, hours, selected_user, fmt),
             file_name=filename,
-            mime="text/csv",
+            mime=EXPORT_FORMATS[fmt],
             use_container_width=True
         )
     
@@ -653,10 +688,9 @@ def main():
             </p>
         </div>
         """, unsafe_allow_html=True)
-    
-    # ============================================================================
-    # METRICS - CHAMPAGNE CARDS WITH OLIVE TEXT
-    # ============================================================================
+
+def render_metric_cards(latest):
+    """Champagne metric cards with olive text"""
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
@@ -735,120 +769,235 @@ def main():
         """, unsafe_allow_html=True)
     
     st.markdown("<br>", unsafe_allow_html=True)
+
+def render_vital_charts(client, df, hours, selected_user):
+    """VITAL SIGNS tab"""
+    agg_df = None
+    if hours >= AGGREGATE_FROM_HOURS:
+        # Long ranges: bucketed in BigQuery so the whole range is shown
+        agg_df, bucket = fetch_aggregated_data(client, hours, selected_user)
+        st.caption(f"📉 {hours}h range aggregated server-side into {bucket}s buckets "
+                   f"({len(agg_df)} points, min/max band + average)")
+    
+    def vital_chart(col, title):
+        if agg_df is not None and not agg_df.empty:
+            return create_envelope_chart(agg_df, col, title)
+        return create_minimal_line_chart(df, col, title)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(vital_chart('hr', '❤️ Heart Rate (BPM)'), use_container_width=True)
+    with col2:
+        st.plotly_chart(vital_chart('spo2', '💨 SpO2 (%)'), use_container_width=True)
     
-    # ============================================================================
-    # TABS WITH CHARTS AND LOG TABLE
-    # ============================================================================
-    tab1, tab2, tab3, tab4 = st.tabs(["📈 VITAL SIGNS", "🎯 MOTION DATA", "📊 STATISTICS", "📋 DATA LOG"])
+    col3, col4 = st.columns(2)
+    with col3:
+        st.plotly_chart(vital_chart('temp', '🌡️ Temperature (°C)'), use_container_width=True)
+    with col4:
+        st.plotly_chart(vital_chart('humidity', '💧 Humidity (%)'), use_container_width=True)
+
+def render_motion_charts(df):
+    """MOTION DATA tab"""
+    col1, col2 = st.columns(2)
+    with col1:
+        st.plotly_chart(create_minimal_line_chart(df, 'ax', '📐 Accelerometer X'), use_container_width=True)
+    with col2:
+        st.plotly_chart(create_minimal_bar_chart(df), use_container_width=True)
+
+def render_statistics(client, df, selected_user):
+    """STATISTICS tab"""
+    stats_hours = st.selectbox(
+        "Statistics range", options=STATS_RANGES, index=0,
+        format_func=lambda x: f"Last {x} hours" if x <= 24 else f"Last {x // 24} days"
+    )
+    stats = fetch_rollup_stats(client, stats_hours, selected_user)
     
-    with tab1:
-        col1, col2 = st.columns(2)
-        with col1:
-            st.plotly_chart(create_minimal_line_chart(df, 'hr', '❤️ Heart Rate (BPM)'), use_container_width=True)
-        with col2:
-            st.plotly_chart(create_minimal_line_chart(df, 'spo2', '💨 SpO2 (%)'), use_container_width=True)
-        
-        col3, col4 = st.columns(2)
-        with col3:
-            st.plotly_chart(create_minimal_line_chart(df, 'temp', '🌡️ Temperature (°C)'), use_container_width=True)
-        with col4:
-            st.plotly_chart(create_minimal_line_chart(df, 'humidity', '💧 Humidity (%)'), use_container_width=True)
+    if stats is not None:
+        total_records = stats['samples']
+        avg_hr = stats['avg_hr']
+        avg_temp = stats['avg_temp']
+        st.caption(f"⚡ From rollup tables | HR range {stats['hr_min']:.0f}–{stats['hr_max']:.0f} BPM")
+    else:
+        # Rollups not available yet: fall back to the fetched rows
+        total_records = len(df)
+        avg_hr = df['hr'].mean()
+        avg_temp = df['temp'].mean()
+        st.caption("ℹ️ Rollups unavailable - showing statistics of the loaded records")
     
-    with tab2:
-        col1, col2 = st.columns(2)
-        with col1:
-            st.plotly_chart(create_minimal_line_chart(df, 'ax', '📐 Accelerometer X'), use_container_width=True)
-        with col2:
-            st.plotly_chart(create_minimal_bar_chart(df), use_container_width=True)
+    col1, col2, col3 = st.columns(3)
     
-    with tab3:
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.markdown(f"""
-            <div style="background: rgba(247, 231, 206, 0.95); padding: 20px; border-radius: 8px; 
-                        border: 1px solid rgba(85, 107, 47, 0.2);">
-                <p style="color: {COLORS['text_light']}; font-size: 11px; margin: 0; letter-spacing: 0.5px;">📊 Total Records</p>
-                <h2 style="color: {COLORS['dark_olive']}; margin: 8px 0 0 0; font-weight: 500;">{len(df)}</h2>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            avg_hr = df['hr'].mean()
-            st.markdown(f"""
-            <div style="background: rgba(247, 231, 206, 0.95); padding: 20px; border-radius: 8px; 
-                        border: 1px solid rgba(85, 107, 47, 0.2);">
-                <p style="color: {COLORS['text_light']}; font-size: 11px; margin: 0; letter-spacing: 0.5px;">❤️ Average HR</p>
-                <h2 style="color: {COLORS['dark_olive']}; margin: 8px 0 0 0; font-weight: 500;">{avg_hr:.1f} BPM</h2>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            avg_temp = df['temp'].mean()
-            st.markdown(f"""
-            <div style="background: rgba(247, 231, 206, 0.95); padding: 20px; border-radius: 8px; 
-                        border: 1px solid rgba(85, 107, 47, 0.2);">
-                <p style="color: {COLORS['text_light']}; font-size: 11px; margin: 0; letter-spacing: 0.5px;">🌡️ Average Temp</p>
-                <h2 style="color: {COLORS['dark_olive']}; margin: 8px 0 0 0; font-weight: 500;">{avg_temp:.1f}°C</h2>
-            </div>
-            """, unsafe_allow_html=True)
+    with col1:
+        st.markdown(f"""
+        <div style="background: rgba(247, 231, 206, 0.95); padding: 20px; border-radius: 8px; 
+                    border: 1px solid rgba(85, 107, 47, 0.2);">
+            <p style="color: {COLORS['text_light']}; font-size: 11px; margin: 0; letter-spacing: 0.5px;">📊 Total Records</p>
+            <h2 style="color: {COLORS['dark_olive']}; margin: 8px 0 0 0; font-weight: 500;">{total_records}</h2>
+        </div>
+        """, unsafe_allow_html=True)
     
-    with tab4:
-        st.markdown("### 📋 Real-time Data Log")
-        st.caption(f"Showing latest {log_limit} records")
-        
-        display_df = df.head(log_limit).copy()
-        display_df['timestamp'] = display_df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
-        
-        display_columns = {
-            'timestamp': '🕐 Time',
-            'id_user': '👤 User',
-            'hr': '❤️ HR (BPM)',
-            'spo2': '💨 SpO2 (%)',
-            'temp': '🌡️ Temp (°C)',
-            'humidity': '💧 Humidity (%)',
-            'activity': '🎯 Activity',
-            'ax': '📐 Accel X',
-            'ay': '📐 Accel Y',
-            'az': '📐 Accel Z'
-        }
-        
-        display_df = display_df[list(display_columns.keys())].rename(columns=display_columns)
-        
-        for col in display_df.columns:
-            if display_df[col].dtype in ['float64', 'float32']:
-                display_df[col] = display_df[col].round(2)
-        
-        st.dataframe(
-            display_df,
-            use_container_width=True,
-            hide_index=True,
-            height=400
-        )
-        
-        st.markdown("---")
-        st.markdown("### 📊 Log Summary")
-        
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric("📋 Records Shown", len(display_df))
-        
-        with col2:
-            time_range = (df['timestamp'].max() - df['timestamp'].min()).total_seconds() / 60
-            st.metric("⏱️ Time Span", f"{time_range:.1f} min")
-        
-        with col3:
-            activities = df.head(log_limit)['activity'].nunique()
-            st.metric("🎯 Activities", activities)
-        
-        with col4:
-            avg_hr_log = df.head(log_limit)['hr'].mean()
-            st.metric("❤️ Avg HR", f"{avg_hr_log:.0f} BPM")
+    with col2:
+        st.markdown(f"""
+        <div style="background: rgba(247, 231, 206, 0.95); padding: 20px; border-radius: 8px; 
+                    border: 1px solid rgba(85, 107, 47, 0.2);">
+            <p style="color: {COLORS['text_light']}; font-size: 11px; margin: 0; letter-spacing: 0.5px;">❤️ Average HR</p>
+            <h2 style="color: {COLORS['dark_olive']}; margin: 8px 0 0 0; font-weight: 500;">{avg_hr:.1f} BPM</h2>
+        </div>
+        """, unsafe_allow_html=True)
     
-    # ============================================================================
-    # FOOTER
-    # ============================================================================
+    with col3:
+        st.markdown(f"""
+        <div style="background: rgba(247, 231, 206, 0.95); padding: 20px; border-radius: 8px; 
+                    border: 1px solid rgba(85, 107, 47, 0.2);">
+            <p style="color: {COLORS['text_light']}; font-size: 11px; margin: 0; letter-spacing: 0.5px;">🌡️ Average Temp</p>
+            <h2 style="color: {COLORS['dark_olive']}; margin: 8px 0 0 0; font-weight: 500;">{avg_temp:.1f}°C</h2>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    if stats is not None:
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.bar_chart(stats['activity_counts'], color=COLORS['dark_olive'])
+
+def render_data_log(df, log_limit):
+    """DATA LOG tab"""
+    st.markdown("### 📋 Real-time Data Log")
+    st.caption(f"Showing latest {log_limit} records")
+    
+    display_df = df.head(log_limit).copy()
+    display_df['timestamp'] = display_df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    
+    display_columns = {
+        'timestamp': '🕐 Time',
+        'id_user': '👤 User',
+        'hr': '❤️ HR (BPM)',
+        'spo2': '💨 SpO2 (%)',
+        'temp': '🌡️ Temp (°C)',
+        'humidity': '💧 Humidity (%)',
+        'activity': '🎯 Activity',
+        'ax': '📐 Accel X',
+        'ay': '📐 Accel Y',
+        'az': '📐 Accel Z'
+    }
+    
+    display_df = display_df[list(display_columns.keys())].rename(columns=display_columns)
+    
+    for col in display_df.columns:
+        if display_df[col].dtype in ['float64', 'float32']:
+            display_df[col] = display_df[col].round(2)
+    
+    st.dataframe(
+        display_df,
+        use_container_width=True,
+        hide_index=True,
+        height=400
+    )
+    
+    st.markdown("---")
+    st.markdown("### 📊 Log Summary")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("📋 Records Shown", len(display_df))
+    
+    with col2:
+        time_range = (df['timestamp'].max() - df['timestamp'].min()).total_seconds() / 60
+        st.metric("⏱️ Time Span", f"{time_range:.1f} min")
+    
+    with col3:
+        activities = df.head(log_limit)['activity'].nunique()
+        st.metric("🎯 Activities", activities)
+    
+    with col4:
+        avg_hr_log = df.head(log_limit)['hr'].mean()
+        st.metric("❤️ Avg HR", f"{avg_hr_log:.0f} BPM")
+
+def render_alert_events(selected_user):
+    """Recent raised/cleared events written by the uploader's alert evaluator"""
+    if not os.path.exists(ALERT_EVENTS_DB):
+        return
+    try:
+        events = read_recent_events(ALERT_EVENTS_DB, selected_user, limit=20)
+    except Exception as e:
+        st.caption(f"❌ Alert events unavailable: {e}")
+        return
+    
+    st.markdown("---")
+    st.markdown("### 🚨 Alert Events")
+    if events.empty:
+        st.caption("No alert events recorded")
+    else:
+        st.dataframe(events, use_container_width=True, hide_index=True)
+
+WARD_LEVEL_STYLES = {
+    'critical': ('#B03A2E', 'rgba(176, 58, 46, 0.12)', '🚨'),
+    'warning': ('#C98A1B', 'rgba(201, 138, 27, 0.12)', '⚠️'),
+    'info': ('#4A7FA7', 'rgba(74, 127, 167, 0.10)', 'ℹ️'),
+    None: (COLORS['olive'], 'rgba(247, 231, 206, 0.95)', '✅'),
+    'offline': (COLORS['text_light'], 'rgba(200, 200, 190, 0.6)', '📴'),
+}
+
+def render_ward_overview(ward, alerts_only=False):
+    """Compact grid with one tile per device, most severe first"""
+    if ward.empty:
+        st.warning(f"⚠️ No devices reported in the last {WARD_MINUTES} minutes")
+        return
+    
+    now = datetime.now(pytz.UTC)
+    timestamps = pd.to_datetime(ward['timestamp'], utc=True)
+    ages = (now - timestamps).dt.total_seconds().to_numpy()
+    
+    tiles = []
+    for (_, row), age in zip(ward.iterrows(), ages):
+        level, alerts, _ = analyze_health_status(row)
+        state = 'offline' if age > WARD_STALE_SECONDS else level
+        tiles.append((state, level_rank(level) if state != 'offline' else -1, age, row, alerts))
+    
+    counts = {state: sum(1 for tile in tiles if tile[0] == state) for state in WARD_LEVEL_STYLES}
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("🏥 Devices", len(tiles))
+    col2.metric("🚨 Critical", counts['critical'])
+    col3.metric("⚠️ Warning", counts['warning'])
+    col4.metric("ℹ️ Notice", counts['info'])
+    col5.metric("📴 Offline", counts['offline'])
+    
+    if alerts_only:
+        tiles = [tile for tile in tiles if tile[1] > 0]
+        if not tiles:
+            st.success("✅ No device has an active alert")
+            return
+    tiles.sort(key=lambda tile: (-tile[1], str(tile[3]['id_user'])))
+    
+    # One HTML block for the whole grid: 200+ tiles stay a single element
+    cards = []
+    for state, _, age, row, alerts in tiles:
+        color, background, icon = WARD_LEVEL_STYLES[state]
+        hr = int(row['hr']) if pd.notna(row['hr']) else 0
+        spo2 = int(row['spo2']) if pd.notna(row['spo2']) else 0
+        temp = float(row['temp']) if pd.notna(row['temp']) else 0.0
+        avg_hr = f"{row['avg_hr']:.0f}" if pd.notna(row['avg_hr']) else "-"
+        seen = f"{age:.0f}s ago" if age < 120 else f"{age / 60:.0f}m ago"
+        detail = alerts[0] if alerts and state != 'offline' else f"{int(row['samples'])} samples · avg HR {avg_hr}"
+        cards.append(f"""
+        <div style="background: {background}; border-left: 4px solid {color}; border-radius: 6px;
+                    padding: 10px 12px; box-shadow: 0 1px 4px rgba(85, 107, 47, 0.12);" title="{detail}">
+            <div style="display: flex; justify-content: space-between; font-size: 12px; color: {COLORS['text_dark']};">
+                <b>{icon} {row['id_user']}</b><span style="color: {COLORS['text_light']};">{seen}</span>
+            </div>
+            <div style="font-size: 13px; color: {COLORS['dark_olive']}; margin-top: 6px;">
+                ❤️ {hr} &nbsp; 🫁 {spo2}% &nbsp; 🌡️ {temp:.1f}°
+            </div>
+            <div style="font-size: 10px; color: {color}; margin-top: 4px; white-space: nowrap;
+                        overflow: hidden; text-overflow: ellipsis;">{detail}</div>
+        </div>""")
+    
+    st.markdown(f"""
+    <div style="display: grid; grid-template-columns: repeat(auto-fill, minmax(170px, 1fr)); gap: 10px;">
+        {''.join(cards)}
+    </div>
+    """, unsafe_allow_html=True)
+
+def render_footer(df):
+    """Footer with live/stale indicator"""
     st.markdown("<br>", unsafe_allow_html=True)
     
     col1, col2, col3 = st.columns(3)
@@ -884,11 +1033,203 @@ def main():
             <p style="color: {COLORS['dark_olive']}; margin: 0; font-size: 12px;">👥 Users: {df['id_user'].nunique()}</p>
         </div>
         """, unsafe_allow_html=True)
+
+# ============================================================================
+# 10. MAIN DASHBOARD
+# ============================================================================
+def load_window(client, hours, selected_user):
+    """Rows for the current view, or None (with a notice) when there are none"""
+    df = fetch_latest_data(client, hours=hours, selected_user=selected_user, limit=500)
+    if df.empty:
+        st.warning(f"⚠️ No data found for {selected_user} in the last {hours} hour(s)")
+        st.info("💡 Try selecting 'All Users' or increasing the time range")
+        return None
+    return df
+
+def main():
+    render_header()
     
-    # Auto refresh
+    # Initialize client
+    client = get_bigquery_client()
+    if not client:
+        return
+    for problem in get_raw_table_problems(client):
+        st.warning(f"⚠️ {problem}. See migrate_health_table.py")
+    
+    # ============================================================================
+    # SIDEBAR
+    # ============================================================================
+    with st.sidebar:
+        st.markdown("### ⚙️ Settings")
+        st.markdown("<br>", unsafe_allow_html=True)
+        
+        # 30Hz Info Banner
+        st.info("⚡ **30Hz Mode Active**\n\n30 readings/second")
+        
+        st.markdown("**🖥️ View:**")
+        view_mode = st.radio("View", ["👤 Patient", "🏥 Ward overview"], horizontal=True,
+                             label_visibility="collapsed")
+        ward_mode = view_mode == "🏥 Ward overview"
+        
+        st.markdown("---")
+        
+        st.markdown("**👤 Select User to Monitor:**")
+        user_list = get_user_list(client)
+        selected_user = st.selectbox("User", options=user_list, index=0, label_visibility="collapsed")
+        
+        if selected_user == "All Users":
+            st.info("👥 Monitoring all users")
+        else:
+            st.success(f"✅ Monitoring: {selected_user}")
+        
+        st.markdown("---")
+        
+        st.markdown("**⏱️ Time Range:**")
+        hours = st.select_slider("Time Range", options=[1, 3, 6, 12, 24], value=1,
+                                 format_func=lambda x: f"{x} hour{'s' if x > 1 else ''}",
+                                 label_visibility="collapsed")
+        
+        st.markdown("---")
+        
+        st.markdown("**📋 Log Display:**")
+        log_limit = st.slider("Number of records to show", 10, 100, 50, step=10)
+        
+        st.markdown("---")
+        
+        st.markdown("**🔄 Auto Refresh:**")
+        auto_refresh = st.checkbox("Enable Auto Refresh", value=True, label_visibility="collapsed")
+        refresh_rate = None
+        if auto_refresh:
+            refresh_rate = st.slider("⏲️ Refresh Rate (seconds)", 3, 30, 5)  # Faster refresh for 30Hz
+        
+        st.markdown("---")
+        
+        if st.button("🔄 Refresh Now", use_container_width=True):
+            st.rerun()
+        
+        st.markdown("---")
+        
+        st.markdown("**ℹ️ System Info:**")
+        current_time = datetime.now(pytz.UTC)
+        st.caption(f"🕐 Updated: {current_time.strftime('%H:%M:%S UTC')}")
+        
+        cache_stats = get_query_cache().stats
+        st.caption(f"🧠 Query cache: {cache_stats['hits'] + cache_stats['shared']} hits / "
+                   f"{cache_stats['misses']} misses")
+        
+        live = get_live_subscriber()
+        if live:
+            st.caption(f"📡 Live push: {'connected' if live.connected else 'reconnecting'}")
+    
+    # ============================================================================
+    # LIVE FRAGMENTS
+    # Each part re-runs on its own timer instead of the whole script
+    # sleeping and re-running. Fragments share one query through the cache.
+    # ============================================================================
+    def every(multiplier=1):
+        return refresh_rate * multiplier if auto_refresh else None
+    
+    live = get_live_subscriber()
+    
+    if ward_mode:
+        alerts_only = st.toggle("Show only devices with alerts", value=False)
+        
+        @st.fragment(run_every=every())
+        def live_ward():
+            render_ward_overview(fetch_ward_overview(client), alerts_only)
+        
+        live_ward()
+        return
+    
+    def current_reading():
+        """Newest pushed reading if the broker has one, else from BigQuery"""
+        latest = live.latest_for(selected_user, max_age=LIVE_STALE_SECONDS) if live else None
+        if latest is not None:
+            return pd.Series(latest)
+        df = load_window(client, hours, selected_user)
+        return df.iloc[0] if df is not None else None
+    
+    tiles_every = None
     if auto_refresh:
-        time.sleep(refresh_rate)
-        st.rerun()
+        tiles_every = LIVE_REFRESH_SECONDS if live else refresh_rate
+    
+    @st.fragment(run_every=tiles_every)
+    def live_alerts():
+        status = fetch_alert_status(selected_user)
+        if status is not None:
+            # Already evaluated (with debounce) by the uploader - just read it
+            render_alerts(None, status)
+            return
+        latest = current_reading()
+        if latest is not None:
+            render_alerts(latest)
+    
+    @st.fragment(run_every=every())
+    def live_summary():
+        df = load_window(client, hours, selected_user)
+        if df is not None:
+            render_summary_bar(client, df, hours, selected_user)
+    
+    @st.fragment(run_every=tiles_every)
+    def live_cards():
+        latest = current_reading()
+        if latest is not None:
+            render_metric_cards(latest)
+    
+    @st.fragment(run_every=every(CHART_REFRESH_MULTIPLIER))
+    def live_vitals():
+        df = load_window(client, hours, selected_user)
+        if df is not None:
+            render_vital_charts(client, df, hours, selected_user)
+    
+    @st.fragment(run_every=every(CHART_REFRESH_MULTIPLIER))
+    def live_motion():
+        df = load_window(client, hours, selected_user)
+        if df is not None:
+            render_motion_charts(df)
+    
+    @st.fragment(run_every=ROLLUP_TTL if auto_refresh else None)
+    def live_statistics():
+        df = load_window(client, hours, selected_user)
+        if df is not None:
+            render_statistics(client, df, selected_user)
+    
+    @st.fragment(run_every=every())
+    def live_log():
+        df = load_window(client, hours, selected_user)
+        if df is not None:
+            render_data_log(df, log_limit)
+        render_alert_events(selected_user)
+    
+    @st.fragment(run_every=every())
+    def live_footer():
+        df = load_window(client, hours, selected_user)
+        if df is not None:
+            render_footer(df)
+    
+    with st.spinner("⏳ Loading data..."):
+        live_alerts()
+        live_summary()
+        live_cards()
+    
+    # ============================================================================
+    # TABS
+    # ============================================================================
+    tab1, tab2, tab3, tab4 = st.tabs(["📈 VITAL SIGNS", "🎯 MOTION DATA", "📊 STATISTICS", "📋 DATA LOG"])
+    
+    with tab1:
+        live_vitals()
+    with tab2:
+        live_motion()
+    with tab3:
+        live_statistics()
+    with tab4:
+        live_log()
+    
+    # ============================================================================
+    # FOOTER
+    # ============================================================================
+    live_footer()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
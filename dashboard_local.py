@@ -6,25 +6,31 @@ import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import time
 import numpy as np
-from collections import deque
-import json
 import os
+from ring_history import SampleRing, DEFAULT_CAPACITY, SAMPLE_RATE_HZ
+from downsampling import minmax_indices
+from file_watcher import SnapshotWatcher, drain
+from parquet_archive import read_archive
+
+HISTORY_CAPACITY = int(os.environ.get("LOCAL_HISTORY_SAMPLES", DEFAULT_CAPACITY))
+CHART_POINTS = 600  # Chart cost stays flat however long the history gets
+JSON_FILE = 'health_data_streamlit.json'
+STALE_SECONDS = 10
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", "archive")
 
 # ... [Copy all the display functions from previous dashboard but remove simulation] ...
 
-def load_health_data_local():
-    """Load health data from Uploader.py JSON file"""
-    json_file = 'health_data_streamlit.json'
-    
-    if os.path.exists(json_file):
-        try:
-            with open(json_file, 'r') as f:
-                data = json.load(f)
-                return data
-        except:
-            pass
+@st.cache_resource
+def get_snapshot_watcher():
+    """One watcher thread per process, shared by every session"""
+    return SnapshotWatcher(JSON_FILE)
+
+def load_health_data_local(watcher):
+    """Newest snapshot of Uploader.py's JSON file, as seen by the watcher"""
+    if watcher.latest is not None:
+        return watcher.latest
     
-    # If no file or error, return empty
+    # If no file yet, return empty
     return {
         'status': 'disconnected',
         'is_real_data': False,
@@ -40,10 +46,46 @@ def load_health_data_local():
         }
     }
 
+def render_archive_history(hours, node=None):
+    """Longer history from the Parquet archive: only hr/spo2 of the range are read"""
+    start = pd.Timestamp.now(tz='UTC') - pd.Timedelta(hours=hours)
+    try:
+        df = read_archive(ARCHIVE_DIR, columns=['hr', 'spo2'], start=start,
+                          nodes=[node] if node else None)
+    except Exception as e:
+        st.caption(f"❌ Archive unreadable: {e}")
+        return
+    if df.empty:
+        st.caption(f"No archived data in {ARCHIVE_DIR}/ for the last {hours}h")
+        return
+    
+    df = df.sort_values('timestamp')
+    indices = np.unique(np.concatenate([
+        minmax_indices(df[name].to_numpy(), CHART_POINTS // 2) for name in ('hr', 'spo2')
+    ]))
+    st.line_chart(df.iloc[indices].set_index('timestamp')[['hr', 'spo2']])
+    st.caption(f"📦 {len(df):,} archived samples")
+
+def render_file_status(watcher):
+    """Uploader.py liveness from the last change the watcher saw"""
+    if watcher.mtime is None:
+        st.error("❌ No data file found")
+        return
+    file_age = time.time() - watcher.mtime
+    if file_age < STALE_SECONDS:
+        st.success(f"✅ Uploader.py active ({file_age:.1f}s ago)")
+    else:
+        st.warning(f"⚠️ Uploader.py stale ({file_age:.1f}s ago)")
+
 def main():
-    # Initialize session state
+    # Initialize session state: preallocated ring, fixed memory, and this
+    # session's queue of snapshots from the shared watcher
+    watcher = get_snapshot_watcher()
     if 'history' not in st.session_state:
-        st.session_state.history = deque(maxlen=100)
+        st.session_state.history = SampleRing(HISTORY_CAPACITY)
+    if 'inbox' not in st.session_state:
+        st.session_state.inbox = watcher.subscribe()
+    history = st.session_state.history
     
     # Sidebar
     with st.sidebar:
@@ -55,33 +97,29 @@ def main():
         created by Uploader.py
         """)
         
-        # Check if JSON file exists
-        if os.path.exists('health_data_streamlit.json'):
-            file_time = os.path.getmtime('health_data_streamlit.json')
-            file_age = time.time() - file_time
-            if file_age < 10:  # Updated in last 10 seconds
-                st.success(f"✅ Uploader.py active ({file_age:.1f}s ago)")
-            else:
-                st.warning(f"⚠️ Uploader.py stale ({file_age:.1f}s ago)")
-        else:
-            st.error("❌ No data file found")
-        
         update_interval = st.slider("Refresh (s)", 1, 10, 2)
+        chart_minutes = st.select_slider("Chart window (min)", options=[1, 5, 15, 30, 60], value=5)
+        st.caption(f"👁️ File watch: {watcher.mode} | {watcher.reads} reads")
+        if watcher.last_error:
+            st.caption(f"⚠️ Watcher error: {watcher.last_error}")
+        st.caption(f"🧮 History: {len(history):,}/{history.capacity:,} samples "
+                   f"({history.nbytes / 1e6:.1f} MB fixed)")
     
-    # Load data
-    health_data = load_health_data_local()
+    st.title("🏥 LOCAL HEALTH MONITORING")
     
-    if health_data:
-        current_data = health_data.get('data', {})
-        
-        # Add timestamp
-        current_data['timestamp'] = datetime.now()
+    # Re-runs only this part; the file is parsed by the watcher when it
+    # changes, so an idle refresh just drains an empty queue
+    @st.fragment(run_every=update_interval)
+    def live_view():
+        # Add to history - keyed by the sample's own timestamp
+        for snapshot in drain(st.session_state.inbox):
+            if isinstance(snapshot.get('data'), dict):
+                history.append(snapshot['data'])
         
-        # Add to history
-        st.session_state.history.append(current_data)
+        health_data = load_health_data_local(watcher)
+        current_data = health_data.get('data', {})
         
-        # Display dashboard
-        st.title("🏥 LOCAL HEALTH MONITORING")
+        render_file_status(watcher)
         
         # Show metrics
         col1, col2, col3, col4 = st.columns(4)
@@ -101,13 +139,16 @@ def main():
             st.json(health_data)
         
         # Show history
-        if st.session_state.history:
-            history_df = pd.DataFrame(list(st.session_state.history))
-            st.line_chart(history_df[['hr', 'spo2']])
+        if len(history):
+            last = chart_minutes * 60 * SAMPLE_RATE_HZ
+            st.line_chart(history.chart_frame(['hr', 'spo2'], last, CHART_POINTS))
+    
+    live_view()
     
-    # Auto-refresh
-    time.sleep(update_interval)
-    st.rerun()
+    with st.expander("📦 Archived History"):
+        archive_hours = st.select_slider("Range (h)", options=[1, 6, 24, 72], value=6)
+        node = load_health_data_local(watcher).get('data', {}).get('node_id')
+        render_archive_history(archive_hours, node)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
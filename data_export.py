@@ -0,0 +1,56 @@
+"""
+📦 DATA EXPORT
+On-demand CSV / Parquet export of a whole time range. Rows are pulled from
+BigQuery page by page as Arrow record batches and appended to a temp
+file, so the query result is never held in memory; only the encoded file
+is read back once, as the bytes Streamlit serves.
+"""
+
+import tempfile
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from query_layer import export_query, run_query
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+EXPORT_PAGE_ROWS = 50_000
+
+def iter_export_batches(client, sql, params, page_rows=EXPORT_PAGE_ROWS):
+    """Arrow record batches of a query result, one result page at a time"""
+    rows = run_query(client, sql, params).result(page_size=page_rows)
+    yield from rows.to_arrow_iterable()
+
+def write_export(batches, fmt, sink):
+    """Append record batches to `sink` as CSV or Parquet; returns rows written"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    writer = None
+    rows = 0
+    try:
+        for batch in batches:
+            if writer is None:
+                if fmt == 'csv':
+                    writer = pacsv.CSVWriter(sink, batch.schema)
+                else:
+                    writer = pq.ParquetWriter(sink, batch.schema, compression='zstd')
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+def export_range(client, table, hours, selected_user, fmt='csv', page_rows=EXPORT_PAGE_ROWS):
+    """
+    Export the full range through an anonymous temp file and return the
+    encoded bytes; the file is closed (and gone) before returning
+    """
+    sql, params = export_query(table, hours, selected_user)
+    with tempfile.TemporaryFile() as spool:
+        rows = write_export(iter_export_batches(client, sql, params, page_rows), fmt, spool)
+        print(f"📦 Exported {rows} rows as {fmt} ({spool.tell() / 1024:.1f} KB)")
+        spool.seek(0)
+        return spool.read()
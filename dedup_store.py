@@ -0,0 +1,168 @@
+"""
+🗂️ DEDUP STORE
+Indexed on-disk record of uploaded IDs with a retention window
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+import time
+
+class BloomFilter:
+    def __init__(self, capacity=1_000_000, error_rate=0.01):
+        # Standard sizing: m = -n*ln(p)/ln(2)^2, k = m/n*ln(2)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+class SqliteDedupStore:
+    def __init__(self, db_file="uploaded_ids.db", retention_days=30,
+                 batch_size=500, use_bloom_filter=False, bloom_capacity=1_000_000):
+        self.db_file = db_file
+        self.retention_seconds = retention_days * 86400
+        self.batch_size = batch_size
+        self.pending = {}  # record_id -> uploaded_at, not yet written
+        self.last_purge = 0.0
+
+        is_new = not os.path.exists(db_file)
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS uploaded_ids (
+            record_id TEXT PRIMARY KEY,
+            uploaded_at REAL NOT NULL
+        ) WITHOUT ROWID
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_uploaded_at ON uploaded_ids (uploaded_at)"
+        )
+        self.conn.commit()
+
+        self.bloom = None
+        self.bloom_capacity = bloom_capacity
+        if use_bloom_filter:
+            self.rebuild_bloom()
+
+        self.is_new = is_new
+
+    def rebuild_bloom(self):
+        """Rebuild the in-memory filter from the IDs inside the window"""
+        self.bloom = BloomFilter(capacity=self.bloom_capacity)
+        for (record_id,) in self.conn.execute("SELECT record_id FROM uploaded_ids"):
+            self.bloom.add(record_id)
+
+    def import_log(self, log_file):
+        """One-off migration of a legacy newline-delimited ID log"""
+        if not os.path.exists(log_file):
+            return 0
+
+        now = time.time()
+        with open(log_file, 'r') as f:
+            ids = [(line.strip(), now) for line in f if line.strip()]
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO uploaded_ids VALUES (?, ?)", ids
+            )
+        if self.bloom is not None:
+            for record_id, _ in ids:
+                self.bloom.add(record_id)
+
+        print(f"📥 Migrated {len(ids)} IDs from {log_file}")
+        return len(ids)
+
+    def __contains__(self, record_id):
+        if record_id in self.pending:
+            return True
+        if self.bloom is not None and record_id not in self.bloom:
+            return False
+
+        row = self.conn.execute(
+            "SELECT 1 FROM uploaded_ids WHERE record_id = ?", (record_id,)
+        ).fetchone()
+        return row is not None
+
+    def existing(self, record_ids):
+        """Return the subset of record_ids already stored (batched lookup)"""
+        candidates = [r for r in record_ids if r not in self.pending]
+        found = set(record_ids) - set(candidates)
+        if self.bloom is not None:
+            candidates = [r for r in candidates if r in self.bloom]
+
+        # Stay under SQLite's host-parameter limit
+        for start in range(0, len(candidates), 900):
+            chunk = candidates[start:start + 900]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT record_id FROM uploaded_ids WHERE record_id IN ({placeholders})",
+                chunk
+            )
+            found.update(record_id for (record_id,) in rows)
+        return found
+
+    def add_many(self, record_ids):
+        """Write a batch of IDs in a single transaction"""
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO uploaded_ids VALUES (?, ?)",
+                ((record_id, now) for record_id in record_ids)
+            )
+        if self.bloom is not None:
+            for record_id in record_ids:
+                self.bloom.add(record_id)
+
+    def add(self, record_id):
+        """Buffer an ID; written to disk once the batch fills"""
+        self.pending[record_id] = time.time()
+        if self.bloom is not None:
+            self.bloom.add(record_id)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered IDs in a single transaction"""
+        if self.pending:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO uploaded_ids VALUES (?, ?)",
+                    list(self.pending.items())
+                )
+            self.pending = {}
+
+        # Purge at most hourly so the index stays bounded by the window
+        if time.time() - self.last_purge > 3600:
+            self.purge_expired()
+
+    def purge_expired(self):
+        """Drop IDs older than the retention window"""
+        cutoff = time.time() - self.retention_seconds
+        with self.conn:
+            deleted = self.conn.execute(
+                "DELETE FROM uploaded_ids WHERE uploaded_at < ?", (cutoff,)
+            ).rowcount
+        self.last_purge = time.time()
+        if deleted:
+            print(f"🧹 Purged {deleted} expired upload IDs")
+            if self.bloom is not None:
+                self.rebuild_bloom()
+        return deleted
+
+    def close(self):
+        self.flush()
+        self.conn.close()
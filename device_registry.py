@@ -0,0 +1,98 @@
+"""
+📇 DEVICE REGISTRY
+Small table with one row per device (first/last seen, sample count),
+kept up to date by the uploader with a MERGE after each acknowledged
+batch. The dashboard's user list reads these few rows instead of running
+SELECT DISTINCT over days of raw data.
+"""
+
+import pandas as pd
+from google.cloud import bigquery
+
+def registry_schema():
+    return [
+        bigquery.SchemaField('ID_user', 'STRING', mode='REQUIRED'),
+        bigquery.SchemaField('first_seen', 'TIMESTAMP'),
+        bigquery.SchemaField('last_seen', 'TIMESTAMP'),
+        bigquery.SchemaField('samples', 'INTEGER'),
+    ]
+
+def registry_users_query(table, active_days=7):
+    """SQL and parameters for devices seen in the last `active_days`"""
+    sql = f"""
+    SELECT ID_user
+    FROM `{table}`
+    WHERE last_seen >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL @active_days DAY)
+    ORDER BY ID_user
+    """
+    return sql, [bigquery.ScalarQueryParameter('active_days', 'INT64', active_days)]
+
+def summarize_devices(rows):
+    """Per-device first/last timestamp and count of uploaded payload rows"""
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True, errors='coerce', format='ISO8601')
+    df = df.dropna(subset=['timestamp'])
+    return df.groupby('id_user').agg(
+        first_seen=('timestamp', 'min'),
+        last_seen=('timestamp', 'max'),
+        samples=('timestamp', 'size'),
+    ).reset_index()
+
+class DeviceRegistry:
+    def __init__(self, client, table_id):
+        self.client = client
+        self.table_id = table_id
+        self.ready = False
+
+    def ensure_table(self):
+        """Create the registry table if missing"""
+        table = bigquery.Table(self.table_id, schema=registry_schema())
+        self.client.create_table(table, exists_ok=True)
+        self.ready = True
+
+    def merge_sql(self):
+        return f"""
+        MERGE `{self.table_id}` AS registry
+        USING (
+            SELECT * FROM UNNEST(@devices)
+        ) AS seen
+        ON registry.ID_user = seen.ID_user
+        WHEN MATCHED THEN UPDATE SET
+            last_seen = GREATEST(registry.last_seen, seen.last_seen),
+            samples = registry.samples + seen.samples
+        WHEN NOT MATCHED THEN
+            INSERT (ID_user, first_seen, last_seen, samples)
+            VALUES (seen.ID_user, seen.first_seen, seen.last_seen, seen.samples)
+        """
+
+    def update(self, rows):
+        """Upsert the devices present in rows BigQuery has acknowledged"""
+        if not self.client or not rows:
+            return
+
+        try:
+            if not self.ready:
+                self.ensure_table()
+            devices = summarize_devices(rows)
+            if devices.empty:
+                return
+
+            structs = [
+                bigquery.StructQueryParameter(
+                    None,
+                    bigquery.ScalarQueryParameter('ID_user', 'STRING', device.id_user),
+                    bigquery.ScalarQueryParameter('first_seen', 'TIMESTAMP', device.first_seen.to_pydatetime()),
+                    bigquery.ScalarQueryParameter('last_seen', 'TIMESTAMP', device.last_seen.to_pydatetime()),
+                    bigquery.ScalarQueryParameter('samples', 'INT64', int(device.samples)),
+                )
+                for device in devices.itertuples(index=False)
+            ]
+            config = bigquery.QueryJobConfig(query_parameters=[
+                bigquery.ArrayQueryParameter('devices', 'STRUCT', structs)
+            ])
+            self.client.query(self.merge_sql(), job_config=config).result()
+        except Exception as e:
+            print(f"❌ Device registry update error: {e}")
@@ -0,0 +1,87 @@
+"""
+📉 DOWNSAMPLING
+Shape-preserving point reduction for charts. Unlike iloc[::step], both
+methods keep the local extremes (HR spikes, SpO2 dips) of each bucket.
+All functions return row indices so callers can slice any DataFrame.
+"""
+
+import numpy as np
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype('datetime64[ns]').astype(np.int64)
+    return values.astype(np.float64)
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: per bucket, keep the point forming the
+    largest triangle with the previously kept point and the next bucket's
+    mean. Bucket means are vectorized with cumulative sums; the per-bucket
+    selection is a NumPy reduction over the bucket's slice.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    xf = _as_float(x)
+    yf = np.nan_to_num(_as_float(y), nan=0.0)
+
+    # n_out - 2 middle buckets over points 1..n-2; first and last are kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    cx = np.concatenate(([0.0], np.cumsum(xf)))
+    cy = np.concatenate(([0.0], np.cumsum(yf)))
+    counts = np.maximum(ends - starts, 1)
+    mean_x = (cx[ends] - cx[starts]) / counts
+    mean_y = (cy[ends] - cy[starts]) / counts
+    # The bucket after the last middle bucket is just the final point
+    next_x = np.append(mean_x[1:], xf[-1])
+    next_y = np.append(mean_y[1:], yf[-1])
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        s, e = starts[i], max(ends[i], starts[i] + 1)
+        ax, ay = xf[a], yf[a]
+        area = np.abs((ax - next_x[i]) * (yf[s:e] - ay) - (ax - xf[s:e]) * (next_y[i] - ay))
+        a = s + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+def minmax_indices(y, n_out):
+    """
+    Min/max envelope: the minimum and maximum of each of n_out / 2 equal
+    buckets, fully vectorized by reshaping into a (buckets, size) matrix
+    """
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    yf = _as_float(y)
+    size = -(-n // (n_out // 2))  # ceil division
+    buckets = -(-n // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = yf
+    matrix = padded.reshape(buckets, size)
+
+    row_offsets = np.arange(buckets) * size
+    low = np.argmin(np.where(np.isnan(matrix), np.inf, matrix), axis=1) + row_offsets
+    high = np.argmax(np.where(np.isnan(matrix), -np.inf, matrix), axis=1) + row_offsets
+
+    indices = np.unique(np.concatenate(([0, n - 1], low, high)))
+    return indices[indices < n]
+
+def downsample_indices(x, y, n_out=500, method='lttb'):
+    """Indices of at most ~n_out points chosen by `method` ('lttb' or 'minmax')"""
+    if method == 'minmax':
+        return minmax_indices(y, n_out)
+    return lttb_indices(x, y, n_out)
+
+def downsample_frame(df, x_col, y_col, n_out=500, method='lttb'):
+    """Downsample a DataFrame (sorted by x_col) for plotting y_col"""
+    if len(df) <= n_out:
+        return df
+    return df.iloc[downsample_indices(df[x_col].to_numpy(), df[y_col].to_numpy(), n_out, method)]
@@ -0,0 +1,139 @@
+"""
+🧪 FAKE BIGQUERY CLIENT
+In-memory stand-in for bigquery.Client so upload paths can be
+exercised offline
+"""
+
+import json
+import re
+import pandas as pd
+from google.api_core.exceptions import NotFound
+
+def query_parameters(job_config):
+    """Parameters of a QueryJobConfig as {name: (type, value)}"""
+    params = getattr(job_config, 'query_parameters', None) or []
+    return {p.name: (getattr(p, 'type_', None) or getattr(p, 'array_type', None), getattr(p, 'value', None))
+            for p in params}
+
+def assert_prunes_partitions(sql, params, partition_column='timestamp', cluster_column='ID_user'):
+    """
+    Check that a query can prune partitions: the bare partition column is
+    bounded below by a TIMESTAMP parameter in the WHERE clause (wrapping the
+    column in a function would disable pruning), and the clustering column
+    is only ever compared to parameters, never to pasted-in literals
+    """
+    where = re.search(r'\bWHERE\b(.*?)(\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|$)', sql, re.S | re.I)
+    assert where, f"No WHERE clause: {sql}"
+    clause = where.group(1)
+
+    bound = re.search(rf'(?<![\w(]){partition_column}\s*(>=|>)\s*@(\w+)', clause)
+    assert bound, f"{partition_column} is not bounded by a parameter: {clause.strip()}"
+    name = bound.group(2)
+    assert name in params, f"Parameter @{name} was not sent"
+    assert params[name][0] == 'TIMESTAMP', f"@{name} is {params[name][0]}, not TIMESTAMP"
+
+    assert not re.search(rf'{cluster_column}\s*=\s*[\'"]', clause, re.I), \
+        f"{cluster_column} compared to an interpolated literal"
+    return name
+
+class FakeQueryJob:
+    def __init__(self, df):
+        self.df = df
+
+    def result(self, page_size=None):
+        return self
+
+    def to_dataframe(self):
+        return self.df.copy()
+
+class FakeBigQueryClient:
+    def __init__(self, max_rows=50000, max_bytes=10 * 1024 * 1024,
+                 transient_failures=0, reject_row=None, query_results=None):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.transient_failures = transient_failures  # Raise this many times first
+        self.reject_row = reject_row  # Predicate: row -> True to report an error
+        self.tables = {}
+        self.created_tables = {}
+        self.requests = []
+        self.seen_ids = set()  # insertIds already stored
+        self.query_results = query_results  # (sql, params) -> DataFrame or None
+        self.queries = []
+
+    def create_table(self, table, exists_ok=False):
+        """Record the table definition (schema, partitioning, clustering)"""
+        table_id = f"{table.project}.{table.dataset_id}.{table.table_id}"
+        if table_id in self.created_tables and not exists_ok:
+            raise ValueError(f"Already exists: {table_id}")
+        self.created_tables.setdefault(table_id, table)
+        return self.created_tables[table_id]
+
+    def get_table(self, table_id):
+        """Definition passed to create_table, like the client's NotFound otherwise"""
+        if table_id not in self.created_tables:
+            raise NotFound(f"Not found: Table {table_id}")
+        return self.created_tables[table_id]
+
+    def insert_rows_json(self, table, json_rows, row_ids=None):
+        """
+        Mimics streaming insert limits, transport errors and per-row errors.
+        Rows whose insertId was already stored are dropped, as BigQuery's
+        best-effort deduplication would.
+        """
+        payload_bytes = len(json.dumps(json_rows, default=str))
+        self.requests.append({'table': table, 'rows': len(json_rows), 'bytes': payload_bytes,
+                              'row_ids': list(row_ids) if row_ids is not None else None})
+
+        if self.transient_failures > 0:
+            self.transient_failures -= 1
+            raise ConnectionError("Simulated transport failure")
+
+        if len(json_rows) > self.max_rows or payload_bytes > self.max_bytes:
+            raise ValueError(
+                f"Request too large: {len(json_rows)} rows / {payload_bytes} bytes"
+            )
+
+        errors = []
+        accepted = []
+        for i, row in enumerate(json_rows):
+            if self.reject_row is not None and self.reject_row(row):
+                errors.append({'index': i, 'errors': [{'reason': 'invalid', 'message': 'Rejected by fake'}]})
+            else:
+                accepted.append(row)
+
+        # Like BigQuery without skip_invalid_rows: nothing is stored on error
+        if errors:
+            stopped = [
+                {'index': i, 'errors': [{'reason': 'stopped', 'message': ''}]}
+                for i, row in enumerate(json_rows)
+                if not (self.reject_row is not None and self.reject_row(row))
+            ]
+            return errors + stopped
+
+        stored = self.tables.setdefault(table, [])
+        for row, row_id in zip(accepted, row_ids if row_ids is not None else [None] * len(accepted)):
+            if row_id is None or (table, row_id) not in self.seen_ids:
+                stored.append(row)
+                self.seen_ids.add((table, row_id))
+        return []
+
+    def query(self, sql, job_config=None):
+        """Record the SQL and parameters; answer from query_results"""
+        params = query_parameters(job_config)
+        self.queries.append({'sql': sql, 'params': params})
+        df = self.query_results(sql, params) if self.query_results else None
+        return FakeQueryJob(df if df is not None else pd.DataFrame())
+
+    def assert_queries_prune(self, table, partition_column='timestamp'):
+        """assert_prunes_partitions for every recorded query reading `table`"""
+        checked = 0
+        for query in self.queries:
+            if f"`{table}`" in query['sql'] and 'MERGE' not in query['sql']:
+                assert_prunes_partitions(query['sql'], query['params'], partition_column)
+                checked += 1
+        assert checked, f"No queries against {table} were recorded"
+        return checked
+
+    def rows(self, table):
+        """Rows stored so far for a table"""
+        return self.tables.get(table, [])
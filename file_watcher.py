@@ -0,0 +1,223 @@
+"""
+👁️ FILE WATCHER
+Change-driven reads of the JSON snapshot the uploader writes for the local
+dashboard. One background thread per process waits on inotify (Linux, via
+libc) for the file to be closed after writing or renamed into place, and
+falls back to cheap stat polling elsewhere. The file is only parsed when
+its inode/mtime/size changed; each new sample is handed to every dashboard
+session through its own in-process queue.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import queue
+import select
+import struct
+import threading
+import weakref
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO  # In-place writes and atomic renames
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+POLL_SECONDS = 0.5
+RESCAN_SECONDS = 5.0  # inotify mode: stat anyway now and then in case an event was missed
+
+def write_snapshot(path, data):
+    """Writer side: replace the file atomically so readers never see half of it"""
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+def file_signature(stat_result):
+    return (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+
+def read_snapshot(path):
+    """
+    (data, signature, mtime) of the file, or None if missing or mid-write.
+    The signature comes from the opened descriptor, so a rename landing
+    during the read cannot pair new metadata with old content. Anything
+    but a JSON object is ignored.
+    """
+    try:
+        with open(path, 'rb') as f:
+            stat_result = os.fstat(f.fileno())
+            data = json.loads(f.read())
+    except (FileNotFoundError, json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    return data, file_signature(stat_result), stat_result.st_mtime
+
+class InotifyWatch:
+    """Minimal inotify(7) watch on a directory; raises OSError where unavailable"""
+    def __init__(self, directory, mask=WATCH_MASK):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError(errno.ENOSYS, "libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify not supported")
+
+        self.fd = libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        """Names of entries changed within `timeout` seconds (empty set on timeout)"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        buffer = os.read(self.fd, 64 * 1024)
+        names = set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buffer):
+            _, _, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            offset += EVENT_HEADER.size
+            names.add(buffer[offset:offset + length].rstrip(b'\0').decode(errors='replace'))
+            offset += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+class SnapshotWatcher:
+    def __init__(self, path, poll_seconds=POLL_SECONDS, max_queue=1000, use_inotify=True):
+        self.path = os.path.abspath(path)
+        self.poll_seconds = poll_seconds
+        self.max_queue = max_queue
+        self.use_inotify = use_inotify
+        self.lock = threading.Lock()
+        self.subscribers = weakref.WeakSet()  # Inboxes vanish with their sessions
+        self.latest = None
+        self.signature = None
+        self.mtime = None
+        self.mode = 'starting'
+        self.reads = 0
+        self.errors = 0
+        self.last_error = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="snapshot-watcher", daemon=True)
+        self.thread.start()
+
+    def subscribe(self):
+        """Queue receiving every new snapshot, primed with the current one"""
+        inbox = queue.Queue(maxsize=self.max_queue)
+        with self.lock:
+            self.subscribers.add(inbox)
+            if self.latest is not None:
+                inbox.put_nowait(self.latest)
+        return inbox
+
+    def _publish(self, data):
+        with self.lock:
+            self.latest = data
+            subscribers = list(self.subscribers)
+
+        for inbox in subscribers:
+            try:
+                inbox.put_nowait(data)
+            except queue.Full:
+                # Session not drained for a while: drop its oldest snapshot
+                try:
+                    inbox.get_nowait()
+                    inbox.put_nowait(data)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def check(self):
+        """Read and publish the file if it changed since the last read"""
+        try:
+            if file_signature(os.stat(self.path)) == self.signature:
+                return False
+        except FileNotFoundError:
+            return False
+
+        snapshot = read_snapshot(self.path)
+        if snapshot is None:
+            return False  # Mid-write by a non-atomic writer; the close event follows
+        data, signature, mtime = snapshot
+        if signature == self.signature:
+            return False
+
+        self.signature = signature
+        self.mtime = mtime
+        self.reads += 1
+        # Samples without their own timestamp are stamped with the file's
+        # mtime - the time it was written, not the time it was read
+        sample = data.get('data')
+        if isinstance(sample, dict) and not sample.get('timestamp'):
+            sample['timestamp'] = mtime
+        self._publish(data)
+        return True
+
+    def _run(self):
+        watch = None
+        if self.use_inotify:
+            try:
+                watch = InotifyWatch(os.path.dirname(self.path))
+            except OSError as e:
+                print(f"⚠️ inotify unavailable ({e}) - polling {self.path} every {self.poll_seconds}s")
+        self.mode = 'inotify' if watch else 'polling'
+
+        name = os.path.basename(self.path)
+        try:
+            self._safe_check()
+            while not self.stopped.is_set():
+                if watch:
+                    try:
+                        changed = watch.wait(RESCAN_SECONDS)
+                    except OSError as e:
+                        self._failed(e)
+                        watch.close()
+                        watch = None
+                        self.mode = 'polling'
+                        continue
+                    if changed and name not in changed:
+                        continue
+                else:
+                    self.stopped.wait(self.poll_seconds)
+                self._safe_check()
+        finally:
+            if watch:
+                watch.close()
+
+    def _safe_check(self):
+        """check() that logs instead of killing the watcher thread"""
+        try:
+            self.check()
+            self.last_error = None
+        except Exception as e:
+            self._failed(e)
+
+    def _failed(self, error):
+        # Log once per distinct error, not on every poll
+        if str(error) != self.last_error:
+            print(f"⚠️ Snapshot watcher: {error}")
+        self.errors += 1
+        self.last_error = str(error)
+
+    def stop(self):
+        self.stopped.set()
+
+def drain(inbox):
+    """Everything queued so far, oldest first, without blocking"""
+    items = []
+    while True:
+        try:
+            items.append(inbox.get_nowait())
+        except queue.Empty:
+            return items
@@ -1,24 +1,38 @@
+import atexit
 import time
 from google.cloud import bigquery
 from google.oauth2 import service_account
+from google.auth.transport.requests import AuthorizedSession
+from requests.adapters import HTTPAdapter
 from datetime import datetime
+from streaming_writer import BigQueryStreamingWriter
 
 # --- Load credentials (local JSON file for Slave STEMCube) ---
 # Replace with the path to your downloaded service account key
 credentials = service_account.Credentials.from_service_account_file(
-    "monitoring-system-with-lora-05bc326b792a.json"
+    "monitoring-system-with-lora-05bc326b792a.json",
+    scopes=["https://www.googleapis.com/auth/cloud-platform"]
 )
 
+# --- One pooled, keep-alive HTTP session reused for every insert ---
+session = AuthorizedSession(credentials)
+session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
 client = bigquery.Client(
     credentials=credentials,
     project="monitoring-system-with-lora",
-    location="asia-southeast1"   # ✅ Malaysia/Singapore region
+    location="asia-southeast1",   # ✅ Malaysia/Singapore region
+    _http=session
 )
 
 # --- Table reference ---
 table_id = "monitoring-system-with-lora.sdp2_live_monitoring_system.lora_health_data_clean2"
 
-# --- Function to insert one row ---
+# --- Background writer: micro-batches of 500 rows or 200 ms ---
+writer = BigQueryStreamingWriter(client, table_id, batch_rows=500, flush_interval=0.2)
+atexit.register(writer.close)
+
+# --- Function to insert one row (non-blocking) ---
 def insert_sensor_data(temp, hr, spo2, humidity):
     row = {
         "timestamp": datetime.utcnow().isoformat(),  # current UTC time
@@ -27,22 +41,22 @@ def insert_sensor_data(temp, hr, spo2, humidity):
         "spo2": spo2,
         "humidity": humidity
     }
-    errors = client.insert_rows_json(table_id, [row])
-    if errors == []:
-        print("✅ Row inserted:", row)
-    else:
-        print("❌ Errors:", errors)
+    if not writer.submit(row):
+        print("❌ Writer queue full, row dropped:", row)
 
 # --- Example loop (replace with LoRa receive logic) ---
 if __name__ == "__main__":
-    while True:
-        # Simulated sensor values (replace with LoRa data parsing)
-        temp = 36.5
-        hr = 78
-        spo2 = 97
-        humidity = 55
+    try:
+        while True:
+            # Simulated sensor values (replace with LoRa data parsing)
+            temp = 36.5
+            hr = 78
+            spo2 = 97
+            humidity = 55
 
-        insert_sensor_data(temp, hr, spo2, humidity)
+            insert_sensor_data(temp, hr, spo2, humidity)
 
-        # Wait before next upload
-        time.sleep(10)
\ No newline at end of file
+            # Wait before next upload
+            time.sleep(10)
+    finally:
+        writer.close()
@@ -1,9 +1,13 @@
+import atexit
 import time
-import sqlite3
-import csv
 from datetime import datetime
 from google.cloud import bigquery
 from google.oauth2 import service_account
+from sqlite_sink import SqliteSink
+from csv_sink import CsvSink
+from bigquery_batcher import BigQueryBatcher
+from parquet_archive import ParquetArchiveWriter
+from sink_pipeline import SinkWorker, FanOutPipeline, BLOCK, DROP_OLDEST, SPILL
 
 # --- BigQuery Setup ---
 credentials = service_account.Credentials.from_service_account_file(
@@ -15,31 +19,57 @@ client = bigquery.Client(
     location="asia-southeast1"
 )
 table_id = "monitoring-system-with-lora.sdp2_live_monitoring_system.lora_health_data_clean2"
+batcher = BigQueryBatcher(client, table_id, max_workers=1)
 
 # --- Local Database Setup (SQLite) ---
+# WAL + batched transactions; synchronous=NORMAL is durable across app
+# crashes, use "FULL" to also survive power loss at the cost of throughput
 sqlite_file = "local_health_data.db"
-conn = sqlite3.connect(sqlite_file)
-cursor = conn.cursor()
-
-# Create table if not exists
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS health_data (
-    timestamp TEXT,
-    temp REAL,
-    hr INTEGER,
-    spo2 INTEGER,
-    humidity REAL
-)
-""")
-conn.commit()
+sqlite_sink = SqliteSink(sqlite_file, batch_rows=500, flush_interval=1.0, synchronous="NORMAL")
 
 # --- Local CSV Setup ---
+# One long-lived buffered file, flushed every second, rotated at 64 MB
 csv_file = "local_health_data.csv"
-# Ensure header exists
-with open(csv_file, "a", newline="") as f:
-    writer = csv.writer(f)
-    if f.tell() == 0:  # file is empty
-        writer.writerow(["timestamp", "temp", "hr", "spo2", "humidity"])
+csv_sink = CsvSink(
+    csv_file,
+    header=["timestamp", "temp", "hr", "spo2", "humidity"],
+    max_bytes=64 * 1024 * 1024,
+    compress_segments=True,
+    flush_interval=1.0
+)
+
+# --- Local Columnar Archive (Parquet, one file per node per hour) ---
+archive = ParquetArchiveWriter("archive", max_buffer_seconds=30)  # A closed file per 30 s, compacted hourly
+
+# --- Fan-out: every destination runs on its own worker and queue ---
+SQL_COLUMNS = ["timestamp", "temp", "hr", "spo2", "humidity"]
+
+def to_tuples(rows):
+    return [tuple(row[col] for col in SQL_COLUMNS) for row in rows]
+
+def write_bigquery(rows):
+    _, failed_rows, rejected_rows = batcher.insert_rows(rows)
+    return failed_rows, rejected_rows
+
+pipeline = FanOutPipeline([
+    # Network outages spill to disk and are replayed when BigQuery recovers;
+    # rows BigQuery rejects as invalid are set aside instead of retried
+    SinkWorker("bigquery", write_bigquery, policy=SPILL,
+               spill_file="bigquery_spill.jsonl", dead_letter_file="bigquery_rejected.jsonl",
+               max_queue=10_000),
+    # Local database is the system of record: never drop, wait for room
+    SinkWorker("sqlite", lambda rows: sqlite_sink.write_many(to_tuples(rows)),
+               flush=sqlite_sink.flush, close=sqlite_sink.close,
+               policy=BLOCK, max_queue=100_000),
+    # CSV is a convenience export: keep the newest rows under pressure
+    SinkWorker("csv", lambda rows: csv_sink.write_many(to_tuples(rows)),
+               flush=csv_sink.flush, close=csv_sink.close,
+               policy=DROP_OLDEST, max_queue=100_000),
+    # Closed files every 30 s, compacted to one per node per hour
+    SinkWorker("parquet", archive.write, flush=archive.flush, close=archive.close,
+               policy=DROP_OLDEST, max_queue=100_000),
+])
+atexit.register(pipeline.close)
 
 # --- Function to insert data ---
 def insert_sensor_data(temp, hr, spo2, humidity):
@@ -53,24 +83,8 @@ def insert_sensor_data(temp, hr, spo2, humidity):
         "humidity": humidity
     }
 
-    # 1. Insert into BigQuery
-    errors = client.insert_rows_json(table_id, [row])
-    if errors == []:
-        print("✅ BigQuery row inserted:", row)
-    else:
-        print("❌ BigQuery errors:", errors)
-
-    # 2. Insert into SQLite
-    cursor.execute("INSERT INTO health_data VALUES (?, ?, ?, ?, ?)",
-                   (ts, temp, hr, spo2, humidity))
-    conn.commit()
-    print("💾 Saved to SQLite")
-
-    # 3. Append to CSV
-    with open(csv_file, "a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([ts, temp, hr, spo2, humidity])
-    print("📄 Saved to CSV")
+    # BigQuery, SQLite and CSV writes happen on their own workers
+    pipeline.submit(row)
 
 # --- Example loop (replace with LoRa receive logic) ---
 if __name__ == "__main__":
@@ -82,6 +96,7 @@ if __name__ == "__main__":
         humidity = 55
 
         insert_sensor_data(temp, hr, spo2, humidity)
+        print("📊 Sinks:", pipeline.metrics())
 
         # Wait before next upload
         time.sleep(10)
\ No newline at end of file
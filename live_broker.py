@@ -0,0 +1,244 @@
+"""
+📡 LIVE BROKER
+Small Flask service that pushes the newest reading per device to
+dashboards over Server-Sent Events. The uploader POSTs each batch as
+soon as it reads it (polling every second); every open /stream receives
+it immediately, so live tiles update within about a second without a
+BigQuery query per refresh.
+
+/publish only accepts requests carrying the shared LIVE_BROKER_TOKEN in
+the X-Live-Broker-Token header, so nobody else on the network can push
+fake vitals onto the live tiles (and into dashboard-side alerting).
+
+Run: LIVE_BROKER_TOKEN=<secret> python live_broker.py [port]
+Listens on 127.0.0.1; set LIVE_BROKER_HOST to serve other machines.
+"""
+
+import hmac
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+import requests
+from flask import Flask, Response, jsonify, request
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+TOKEN_HEADER = 'X-Live-Broker-Token'
+HEARTBEAT_SECONDS = 15
+
+def latest_per_user(rows):
+    """Newest row of each device in a batch"""
+    latest = {}
+    for row in rows:
+        user = row.get('id_user')
+        if user is None:
+            continue
+        if user not in latest or str(row.get('timestamp', '')) >= str(latest[user].get('timestamp', '')):
+            latest[user] = row
+    return list(latest.values())
+
+def reading_time(row):
+    """Epoch seconds of a reading's own timestamp, or None if it has none"""
+    value = row.get('timestamp')
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+class LiveBroker:
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.latest = {}  # id_user -> newest row
+        self.published = 0
+
+    def publish(self, rows):
+        """Remember the newest row per device and fan it out to subscribers"""
+        rows = latest_per_user(rows)
+        if not rows:
+            return 0
+
+        with self.lock:
+            for row in rows:
+                current = self.latest.get(row['id_user'])
+                if current is None or str(row.get('timestamp', '')) >= str(current.get('timestamp', '')):
+                    self.latest[row['id_user']] = row
+            self.published += len(rows)
+            subscribers = list(self.subscribers)
+
+        event = sse_event('batch', rows)
+        for inbox in subscribers:
+            try:
+                inbox.put_nowait(event)
+            except queue.Full:
+                # Slow dashboard: drop its oldest event, the newest matters
+                try:
+                    inbox.get_nowait()
+                    inbox.put_nowait(event)
+                except (queue.Empty, queue.Full):
+                    pass
+        return len(rows)
+
+    def subscribe(self):
+        inbox = queue.Queue(maxsize=self.max_queue)
+        with self.lock:
+            self.subscribers.add(inbox)
+        return inbox
+
+    def unsubscribe(self, inbox):
+        with self.lock:
+            self.subscribers.discard(inbox)
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.latest.values())
+
+def create_app(broker=None, token=None):
+    """Flask app exposing /publish, /stream, /latest and /health"""
+    broker = broker or LiveBroker()
+    token = token if token is not None else os.environ.get("LIVE_BROKER_TOKEN", "")
+    app = Flask(__name__)
+    app.config['broker'] = broker
+
+    @app.post('/publish')
+    def publish():
+        if not token:
+            return jsonify({'error': "LIVE_BROKER_TOKEN is not set"}), 403
+        if not hmac.compare_digest(request.headers.get(TOKEN_HEADER, ''), token):
+            return jsonify({'error': "invalid token"}), 401
+        rows = request.get_json(silent=True) or []
+        return jsonify({'accepted': broker.publish(rows)})
+
+    @app.get('/stream')
+    def stream():
+        inbox = broker.subscribe()
+
+        def events():
+            try:
+                # Current state first, so a new dashboard has tiles at once
+                yield sse_event('snapshot', broker.snapshot())
+                while True:
+                    try:
+                        yield inbox.get(timeout=HEARTBEAT_SECONDS)
+                    except queue.Empty:
+                        yield ": keepalive\n\n"
+            finally:
+                broker.unsubscribe(inbox)
+
+        return Response(events(), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        })
+
+    @app.get('/latest')
+    def latest():
+        return jsonify(broker.snapshot())
+
+    @app.get('/health')
+    def health():
+        return jsonify({'subscribers': len(broker.subscribers), 'published': broker.published})
+
+    return app
+
+# ============================================================================
+# CLIENTS
+# ============================================================================
+class LivePublisher:
+    """Uploader side: POST accepted batches, never block or fail the upload"""
+    def __init__(self, url, timeout=0.5, token=None):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers[TOKEN_HEADER] = token or os.environ.get("LIVE_BROKER_TOKEN", "")
+        self.available = True
+
+    def publish(self, rows):
+        if not rows:
+            return
+        try:
+            self.session.post(f"{self.url}/publish", json=latest_per_user(rows),
+                              timeout=self.timeout).raise_for_status()
+            if not self.available:
+                print(f"✅ Live broker reachable again at {self.url}")
+            self.available = True
+        except Exception as e:
+            if self.available:
+                print(f"⚠️ Live broker unavailable ({e}) - dashboards fall back to polling")
+            self.available = False
+
+class LiveSubscriber:
+    """Dashboard side: background SSE reader keeping the newest row per device"""
+    def __init__(self, url, reconnect_seconds=2.0):
+        self.url = url.rstrip('/')
+        self.reconnect_seconds = reconnect_seconds
+        self.lock = threading.Lock()
+        self.latest = {}  # id_user -> (row, measured_at)
+        self.connected = False
+        self.thread = threading.Thread(target=self._run, name="live-subscriber", daemon=True)
+        self.thread.start()
+
+    def _apply(self, rows, event='batch'):
+        """
+        Freshness comes from the reading's own timestamp (capped at now for
+        clock skew), so the snapshot replayed on every connect does not
+        make hours-old readings look live
+        """
+        now = time.time()
+        with self.lock:
+            for row in rows:
+                measured = reading_time(row)
+                if measured is None:
+                    measured = now if event == 'batch' else 0.0
+                self.latest[row['id_user']] = (row, min(measured, now))
+
+    def _run(self):
+        while True:
+            try:
+                with requests.get(f"{self.url}/stream", stream=True, timeout=(3, HEARTBEAT_SECONDS * 2)) as response:
+                    response.raise_for_status()
+                    self.connected = True
+                    event = 'batch'
+                    for line in response.iter_lines(decode_unicode=True):
+                        if line and line.startswith('event:'):
+                            event = line[6:].strip()
+                        elif line and line.startswith('data:'):
+                            self._apply(json.loads(line[5:]), event)
+            except Exception:
+                pass
+            self.connected = False
+            time.sleep(self.reconnect_seconds)
+
+    def latest_for(self, selected_user, max_age=10.0):
+        """Newest pushed row for a user (or across all users), if recent enough"""
+        cutoff = time.time() - max_age
+        with self.lock:
+            if selected_user == "All Users":
+                candidates = list(self.latest.values())
+            else:
+                candidates = [self.latest[selected_user]] if selected_user in self.latest else []
+        candidates = [(row, measured) for row, measured in candidates if measured >= cutoff]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda item: str(item[0].get('timestamp', '')))[0]
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
+    host = os.environ.get("LIVE_BROKER_HOST", DEFAULT_HOST)
+    if not os.environ.get("LIVE_BROKER_TOKEN"):
+        print("❌ Set LIVE_BROKER_TOKEN (shared with the uploader) to accept /publish")
+        sys.exit(1)
+    print(f"📡 Live broker on http://{host}:{port} (stream: /stream)")
+    create_app().run(host=host, port=port, threaded=True)
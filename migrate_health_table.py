@@ -0,0 +1,53 @@
+"""
+🚚 HEALTH TABLE MIGRATION
+Copies an unpartitioned raw table into the day-partitioned, user-clustered
+layout of query_layer.health_table. create_table(exists_ok=True) never
+changes a table that already exists, so an older table only gets the
+layout through this copy and an explicit cutover:
+
+  1. Stop Uploader.py. Its tail offset and outbox keep unread rows on
+     disk, so nothing is lost while it is down.
+  2. python migrate_health_table.py SOURCE TARGET
+  3. Start Uploader.py with UPLOAD_TABLE=TARGET.
+  4. Point the dashboard at it: RAW_TABLE=TARGET (env or Streamlit secrets).
+  5. Drop SOURCE once the dashboard shows the full history from TARGET.
+
+Tables are full ids (project.dataset.table).
+"""
+
+import sys
+from google.cloud import bigquery
+from google.oauth2 import service_account
+from google.api_core.exceptions import NotFound
+from query_layer import health_table_problems, migration_sql
+
+PROJECT_ID = "monitoring-system-with-lora"
+
+def migrate(client, source_table, target_table):
+    """Copy source into a new partitioned target; return the target's layout problems"""
+    try:
+        client.get_table(target_table)
+        print(f"⚠️ {target_table} already exists, not copying")
+    except NotFound:
+        print(f"🚚 Copying {source_table} -> {target_table}")
+        client.query(migration_sql(source_table, target_table)).result()
+        print("✅ Copy finished")
+    return health_table_problems(client, target_table)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+
+    credentials = service_account.Credentials.from_service_account_file(
+        'service-account-key.json',
+        scopes=["https://www.googleapis.com/auth/cloud-platform"]
+    )
+    client = bigquery.Client(credentials=credentials, project=PROJECT_ID, location="asia-southeast1")
+
+    problems = migrate(client, sys.argv[1], sys.argv[2])
+    for problem in problems:
+        print(f"❌ {problem}")
+    if problems:
+        sys.exit(1)
+    print(f"✅ {sys.argv[2]} is partitioned and clustered; continue with step 3 of the cutover")
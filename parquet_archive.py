@@ -0,0 +1,234 @@
+"""
+🗄️ PARQUET ARCHIVE
+Columnar, time-partitioned local archive of sensor history:
+archive/node_id=<node>/date=<YYYY-MM-DD>/hour=<HH>/hour-<ms>.parquet
+(part-<ms>-<seq>.parquet files until the hour is compacted)
+"""
+
+import json
+import os
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# node_id lives in the partition path, not in the files
+SCHEMA = pa.schema([
+    ('timestamp', pa.timestamp('ms', tz='UTC')),
+    ('temp', pa.float32()),
+    ('humidity', pa.float32()),
+    ('spo2', pa.uint8()),
+    ('hr', pa.uint8()),
+    ('ax', pa.float32()), ('ay', pa.float32()), ('az', pa.float32()),
+    ('gx', pa.float32()), ('gy', pa.float32()), ('gz', pa.float32()),
+    ('activity', pa.string()),
+])
+
+COMPACTED_PREFIX = 'hour-'
+COMPACTED_FROM_KEY = b'compacted_from'
+
+PARTITIONING = ds.partitioning(
+    pa.schema([('node_id', pa.string()), ('date', pa.string()), ('hour', pa.int8())]),
+    flavor='hive'
+)
+
+def normalize(df):
+    """Map uploader/sink column names onto the archive schema with typed columns"""
+    out = pd.DataFrame(index=df.index)
+    node = df['device_id'] if 'device_id' in df.columns else df.get('node_id', 'local')
+    out['node_id'] = pd.Series(node, index=df.index).fillna('unknown').astype(str)
+
+    ts = df['ml_timestamp'] if 'ml_timestamp' in df.columns else df['timestamp']
+    out['timestamp'] = pd.to_datetime(ts, utc=True, errors='coerce', format='ISO8601').dt.floor('ms')
+
+    for name in ['temp', 'humidity', 'ax', 'ay', 'az', 'gx', 'gy', 'gz']:
+        values = df[name] if name in df.columns else float('nan')
+        out[name] = pd.to_numeric(pd.Series(values, index=df.index), errors='coerce').astype('float32')
+    for name in ['spo2', 'hr']:
+        values = df[name] if name in df.columns else 0
+        out[name] = pd.to_numeric(pd.Series(values, index=df.index), errors='coerce') \
+            .fillna(0).clip(0, 255).astype('uint8')
+
+    activity = df['ml_activity'] if 'ml_activity' in df.columns else df.get('activity', None)
+    out['activity'] = pd.Series(activity, index=df.index, dtype=object)
+    return out.dropna(subset=['timestamp'])
+
+def fsync_path(path):
+    """fsync a file or directory so a rename into it survives a crash"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def write_file(table, directory, name, metadata=None):
+    """Write a complete Parquet file durably: hidden temp file, fsync, rename"""
+    if metadata:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    tmp_path = os.path.join(directory, f".{name}")
+    pq.write_table(table, tmp_path, compression='zstd')
+    fsync_path(tmp_path)
+    final_path = os.path.join(directory, name)
+    os.replace(tmp_path, final_path)
+    fsync_path(directory)
+    return final_path
+
+class ParquetArchiveWriter:
+    """
+    Every flush writes a complete, closed Parquet file, so rows written are
+    never lost to a crash and no file is left without a footer. Once an
+    hour is over, its small files are compacted into one file per node per
+    hour; the compacted file lists its inputs in its metadata, so a crash
+    mid-compaction is finished on the next start instead of duplicating.
+    """
+    def __init__(self, root="archive", max_buffer_seconds=0.0, row_group_rows=9000):
+        self.root = root
+        self.max_buffer_seconds = max_buffer_seconds  # 0 = a file per write() call
+        self.row_group_rows = row_group_rows
+        self.buffers = {}  # (node, hour) -> list of DataFrames
+        self.buffered_since = None
+        self.sequence = 0
+        self.open_partitions = set()  # (node, hour) with files still to compact
+        self.recover()
+
+    def partition_dir(self, node, hour):
+        return os.path.join(
+            self.root, f"node_id={node}", f"date={hour:%Y-%m-%d}", f"hour={hour:%H}"
+        )
+
+    def recover(self):
+        """Finish interrupted compactions, drop unfinished temp files, find open hours"""
+        if not os.path.isdir(self.root):
+            return
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.startswith('.') and name.endswith('.parquet'):
+                    os.remove(os.path.join(directory, name))
+            for name in names:
+                if name.startswith(COMPACTED_PREFIX):
+                    self._remove_inputs(directory, os.path.join(directory, name))
+
+            files = [name for name in os.listdir(directory) if name.endswith('.parquet') and not name.startswith('.')]
+            key = self._partition_key(directory)
+            if key is not None and len(files) > 1:
+                self.open_partitions.add(key)
+
+    def _partition_key(self, directory):
+        parts = dict(part.split('=', 1) for part in os.path.relpath(directory, self.root).split(os.sep) if '=' in part)
+        if not {'node_id', 'date', 'hour'} <= set(parts):
+            return None
+        return parts['node_id'], pd.Timestamp(f"{parts['date']} {parts['hour']}:00", tz='UTC')
+
+    def _remove_inputs(self, directory, compacted_path):
+        listed = pq.read_schema(compacted_path).metadata or {}
+        for name in json.loads(listed.get(COMPACTED_FROM_KEY, b'[]')):
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def write(self, df):
+        """Append rows (DataFrame or list of dicts) to their node/hour partitions"""
+        if not isinstance(df, pd.DataFrame):
+            df = pd.DataFrame(df)
+        if df.empty:
+            return
+
+        df = normalize(df)
+        hours = df['timestamp'].dt.floor('h')
+        for (node, hour), part in df.groupby([df['node_id'], hours]):
+            self.buffers.setdefault((node, hour), []).append(part.drop(columns=['node_id']))
+        if self.buffered_since is None:
+            self.buffered_since = time.time()
+
+        full = any(sum(len(p) for p in parts) >= self.row_group_rows for parts in self.buffers.values())
+        if full or time.time() - self.buffered_since >= self.max_buffer_seconds:
+            self.flush()
+
+        # An hour stays open for late rows until the next hour has also begun
+        newest = hours.max()
+        for key in list(self.open_partitions):
+            if key[1] < newest - pd.Timedelta(hours=1) and key not in self.buffers:
+                self.compact_partition(key)
+
+    def flush_partition(self, key):
+        """Write the buffered rows of one partition as a new closed file"""
+        parts = self.buffers.pop(key, [])
+        if not parts:
+            return
+
+        directory = self.partition_dir(*key)
+        os.makedirs(directory, exist_ok=True)
+        self.sequence += 1
+        name = f"part-{int(time.time() * 1000)}-{self.sequence:06d}.parquet"
+        table = pa.Table.from_pandas(pd.concat(parts), schema=SCHEMA, preserve_index=False)
+        write_file(table, directory, name)
+        self.open_partitions.add(key)
+
+    def compact_partition(self, key):
+        """Merge a finished hour's files into one, sorted by time and deduplicated"""
+        self.flush_partition(key)
+        self.open_partitions.discard(key)
+        directory = self.partition_dir(*key)
+        if not os.path.isdir(directory):
+            return
+        names = sorted(name for name in os.listdir(directory)
+                       if name.endswith('.parquet') and not name.startswith('.'))
+        if len(names) <= 1:
+            return
+
+        df = pd.concat([pq.ParquetFile(os.path.join(directory, name)).read().to_pandas() for name in names])
+        # Rows re-read after a crash may have been archived twice
+        df = df.drop_duplicates().sort_values('timestamp', kind='stable')
+        table = pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+        self.sequence += 1
+        compacted = write_file(table, directory,
+                               f"{COMPACTED_PREFIX}{int(time.time() * 1000)}-{self.sequence:06d}.parquet",
+                               metadata={COMPACTED_FROM_KEY: json.dumps(names)})
+        self._remove_inputs(directory, compacted)
+
+    def is_flushed(self):
+        """True once every row passed to write() is in a closed file"""
+        return not self.buffers
+
+    def flush(self):
+        for key in list(self.buffers):
+            self.flush_partition(key)
+        self.buffered_since = None
+
+    def close(self):
+        self.flush()
+
+def to_utc(ts):
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+
+def read_archive(root="archive", columns=None, start=None, end=None, nodes=None):
+    """
+    Read only the requested columns, nodes and [start, end) time range.
+    Partition pruning skips whole node/day/hour directories.
+    """
+    if not os.path.isdir(root):
+        return pd.DataFrame()
+
+    dataset = ds.dataset(root, format='parquet', partitioning=PARTITIONING)
+    condition = None
+
+    def both(a, b):
+        return b if a is None else a & b
+
+    if nodes is not None:
+        condition = both(condition, ds.field('node_id').isin(list(nodes)))
+    if start is not None:
+        start = to_utc(start)
+        condition = both(condition, ds.field('date') >= start.strftime('%Y-%m-%d'))
+        condition = both(condition, ds.field('timestamp') >= pa.scalar(start.to_pydatetime(), pa.timestamp('ms', tz='UTC')))
+    if end is not None:
+        end = to_utc(end)
+        condition = both(condition, ds.field('date') <= end.strftime('%Y-%m-%d'))
+        condition = both(condition, ds.field('timestamp') < pa.scalar(end.to_pydatetime(), pa.timestamp('ms', tz='UTC')))
+
+    if columns is not None:
+        columns = list(dict.fromkeys(['node_id', 'timestamp'] + list(columns)))
+
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
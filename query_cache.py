@@ -0,0 +1,61 @@
+"""
+🧠 SHARED QUERY CACHE
+Process-wide TTL + LRU result cache with single-flight loading, shared by
+every Streamlit session
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+class _Entry:
+    def __init__(self):
+        self.value = None
+        self.expires_at = 0.0
+        self.loaded = False
+        self.lock = threading.Lock()  # Held by the one thread refreshing this key
+
+class SharedQueryCache:
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'shared': 0, 'evictions': 0}
+
+    def _entry(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = _Entry()
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+                    self.stats['evictions'] += 1
+            self.entries.move_to_end(key)
+            return entry
+
+    def get(self, key, loader, ttl):
+        """
+        Return the cached value for key, calling loader(previous_value) when
+        it is missing or older than ttl seconds. Concurrent callers for the
+        same key wait for the single in-flight load instead of repeating it.
+        """
+        entry = self._entry(key)
+        if entry.loaded and time.monotonic() < entry.expires_at:
+            self.stats['hits'] += 1
+            return entry.value
+
+        with entry.lock:
+            # Another session may have refreshed it while we waited
+            if entry.loaded and time.monotonic() < entry.expires_at:
+                self.stats['shared'] += 1
+                return entry.value
+
+            self.stats['misses'] += 1
+            entry.value = loader(entry.value)
+            entry.loaded = True
+            entry.expires_at = time.monotonic() + ttl
+            return entry.value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,233 @@
+"""
+🔎 QUERY LAYER
+Parameterized SQL for the health tables. Values travel as query parameters
+instead of being pasted into the SQL text, so every viewer of the same
+view sends byte-identical SQL that BigQuery can cache. Raw-table queries
+always filter the partition column (timestamp, partitioned by day) against
+a parameter, so only the days in range are scanned; ID_user is the
+clustering column, so a user filter skips most blocks of those days too.
+"""
+
+from datetime import datetime, timedelta
+import pytz
+from google.cloud import bigquery
+
+ALL_USERS = "All Users"
+PARTITION_COLUMN = 'timestamp'
+CLUSTER_COLUMNS = ['ID_user']
+WINDOW_ALIGN_SECONDS = 60  # Window starts are floored so repeats hit the result cache
+
+RAW_COLUMNS = [
+    'ID_user', 'timestamp', 'temp', 'spo2', 'hr',
+    'ax', 'ay', 'az', 'gx', 'gy', 'gz', 'humidity', 'activity'
+]
+
+def health_schema():
+    """Schema of the raw health table as written by the uploaders"""
+    fields = [
+        bigquery.SchemaField('ID_user', 'STRING'),
+        bigquery.SchemaField('timestamp', 'TIMESTAMP', mode='REQUIRED'),
+        bigquery.SchemaField('temp', 'FLOAT'),
+        bigquery.SchemaField('spo2', 'INTEGER'),
+        bigquery.SchemaField('hr', 'INTEGER'),
+    ]
+    fields += [bigquery.SchemaField(axis, 'FLOAT') for axis in ['ax', 'ay', 'az', 'gx', 'gy', 'gz']]
+    fields += [
+        bigquery.SchemaField('humidity', 'FLOAT'),
+        bigquery.SchemaField('activity', 'STRING'),
+        bigquery.SchemaField('activity_confidence', 'FLOAT'),
+        bigquery.SchemaField('source', 'STRING'),
+        bigquery.SchemaField('processing_stage', 'STRING'),
+    ]
+    return fields
+
+def health_table(table_id):
+    """Raw table definition: day partitions on timestamp, clustered by user"""
+    table = bigquery.Table(table_id, schema=health_schema())
+    table.time_partitioning = bigquery.TimePartitioning(
+        type_=bigquery.TimePartitioningType.DAY, field=PARTITION_COLUMN
+    )
+    table.require_partition_filter = True  # Reject accidental full scans
+    table.clustering_fields = CLUSTER_COLUMNS
+    return table
+
+def ensure_health_table(client, table_id):
+    """Create the partitioned raw table if it does not exist yet"""
+    return client.create_table(health_table(table_id), exists_ok=True)
+
+def health_table_problems(client, table_id):
+    """
+    Layout problems of an existing raw table, empty if it prunes as designed.
+    create_table(exists_ok=True) leaves an older table exactly as it was, so
+    callers check this at startup instead of assuming the layout.
+    """
+    table = client.get_table(table_id)
+    problems = []
+    partitioning = table.time_partitioning
+    if partitioning is None or partitioning.field != PARTITION_COLUMN:
+        problems.append(f"{table_id} is not partitioned on {PARTITION_COLUMN}: every query scans the whole table")
+    if list(table.clustering_fields or []) != CLUSTER_COLUMNS:
+        problems.append(f"{table_id} is not clustered by {', '.join(CLUSTER_COLUMNS)}")
+    return problems
+
+def migration_sql(source_table, target_table):
+    """
+    One-off copy of an unpartitioned table into the partitioned layout.
+    Run it with migrate_health_table.py, which also lists the cutover steps.
+    """
+    return f"""
+    CREATE TABLE IF NOT EXISTS `{target_table}`
+    PARTITION BY DATE({PARTITION_COLUMN})
+    CLUSTER BY {', '.join(CLUSTER_COLUMNS)}
+    OPTIONS (require_partition_filter = TRUE)
+    AS SELECT * FROM `{source_table}`
+    """
+
+# ============================================================================
+# PARAMETERS
+# ============================================================================
+def window_start(hours, now=None, align_seconds=WINDOW_ALIGN_SECONDS):
+    """Start of the last `hours`, floored so it only changes once per minute"""
+    now = now or datetime.now(pytz.UTC)
+    start = now - timedelta(hours=hours)
+    epoch = int(start.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % align_seconds, tz=pytz.UTC)
+
+def user_filter(selected_user, column='ID_user'):
+    """SQL fragment and parameters restricting to one user (or none)"""
+    if selected_user == ALL_USERS:
+        return "", []
+    return f"AND {column} = @user", [bigquery.ScalarQueryParameter('user', 'STRING', selected_user)]
+
+def job_config(params):
+    return bigquery.QueryJobConfig(query_parameters=params, use_query_cache=True)
+
+def run_query(client, sql, params):
+    """Start a parameterized query job"""
+    return client.query(sql, job_config=job_config(params))
+
+# ============================================================================
+# QUERIES - each returns (sql, params)
+# ============================================================================
+def window_query(table, hours, selected_user, limit, since=None, now=None):
+    """Newest raw rows of the window; with `since`, only rows after it"""
+    users_sql, params = user_filter(selected_user)
+    params = params + [
+        bigquery.ScalarQueryParameter('window_start', 'TIMESTAMP', window_start(hours, now)),
+        bigquery.ScalarQueryParameter('row_limit', 'INT64', limit),
+    ]
+
+    since_sql = ""
+    if since is not None:
+        since_sql = "AND timestamp > @since"
+        params.append(bigquery.ScalarQueryParameter('since', 'TIMESTAMP', since))
+
+    sql = f"""
+    SELECT {', '.join(RAW_COLUMNS)}
+    FROM `{table}`
+    WHERE timestamp >= @window_start
+    {since_sql}
+    {users_sql}
+    ORDER BY timestamp DESC
+    LIMIT @row_limit
+    """
+    return sql, params
+
+def aggregate_query(table, hours, selected_user, bucket, vitals, now=None):
+    """
+    Per-bucket min/max/avg of `vitals` over the window. The bucket start is
+    returned as bucket_start: aliasing it `timestamp` would clash with the
+    raw column in GROUP BY.
+    """
+    users_sql, params = user_filter(selected_user)
+    params = params + [
+        bigquery.ScalarQueryParameter('window_start', 'TIMESTAMP', window_start(hours, now)),
+        bigquery.ScalarQueryParameter('bucket', 'INT64', bucket),
+    ]
+
+    vital_columns = ",\n        ".join(
+        f"MIN({col}) AS {col}_min, MAX({col}) AS {col}_max, AVG({col}) AS {col}"
+        for col in vitals
+    )
+    sql = f"""
+    SELECT
+        TIMESTAMP_SECONDS(DIV(UNIX_SECONDS(timestamp), @bucket) * @bucket) AS bucket_start,
+        COUNT(*) AS samples,
+        {vital_columns}
+    FROM `{table}`
+    WHERE timestamp >= @window_start
+    {users_sql}
+    GROUP BY bucket_start
+    ORDER BY bucket_start
+    """
+    return sql, params
+
+def rollup_stats_query(table, hours, selected_user, now=None):
+    """Range statistics combined from partial rollup rows"""
+    users_sql, params = user_filter(selected_user, column='id_user')
+    params = params + [
+        bigquery.ScalarQueryParameter('window_start', 'TIMESTAMP', window_start(hours, now)),
+    ]
+    sql = f"""
+    SELECT
+        activity,
+        SUM(samples) AS samples,
+        SUM(hr_sum) AS hr_sum,
+        SUM(temp_sum) AS temp_sum,
+        MIN(hr_min) AS hr_min,
+        MAX(hr_max) AS hr_max
+    FROM `{table}`
+    WHERE bucket >= @window_start
+    {users_sql}
+    GROUP BY activity
+    """
+    return sql, params
+
+def export_query(table, hours, selected_user, now=None):
+    """Every raw row of the window, oldest first"""
+    users_sql, params = user_filter(selected_user)
+    params = params + [
+        bigquery.ScalarQueryParameter('window_start', 'TIMESTAMP', window_start(hours, now)),
+    ]
+    sql = f"""
+    SELECT {', '.join(RAW_COLUMNS)}
+    FROM `{table}`
+    WHERE timestamp >= @window_start
+    {users_sql}
+    ORDER BY timestamp
+    """
+    return sql, params
+
+def recent_users_query(table, days=7, now=None):
+    """Fallback user directory from the raw table (pruned to `days`)"""
+    params = [bigquery.ScalarQueryParameter('window_start', 'TIMESTAMP', window_start(days * 24, now))]
+    sql = f"""
+    SELECT DISTINCT ID_user
+    FROM `{table}`
+    WHERE timestamp >= @window_start
+    ORDER BY ID_user
+    """
+    return sql, params
+
+def ward_query(table, minutes, now=None):
+    """
+    Newest row plus a short summary for every user, in one scan: window
+    aggregates per user, then QUALIFY keeps each user's latest row
+    """
+    params = [bigquery.ScalarQueryParameter('window_start', 'TIMESTAMP', window_start(minutes / 60, now))]
+    sql = f"""
+    SELECT
+        ID_user, timestamp, temp, spo2, hr, humidity, activity,
+        COUNT(*) OVER per_user AS samples,
+        AVG(hr) OVER per_user AS avg_hr,
+        MIN(NULLIF(hr, 0)) OVER per_user AS min_hr,
+        MAX(hr) OVER per_user AS max_hr,
+        AVG(NULLIF(spo2, 0)) OVER per_user AS avg_spo2,
+        MIN(NULLIF(spo2, 0)) OVER per_user AS min_spo2
+    FROM `{table}`
+    WHERE timestamp >= @window_start
+    QUALIFY ROW_NUMBER() OVER (PARTITION BY ID_user ORDER BY timestamp DESC) = 1
+    WINDOW per_user AS (PARTITION BY ID_user)
+    ORDER BY ID_user
+    """
+    return sql, params
@@ -0,0 +1,132 @@
+"""
+🧮 RING HISTORY
+Fixed-size, column-oriented sample history for the local dashboard.
+Columns are preallocated NumPy arrays (float32 vitals, uint8 SpO2), so
+memory never grows and an append is a handful of scalar writes. Each
+sample is written twice, at i and i + capacity: the newest samples are
+then always one contiguous slice, handed out as views without copying.
+Samples are keyed by their source timestamp, so re-reading an unchanged
+file does not add duplicates.
+"""
+
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from downsampling import minmax_indices
+
+SAMPLE_RATE_HZ = 30
+HISTORY_SECONDS = 3600
+DEFAULT_CAPACITY = SAMPLE_RATE_HZ * HISTORY_SECONDS  # One hour at 30 Hz
+
+RING_COLUMNS = {
+    'hr': np.float32,
+    'spo2': np.uint8,
+    'temp': np.float32,
+    'movement': np.float32,
+}
+
+def source_timestamp(value):
+    """Epoch seconds of a sample's own timestamp (ISO string, datetime or number)"""
+    if value is None:
+        return None
+    try:
+        if isinstance(value, (int, float, np.number)):
+            return float(value)
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        return pd.Timestamp(value).timestamp()
+    except (ValueError, TypeError):
+        return None
+
+class SampleRing:
+    def __init__(self, capacity=DEFAULT_CAPACITY, columns=RING_COLUMNS):
+        self.capacity = int(capacity)
+        self.columns = dict(columns)
+        self.timestamps = np.zeros(2 * self.capacity, dtype=np.float64)
+        self.data = {name: np.zeros(2 * self.capacity, dtype=dtype) for name, dtype in self.columns.items()}
+        self.head = 0  # Next write position in [0, capacity)
+        self.count = 0
+        self.last_timestamp = None
+        self.duplicates = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + sum(array.nbytes for array in self.data.values())
+
+    def append(self, sample):
+        """Store one sample dict; False if it has no timestamp or is not newer"""
+        timestamp = source_timestamp(sample.get('timestamp'))
+        if timestamp is None:
+            return False
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            self.duplicates += 1
+            return False
+
+        mirror = self.head + self.capacity
+        self.timestamps[self.head] = self.timestamps[mirror] = timestamp
+        for name, array in self.data.items():
+            value = sample.get(name)
+            if value is None:
+                value = 0 if array.dtype.kind == 'u' else np.nan
+            elif array.dtype.kind == 'u':
+                value = min(max(int(value), 0), np.iinfo(array.dtype).max)
+            array[self.head] = array[mirror] = value
+
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.last_timestamp = timestamp
+        return True
+
+    def extend(self, samples):
+        return sum(self.append(sample) for sample in samples)
+
+    def _window(self, last=None):
+        count = self.count if last is None else min(last, self.count)
+        end = self.head + self.capacity
+        return slice(end - count, end)
+
+    def _view(self, array, last=None):
+        view = array[self._window(last)]
+        view.flags.writeable = False  # Callers see the live buffer, not a copy
+        return view
+
+    def view(self, name, last=None):
+        """Oldest-to-newest values of one column (read-only view, no copy)"""
+        return self._view(self.data[name], last)
+
+    def times(self, last=None):
+        return self._view(self.timestamps, last)
+
+    def latest(self):
+        if not self.count:
+            return None
+        index = self.head - 1 + self.capacity
+        sample = {name: array[index].item() for name, array in self.data.items()}
+        sample['timestamp'] = self.timestamps[index].item()
+        return sample
+
+    def frame(self, columns=None, last=None):
+        """DataFrame over the views, indexed by sample time"""
+        columns = columns or list(self.data)
+        index = pd.to_datetime(self.times(last), unit='s', utc=True)
+        return pd.DataFrame({name: self.view(name, last) for name in columns}, index=index, copy=False)
+
+    def chart_frame(self, columns, last=None, max_points=600):
+        """
+        frame() min/max-downsampled to about max_points rows: the extrema of
+        every column are kept, so an SpO2 dip survives next to an HR spike
+        """
+        per_column = max(max_points // len(columns), 2)
+        indices = np.unique(np.concatenate([
+            minmax_indices(self.view(name, last), per_column) for name in columns
+        ]))
+        index = pd.to_datetime(self.times(last)[indices], unit='s', utc=True)
+        return pd.DataFrame({name: self.view(name, last)[indices] for name in columns}, index=index)
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+        self.last_timestamp = None
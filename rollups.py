@@ -0,0 +1,225 @@
+"""
+📊 ROLLUPS
+Per-minute and per-hour aggregates maintained by the uploader.
+Each upload streams one partial row per (minute, id_user, activity) with
+counts, sums and min/max per vital; partials for the same bucket combine
+with SUM / MIN / MAX, at read time or when compacted.
+Because partials are additive, each is sent with a deterministic insertId
+and waits in its own outbox until acknowledged: retries neither double
+count nor drop a batch.
+Streaming leaves ~720 partials per user and activity in every hour, so
+compact() periodically folds the partials of settled minutes into one row
+each, and rebuilds the hour table from the minute table: one row per
+(hour, id_user, activity), and never streamed to.
+"""
+
+import hashlib
+import time
+import pandas as pd
+from google.cloud import bigquery
+from bigquery_batcher import BigQueryBatcher
+
+ROLLUP_VITALS = ['hr', 'spo2', 'temp', 'humidity']
+GRANULARITIES = {'minute': 'min', 'hour': 'h'}
+STREAMED = 'minute'  # The hour table is built from it by compact()
+COMPACT_INTERVAL_SECONDS = 300
+SETTLE_SECONDS = 2 * 3600  # DML cannot touch rows still in the streaming buffer
+REBUILD_HOURS = 24  # Hour rows recomputed on every compaction, for late partials
+BACKFILL_HOURS = 720  # First compaction after start covers the 30 days the dashboard reads
+
+def rollup_schema():
+    fields = [
+        bigquery.SchemaField('bucket', 'TIMESTAMP', mode='REQUIRED'),
+        bigquery.SchemaField('id_user', 'STRING'),
+        bigquery.SchemaField('activity', 'STRING'),
+        bigquery.SchemaField('samples', 'INTEGER'),
+    ]
+    for vital in ROLLUP_VITALS:
+        fields += [
+            bigquery.SchemaField(f'{vital}_sum', 'FLOAT'),
+            bigquery.SchemaField(f'{vital}_min', 'FLOAT'),
+            bigquery.SchemaField(f'{vital}_max', 'FLOAT'),
+        ]
+    return fields
+
+def compute_rollups(rows, granularity):
+    """Aggregate BigQuery payload rows into partial rollup rows"""
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return []
+
+    df['bucket'] = pd.to_datetime(df['timestamp'], utc=True, errors='coerce', format='ISO8601') \
+        .dt.floor(GRANULARITIES[granularity])
+    df = df.dropna(subset=['bucket'])
+
+    aggregations = {'samples': ('hr', 'size')}
+    for vital in ROLLUP_VITALS:
+        aggregations[f'{vital}_sum'] = (vital, 'sum')
+        aggregations[f'{vital}_min'] = (vital, 'min')
+        aggregations[f'{vital}_max'] = (vital, 'max')
+
+    rollup = df.groupby(['bucket', 'id_user', 'activity'], dropna=False) \
+        .agg(**aggregations).reset_index()
+    rollup['bucket'] = rollup['bucket'].dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+    rollup['samples'] = rollup['samples'].astype(int)
+    return rollup.to_dict('records')
+
+def batch_key(record_ids):
+    """Stable key of one acknowledged batch of raw record IDs"""
+    return hashlib.sha1("\n".join(sorted(record_ids)).encode()).hexdigest()[:16]
+
+def partial_row_id(table_id, partial, key):
+    """Deterministic insertId: a resent partial is deduplicated by BigQuery"""
+    raw = f"{table_id}|{partial['bucket']}|{partial['id_user']}|{partial['activity']}|{key}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def compaction_sql(target_table, source_table, unit):
+    """
+    Replace the target's rows in [@window_start, @window_end) with the
+    source's rows of that window folded into one row per unit bucket.
+    With target == source this compacts partials in place.
+    """
+    folded = [f"SUM({vital}_sum) AS {vital}_sum, MIN({vital}_min) AS {vital}_min, "
+              f"MAX({vital}_max) AS {vital}_max" for vital in ROLLUP_VITALS]
+    columns = [field.name for field in rollup_schema()]
+    sep = ",\n            "
+    return f"""
+    MERGE `{target_table}` AS stored
+    USING (
+        SELECT
+            TIMESTAMP_TRUNC(bucket, {unit}) AS bucket,
+            id_user,
+            activity,
+            SUM(samples) AS samples,
+            {sep.join(folded)}
+        FROM `{source_table}`
+        WHERE bucket >= @window_start AND bucket < @window_end
+        GROUP BY 1, 2, 3  -- By position: the truncated bucket, not the column
+    ) AS folded
+    ON FALSE
+    WHEN NOT MATCHED BY SOURCE
+        AND stored.bucket >= @window_start AND stored.bucket < @window_end THEN DELETE
+    WHEN NOT MATCHED THEN
+        INSERT ({', '.join(columns)})
+        VALUES ({', '.join(f'folded.{column}' for column in columns)})
+    """
+
+class RollupWriter:
+    def __init__(self, client, project_id, dataset_id, base_table, outbox=None):
+        self.client = client
+        self.table_ids = {
+            granularity: f"{project_id}.{dataset_id}.{base_table}_rollup_{granularity}"
+            for granularity in GRANULARITIES
+        }
+        self.batchers = {
+            STREAMED: BigQueryBatcher(client, self.table_ids[STREAMED], max_workers=1)
+        }
+        self.outbox = outbox  # UploadOutbox holding partials until BigQuery acks them
+        self.ready = False
+        self.next_compaction = 0.0
+        self.compacted_until = None  # Minute partials before this are folded
+        self.hours_built = False
+
+    def ensure_tables(self):
+        """Create rollup tables (partitioned by day, clustered by user) if missing"""
+        for table_id in self.table_ids.values():
+            table = bigquery.Table(table_id, schema=rollup_schema())
+            table.time_partitioning = bigquery.TimePartitioning(field='bucket')
+            table.clustering_fields = ['id_user']
+            self.client.create_table(table, exists_ok=True)
+        self.ready = True
+
+    def partials(self, rows, key):
+        """(row_ids, rows) of the partial aggregates of one acknowledged batch"""
+        row_ids, partials = [], []
+        table_id = self.table_ids[STREAMED]
+        for partial in compute_rollups(rows, STREAMED):
+            row_ids.append(partial_row_id(table_id, partial, key))
+            partials.append(dict(partial, granularity=STREAMED))
+        return row_ids, partials
+
+    def flush(self, limit=10000):
+        """Send queued partials; ack what BigQuery accepted, keep the rest queued"""
+        if not self.client or self.outbox is None:
+            return 0
+        record_ids, rows = self.outbox.pending(limit=limit)
+        if not rows:
+            return 0
+
+        try:
+            if not self.ready:
+                self.ensure_tables()
+        except Exception as e:
+            print(f"❌ Rollup table setup error: {e}")
+            return 0
+
+        acked, nacked = [], []
+        for granularity, batcher in self.batchers.items():
+            ids = [rid for rid, row in zip(record_ids, rows) if row['granularity'] == granularity]
+            partials = [{k: v for k, v in row.items() if k != 'granularity'}
+                        for row in rows if row['granularity'] == granularity]
+            if not partials:
+                continue
+            try:
+                _, failed_rows = batcher.insert(partials, row_ids=ids)
+            except Exception as e:
+                print(f"❌ Rollup update error: {e}")
+                failed_rows = partials
+            failed = {id(row) for row in failed_rows}
+            acked += [rid for rid, row in zip(ids, partials) if id(row) not in failed]
+            nacked += [rid for rid, row in zip(ids, partials) if id(row) in failed]
+
+        # Hour partials queued before the hour table was built by compact()
+        # are covered by its rebuild; drop them instead of streaming them
+        acked += [rid for rid, row in zip(record_ids, rows) if row['granularity'] not in self.batchers]
+
+        self.outbox.ack(acked)
+        self.outbox.nack(nacked)
+        if nacked:
+            print(f"⚠️ {len(nacked)} rollup rows kept pending")
+        return len(acked)
+
+    def run_compaction(self, target, source, unit, window_start, window_end):
+        params = [
+            bigquery.ScalarQueryParameter('window_start', 'TIMESTAMP', window_start.to_pydatetime()),
+            bigquery.ScalarQueryParameter('window_end', 'TIMESTAMP', window_end.to_pydatetime()),
+        ]
+        config = bigquery.QueryJobConfig(query_parameters=params)
+        self.client.query(compaction_sql(target, source, unit), job_config=config).result()
+
+    def compact(self, now=None):
+        """
+        Every COMPACT_INTERVAL_SECONDS: fold the minute partials of hours that
+        have left the streaming buffer, then rebuild the recent hour rows from
+        the minute table. Returns the number of statements run.
+        """
+        if not self.client or time.time() < self.next_compaction:
+            return 0
+        self.next_compaction = time.time() + COMPACT_INTERVAL_SECONDS
+        now = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz='UTC')
+        minute_table, hour_table = self.table_ids['minute'], self.table_ids['hour']
+        statements = 0
+
+        try:
+            if not self.ready:
+                self.ensure_tables()
+
+            settled = (now - pd.Timedelta(seconds=SETTLE_SECONDS)).floor('h')
+            start = self.compacted_until
+            if start is None:
+                start = settled - pd.Timedelta(hours=BACKFILL_HOURS)
+            if settled > start:
+                self.run_compaction(minute_table, minute_table, 'MINUTE', start, settled)
+                self.compacted_until = settled
+                statements += 1
+
+            current = now.floor('h')
+            rebuild_hours = REBUILD_HOURS if self.hours_built else BACKFILL_HOURS
+            self.run_compaction(hour_table, minute_table, 'HOUR',
+                                current - pd.Timedelta(hours=rebuild_hours),
+                                current + pd.Timedelta(hours=1))
+            self.hours_built = True
+            statements += 1
+        except Exception as e:
+            print(f"❌ Rollup compaction error: {e}")
+        return statements
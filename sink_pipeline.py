@@ -0,0 +1,229 @@
+"""
+🔀 SINK PIPELINE
+Fan-out of each reading to independent sink workers, each with its own
+bounded queue, backpressure policy and metrics. Rows a sink rejects as
+invalid go to a dead-letter file instead of being retried.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+BLOCK = "block"              # Producer waits for room (no loss)
+DROP_OLDEST = "drop_oldest"  # Oldest queued row is discarded
+SPILL = "spill"              # Overflow is appended to a JSONL file on disk
+
+DRAIN_BACKOFF_SECONDS = 2.0      # First wait after a failed spill replay
+MAX_DRAIN_BACKOFF_SECONDS = 300.0
+
+class SinkWorker:
+    def __init__(self, name, write_batch, flush=None, close=None,
+                 max_queue=10_000, policy=BLOCK, batch_size=500,
+                 flush_interval=1.0, spill_file=None, dead_letter_file=None):
+        if policy == SPILL and not spill_file:
+            raise ValueError(f"Sink '{name}' uses spill policy but has no spill_file")
+
+        self.name = name
+        # rows -> failed rows (worth retrying), or (failed, rejected) when the
+        # sink can tell rows it will never accept
+        self.write_batch = write_batch
+        self.flush_hook = flush
+        self.close_hook = close
+        self.max_queue = max_queue
+        self.policy = policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_file = spill_file
+        self.dead_letter_file = dead_letter_file
+
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        # Circuit breaker for spill replays: wait longer after each failure
+        self.drain_failures = 0
+        self.next_drain_at = 0.0
+        self.metrics = {
+            'enqueued': 0, 'written': 0, 'failed': 0, 'rejected': 0, 'dropped': 0,
+            'spilled': 0, 'errors': 0, 'queue_depth': 0, 'last_write_ms': 0.0,
+            'drain_backoff_s': 0.0
+        }
+
+        self.thread = threading.Thread(target=self._run, name=f"sink-{name}", daemon=True)
+        self.thread.start()
+
+    def put(self, row):
+        """Enqueue a row, applying the backpressure policy when full"""
+        with self.cond:
+            if self.closed:
+                return False
+
+            if len(self.queue) >= self.max_queue:
+                if self.policy == BLOCK:
+                    while len(self.queue) >= self.max_queue and not self.closed:
+                        self.cond.wait()
+                elif self.policy == DROP_OLDEST:
+                    self.queue.popleft()
+                    self.metrics['dropped'] += 1
+                else:
+                    self._spill([row])
+                    return True
+
+            self.queue.append(row)
+            self.metrics['enqueued'] += 1
+            self.metrics['queue_depth'] = len(self.queue)
+            self.cond.notify_all()
+            return True
+
+    def _spill(self, rows):
+        with open(self.spill_file, 'a') as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str) + "\n")
+        self.metrics['spilled'] += len(rows)
+
+    def _dead_letter(self, rows):
+        """Keep rejected rows for inspection; they are never retried"""
+        self.metrics['rejected'] += len(rows)
+        if not self.dead_letter_file:
+            print(f"⚠️ Sink '{self.name}' dropped {len(rows)} rejected rows")
+            return
+        with open(self.dead_letter_file, 'a') as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str) + "\n")
+        print(f"⚠️ Sink '{self.name}' rejected {len(rows)} rows -> {self.dead_letter_file}")
+
+    def _spill_batches(self, f):
+        batch = []
+        for line in f:
+            batch.append(json.loads(line))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _drain_spill(self):
+        """
+        Replay spilled rows once the queue has gone idle. A batch that fails
+        as a whole means the sink is still down: stop and back off before
+        the next try. Rejected rows are dead-lettered and rows that failed
+        alone are kept, without holding up the rest. Also stops as soon as
+        live rows arrive; unsent rows stay in the file.
+        """
+        if time.monotonic() < self.next_drain_at:
+            return
+        draining = f"{self.spill_file}.draining"
+        with self.cond:
+            if not os.path.exists(draining):
+                if not os.path.exists(self.spill_file):
+                    return
+                os.replace(self.spill_file, draining)
+
+        retry = []
+        sink_down = False
+        with open(draining, 'r') as f:
+            for batch in self._spill_batches(f):
+                failed = self._write(batch, spill_failed=False)
+                retry += failed
+                sink_down = len(failed) == len(batch)
+                if sink_down or self.queue:
+                    break
+            rest = f.readlines()
+
+        if sink_down:
+            self.drain_failures += 1
+            backoff = min(DRAIN_BACKOFF_SECONDS * 2 ** (self.drain_failures - 1), MAX_DRAIN_BACKOFF_SECONDS)
+            self.next_drain_at = time.monotonic() + backoff
+            self.metrics['drain_backoff_s'] = backoff
+        else:
+            self.drain_failures = 0
+            self.next_drain_at = 0.0
+            self.metrics['drain_backoff_s'] = 0.0
+
+        if retry or rest:
+            # Keep what was not delivered for the next attempt
+            tmp_file = f"{draining}.tmp"
+            with open(tmp_file, 'w') as f:
+                for row in retry:
+                    f.write(json.dumps(row, default=str) + "\n")
+                f.writelines(rest)
+            os.replace(tmp_file, draining)
+        else:
+            os.remove(draining)
+
+    def _write(self, batch, spill_failed=True):
+        """Write one batch; returns the rows worth retrying"""
+        start = time.perf_counter()
+        rejected = []
+        try:
+            failed = self.write_batch(batch) or []
+            if isinstance(failed, tuple):
+                failed, rejected = failed
+        except Exception as e:
+            print(f"❌ Sink '{self.name}' error: {e}")
+            self.metrics['errors'] += 1
+            failed = batch
+
+        self.metrics['last_write_ms'] = (time.perf_counter() - start) * 1000
+        self.metrics['written'] += len(batch) - len(failed) - len(rejected)
+        self.metrics['failed'] += len(failed)
+        if rejected:
+            self._dead_letter(rejected)
+
+        # Failed rows get another chance later if this sink can spill
+        if failed and self.spill_file and spill_failed:
+            with self.cond:
+                self._spill(failed)
+        return failed
+
+    def _run(self):
+        while True:
+            with self.cond:
+                if not self.queue and not self.closed:
+                    self.cond.wait(timeout=self.flush_interval)
+                batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+                self.metrics['queue_depth'] = len(self.queue)
+                finished = self.closed and not batch
+                self.cond.notify_all()  # Wake producers blocked on a full queue
+
+            if batch:
+                self._write(batch)
+                continue
+
+            # Idle: make buffered writes durable, then retry anything spilled
+            if self.flush_hook:
+                try:
+                    self.flush_hook()
+                except Exception as e:
+                    print(f"❌ Sink '{self.name}' flush error: {e}")
+                    self.metrics['errors'] += 1
+            if self.spill_file and not finished:
+                self._drain_spill()
+            if finished:
+                break
+
+        if self.close_hook:
+            self.close_hook()
+
+    def close(self, timeout=30):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join(timeout)
+
+class FanOutPipeline:
+    def __init__(self, workers):
+        self.workers = workers
+
+    def submit(self, row):
+        """Hand the row to every sink; each applies its own policy"""
+        for worker in self.workers:
+            worker.put(row)
+
+    def metrics(self):
+        return {worker.name: dict(worker.metrics) for worker in self.workers}
+
+    def close(self):
+        for worker in self.workers:
+            worker.close()
@@ -0,0 +1,62 @@
+"""
+💾 SQLITE SINK
+Batched, transactional writer for the local health_data table
+"""
+
+import sqlite3
+import time
+
+class SqliteSink:
+    def __init__(self, db_file="local_health_data.db", batch_rows=500,
+                 flush_interval=1.0, synchronous="NORMAL"):
+        self.db_file = db_file
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval  # Max seconds a row stays in memory
+        self.buffer = []
+        self.last_flush = time.monotonic()
+
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        # WAL: one fsync per checkpoint-bounded commit instead of per row.
+        # synchronous: OFF (fastest) / NORMAL (safe with WAL) / FULL (per commit)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={synchronous}")
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS health_data (
+            timestamp TEXT,
+            temp REAL,
+            hr INTEGER,
+            spo2 INTEGER,
+            humidity REAL
+        )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_health_data_timestamp ON health_data (timestamp)"
+        )
+        self.conn.commit()
+
+    def write(self, row):
+        """Buffer a (timestamp, temp, hr, spo2, humidity) tuple"""
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_rows or \
+                time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def write_many(self, rows):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.batch_rows or \
+                time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Insert buffered rows with executemany under one transaction"""
+        if self.buffer:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO health_data VALUES (?, ?, ?, ?, ?)", self.buffer
+                )
+            self.buffer = []
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
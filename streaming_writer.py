@@ -0,0 +1,100 @@
+"""
+📤 BIGQUERY STREAMING WRITER
+Background writer that coalesces submitted rows into micro-batches so the
+acquisition loop never waits on the network
+"""
+
+import queue
+import threading
+import time
+from bigquery_batcher import BigQueryBatcher
+
+class _Marker:
+    """Control message placed on the queue behind pending rows"""
+    def __init__(self, stop=False):
+        self.stop = stop
+        self.done = threading.Event()
+
+class BigQueryStreamingWriter:
+    def __init__(self, client, table_id, batch_rows=500, flush_interval=0.2,
+                 max_queue=100_000):
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval  # Seconds a row may wait for a batch
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batcher = BigQueryBatcher(client, table_id, max_rows=batch_rows, max_workers=1)
+        self.stats = {'submitted': 0, 'uploaded': 0, 'failed': 0, 'dropped': 0}
+        self.closed = False
+
+        self.thread = threading.Thread(target=self._run, name="bq-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, row):
+        """Queue a row without blocking; returns False if the queue is full"""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(row)
+            self.stats['submitted'] += 1
+            return True
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+
+    def flush(self, timeout=30):
+        """Block until every row submitted so far has been sent"""
+        marker = _Marker()
+        self.queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self, timeout=30):
+        """Flush remaining rows and stop the background thread"""
+        if self.closed:
+            return
+        self.closed = True
+        marker = _Marker(stop=True)
+        self.queue.put(marker)
+        marker.done.wait(timeout)
+        self.thread.join(timeout)
+
+    def _write(self, batch):
+        try:
+            uploaded, failed_rows = self.batcher.insert(batch)
+        except Exception as e:
+            print(f"❌ Streaming writer error: {e}")
+            uploaded, failed_rows = 0, batch
+        self.stats['uploaded'] += uploaded
+        self.stats['failed'] += len(failed_rows)
+        if uploaded:
+            print(f"✅ Streamed {uploaded} rows to BigQuery")
+        if failed_rows:
+            print(f"❌ {len(failed_rows)} rows failed to stream")
+
+    def _run(self):
+        batch = []
+        deadline = None
+
+        while True:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, _Marker):
+                if batch:
+                    self._write(batch)
+                batch, deadline = [], None
+                item.done.set()
+                if item.stop:
+                    return
+                continue
+
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            # Flush on size or when the oldest row has waited long enough
+            if batch and (len(batch) >= self.batch_rows or time.monotonic() >= deadline):
+                self._write(batch)
+                batch, deadline = [], None
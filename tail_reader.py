@@ -0,0 +1,119 @@
+"""
+📜 CSV TAIL READER
+Reads only the rows appended to a growing CSV file since the last poll
+"""
+
+import csv
+import io
+import json
+import os
+import pandas as pd
+
+class CsvTailReader:
+    def __init__(self, csv_file, state_file=None, max_bytes=16 * 1024 * 1024):
+        self.csv_file = csv_file
+        self.state_file = state_file or f"{csv_file}.offset.json"
+        self.max_bytes = max_bytes  # Upper bound on bytes parsed per poll
+        self.state = self.load_state()
+        self.pending_state = None
+        self.unsaved = False  # state is ahead of the state file
+
+    def empty_state(self):
+        """Fresh state pointing at the start of the file"""
+        return {'offset': 0, 'inode': None, 'size': 0, 'header': None}
+
+    def load_state(self):
+        """Load persisted byte offset, inode, size and header"""
+        if not os.path.exists(self.state_file):
+            return self.empty_state()
+
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            return {**self.empty_state(), **state}
+        except Exception as e:
+            print(f"⚠️ Tail state unreadable, starting from beginning: {e}")
+            return self.empty_state()
+
+    def save_state(self, state):
+        """Persist state atomically so a crash never leaves a torn file"""
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_file, self.state_file)
+
+    def is_rotated(self, stat):
+        """Detect replacement (new inode) or truncation (file shrank)"""
+        if self.state['inode'] is not None and stat.st_ino != self.state['inode']:
+            return True
+        return stat.st_size < self.state['offset']
+
+    def read_new_rows(self):
+        """
+        Parse only the complete lines appended since the committed offset.
+        Call commit() once the returned rows are safely handled.
+        """
+        if not os.path.exists(self.csv_file):
+            return pd.DataFrame()
+
+        stat = os.stat(self.csv_file)
+        state = dict(self.state)
+
+        if self.is_rotated(stat):
+            print(f"🔄 {self.csv_file} rotated or truncated, reading from start")
+            state = self.empty_state()
+
+        offset = state['offset']
+        if stat.st_size <= offset:
+            self.pending_state = {**state, 'inode': stat.st_ino, 'size': stat.st_size}
+            return pd.DataFrame(columns=state['header'] or [])
+
+        with open(self.csv_file, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read(min(stat.st_size - offset, self.max_bytes))
+
+        # Only consume up to the last newline - the writer may be mid-row
+        last_newline = chunk.rfind(b'\n')
+        if last_newline == -1:
+            return pd.DataFrame(columns=state['header'] or [])
+        chunk = chunk[:last_newline + 1]
+        new_offset = offset + len(chunk)
+
+        header = state['header']
+        if header is None:
+            first_newline = chunk.find(b'\n')
+            header_line = chunk[:first_newline].decode('utf-8-sig')
+            header = next(csv.reader([header_line]))
+            chunk = chunk[first_newline + 1:]
+
+        if chunk.strip():
+            df = pd.read_csv(io.BytesIO(chunk), header=None, names=header)
+        else:
+            df = pd.DataFrame(columns=header)
+
+        self.pending_state = {
+            'offset': new_offset,
+            'inode': stat.st_ino,
+            'size': stat.st_size,
+            'header': header
+        }
+        return df
+
+    def commit(self, save=True):
+        """
+        Advance past the rows last returned. With save=False only the next
+        read moves on; after a crash the rows are read again from the last
+        saved offset, until commit() or save() persists it.
+        """
+        if self.pending_state is not None:
+            self.state = self.pending_state
+            self.pending_state = None
+            self.unsaved = True
+        if save:
+            self.save()
+
+    def save(self):
+        """Persist the offset of everything committed so far"""
+        if self.unsaved:
+            self.save_state(self.state)
+            self.unsaved = False
@@ -0,0 +1,84 @@
+import time
+import pandas as pd
+import pytest
+from alert_stream import AlertEventStore, StreamingAlertEvaluator
+
+START = pd.Timestamp("2026-10-17T12:00:00", tz="UTC")
+RATE_HZ = 30
+
+def readings(first_s, last_s, hr=75, spo2=97, user="NODE_e661"):
+    """30 Hz rows from first_s (inclusive) to last_s (exclusive)"""
+    return [{'id_user': user, 'timestamp': (START + pd.Timedelta(seconds=i / RATE_HZ)).isoformat(),
+             'hr': hr, 'spo2': spo2, 'temp': 24.0, 'humidity': 45.0}
+            for i in range(int(first_s * RATE_HZ), int(last_s * RATE_HZ))]
+
+def feed(evaluator, first_s, last_s, **vitals):
+    """One process() call per second of readings, like the uploader's polls"""
+    events = []
+    for second in range(first_s, last_s):
+        events += evaluator.process(readings(second, second + 1, **vitals))
+    return [(event['rule'], event['state']) for event in events]
+
+@pytest.fixture
+def store(tmp_path):
+    store = AlertEventStore(str(tmp_path / "alert_events.db"))
+    yield store
+    store.close()
+
+def test_raises_after_min_duration_only():
+    evaluator = StreamingAlertEvaluator()
+    assert feed(evaluator, 0, 2, hr=130) == []  # hr_critical_high needs 3 s
+    assert feed(evaluator, 2, 5, hr=130) == [('hr_critical_high', 'raised')]
+
+def test_short_excursion_does_not_raise():
+    evaluator = StreamingAlertEvaluator()
+    feed(evaluator, 0, 2, hr=130)
+    assert feed(evaluator, 2, 10, hr=75) == []
+
+def test_holds_within_hysteresis_margin():
+    evaluator = StreamingAlertEvaluator()
+    feed(evaluator, 0, 5, hr=130)
+    events = feed(evaluator, 5, 20, hr=118)  # Below 120, above 120 - 3
+
+    assert ('hr_critical_high', 'cleared') not in events
+    assert evaluator.status("NODE_e661")[0] == 'critical'
+
+def test_clears_after_recovery(store):
+    evaluator = StreamingAlertEvaluator(store)
+    feed(evaluator, 0, 5, hr=130)
+    events = feed(evaluator, 5, 15, hr=75)
+
+    assert events == [('hr_critical_high', 'cleared')]
+    assert store.load_active() == []
+
+def test_no_finger_does_not_flap():
+    evaluator = StreamingAlertEvaluator()
+    events = feed(evaluator, 0, 5, hr=75, spo2=97) + feed(evaluator, 5, 40, hr=0, spo2=0)
+    assert events == [('no_finger', 'raised')]
+
+    # Putting the finger back clears it once
+    assert feed(evaluator, 40, 50, hr=75, spo2=97) == [('no_finger', 'cleared')]
+
+def test_silent_device_expires(store):
+    evaluator = StreamingAlertEvaluator(store, gap_seconds=10)
+    feed(evaluator, 0, 5, hr=130)
+
+    assert evaluator.expire(now=time.time() + 5) == []
+    events = evaluator.expire(now=time.time() + 11)
+    assert [(event['rule'], event['state']) for event in events] == [('hr_critical_high', 'expired')]
+    assert store.load_active() == []
+
+def test_active_alerts_survive_restart(store):
+    feed(StreamingAlertEvaluator(store), 0, 5, hr=130)
+
+    restarted = StreamingAlertEvaluator(store)
+    assert restarted.status("NODE_e661")[0] == 'critical'
+    assert feed(restarted, 5, 15, hr=75) == [('hr_critical_high', 'cleared')]
+
+def test_gap_seconds_resets_pending_onsets():
+    def onset_with_gap(evaluator):
+        events = feed(evaluator, 0, 2, hr=130)
+        return events + feed(evaluator, 5, 7, hr=130)  # 3 s silence, then 2 s more
+
+    assert onset_with_gap(StreamingAlertEvaluator()) == [('hr_critical_high', 'raised')]
+    assert onset_with_gap(StreamingAlertEvaluator(gap_seconds=2)) == []
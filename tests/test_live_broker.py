@@ -0,0 +1,34 @@
+import pytest
+from live_broker import TOKEN_HEADER, LiveBroker, LivePublisher, create_app
+
+ROWS = [{'id_user': "NODE_e661", 'timestamp': "2026-10-17T12:00:00Z", 'hr': 75}]
+
+@pytest.fixture
+def broker():
+    return LiveBroker()
+
+def publish(app, headers=None):
+    return app.test_client().post('/publish', json=ROWS, headers=headers or {})
+
+def test_publish_requires_the_token(broker):
+    app = create_app(broker, token="secret")
+
+    assert publish(app).status_code == 401
+    assert publish(app, {TOKEN_HEADER: "guess"}).status_code == 401
+    assert broker.snapshot() == []
+
+    response = publish(app, {TOKEN_HEADER: "secret"})
+    assert response.status_code == 200
+    assert response.get_json() == {'accepted': 1}
+    assert broker.snapshot() == ROWS
+
+def test_publish_is_closed_without_a_configured_token(broker, monkeypatch):
+    monkeypatch.delenv("LIVE_BROKER_TOKEN", raising=False)
+    app = create_app(broker)
+
+    assert publish(app, {TOKEN_HEADER: ""}).status_code == 403
+    assert broker.snapshot() == []
+
+def test_publisher_sends_the_token(monkeypatch):
+    monkeypatch.setenv("LIVE_BROKER_TOKEN", "secret")
+    assert LivePublisher("http://127.0.0.1:8765").session.headers[TOKEN_HEADER] == "secret"
@@ -0,0 +1,78 @@
+from datetime import datetime
+import pytest
+import pytz
+from google.cloud import bigquery
+from fake_bigquery import FakeBigQueryClient, assert_prunes_partitions, query_parameters
+from query_layer import (ALL_USERS, aggregate_query, ensure_health_table, export_query,
+                         health_table_problems,
+                         job_config, recent_users_query, rollup_stats_query, run_query,
+                         ward_query, window_query)
+
+RAW = "project.dataset.raw"
+ROLLUP = "project.dataset.raw_rollup_minute"
+NOW = datetime(2026, 10, 17, 12, 34, 56, tzinfo=pytz.UTC)
+
+RAW_QUERIES = {
+    'window': lambda user: window_query(RAW, 1, user, 2000, now=NOW),
+    'window_since': lambda user: window_query(RAW, 1, user, 2000, since=NOW, now=NOW),
+    'aggregate': lambda user: aggregate_query(RAW, 6, user, 60, ['hr', 'spo2'], now=NOW),
+    'export': lambda user: export_query(RAW, 24, user, now=NOW),
+    'recent_users': lambda user: recent_users_query(RAW, now=NOW),
+    'ward': lambda user: ward_query(RAW, 5, now=NOW),
+}
+
+@pytest.mark.parametrize('name', sorted(RAW_QUERIES))
+@pytest.mark.parametrize('user', [ALL_USERS, "NODE_e661"])
+def test_raw_queries_prune_partitions(name, user):
+    sql, params = RAW_QUERIES[name](user)
+    assert_prunes_partitions(sql, query_parameters(job_config(params)))
+
+def test_rollup_query_prunes_bucket_partitions():
+    sql, params = rollup_stats_query(ROLLUP, 24, "NODE_e661", now=NOW)
+    assert_prunes_partitions(sql, query_parameters(job_config(params)),
+                             partition_column='bucket', cluster_column='id_user')
+
+def test_recorded_queries_prune():
+    client = FakeBigQueryClient()
+    for build in RAW_QUERIES.values():
+        run_query(client, *build("NODE_e661"))
+    assert client.assert_queries_prune(RAW) == len(RAW_QUERIES)
+
+def test_user_travels_as_parameter():
+    sql, params = window_query(RAW, 1, "x' OR '1'='1", 10, now=NOW)
+    assert "x' OR" not in sql
+    assert query_parameters(job_config(params))['user'] == ('STRING', "x' OR '1'='1")
+
+def test_window_start_is_aligned():
+    _, params = window_query(RAW, 1, ALL_USERS, 10, now=NOW)
+    start = query_parameters(job_config(params))['window_start'][1]
+    assert start == datetime(2026, 10, 17, 11, 34, tzinfo=pytz.UTC)
+
+def test_aggregate_bucket_alias_does_not_shadow_timestamp():
+    sql, _ = aggregate_query(RAW, 6, ALL_USERS, 60, ['hr'], now=NOW)
+    assert "AS bucket_start" in sql
+    assert "GROUP BY bucket_start" in sql
+    assert "AS timestamp" not in sql
+
+def test_ward_query_clause_order():
+    sql, _ = ward_query(RAW, 5, now=NOW)
+    assert sql.index("WHERE") < sql.index("QUALIFY") < sql.index("WINDOW per_user") < sql.index("ORDER BY ID_user")
+
+def test_health_table_is_partitioned_and_clustered():
+    client = FakeBigQueryClient()
+    table = ensure_health_table(client, RAW)
+    assert table.time_partitioning.type_ == bigquery.TimePartitioningType.DAY
+    assert table.time_partitioning.field == 'timestamp'
+    assert table.clustering_fields == ['ID_user']
+    assert table.require_partition_filter
+    assert ensure_health_table(client, RAW) is table
+    assert health_table_problems(client, RAW) == []
+
+def test_existing_unpartitioned_table_is_reported():
+    client = FakeBigQueryClient()
+    client.create_table(bigquery.Table(RAW))  # Created before the partitioned layout
+    ensure_health_table(client, RAW)  # Leaves it as it is
+
+    problems = health_table_problems(client, RAW)
+    assert len(problems) == 2
+    assert "not partitioned" in problems[0]
@@ -0,0 +1,82 @@
+import json
+import os
+import pytest
+from bigquery_batcher import BigQueryBatcher
+from fake_bigquery import FakeBigQueryClient
+from sink_pipeline import DRAIN_BACKOFF_SECONDS, SPILL, SinkWorker
+
+TABLE = "project.dataset.raw"
+
+def make_rows(count, bad=()):
+    return [{'timestamp': f"2026-10-17T12:00:00.{i:06d}", 'hr': -1 if i in bad else 75, 'spo2': 97}
+            for i in range(count)]
+
+def read_jsonl(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+@pytest.fixture
+def bigquery_sink(tmp_path):
+    """Stopped SPILL worker writing through a batcher to a fake client"""
+    def build(client):
+        batcher = BigQueryBatcher(client, TABLE, max_workers=1, max_retries=0, backoff_seconds=0)
+
+        def write(rows):
+            _, failed, rejected = batcher.insert_rows(rows)
+            return failed, rejected
+
+        worker = SinkWorker("bigquery", write, policy=SPILL, batch_size=500,
+                            spill_file=str(tmp_path / "spill.jsonl"),
+                            dead_letter_file=str(tmp_path / "rejected.jsonl"))
+        worker.close()  # Drive it by hand instead of from its thread
+        return worker
+    return build
+
+def spill(worker, rows):
+    with open(worker.spill_file, 'w') as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+def test_rejected_row_does_not_stall_the_drain(bigquery_sink):
+    client = FakeBigQueryClient(reject_row=lambda row: row['hr'] < 0)
+    worker = bigquery_sink(client)
+    rows = make_rows(2001, bad={700})
+    spill(worker, rows)
+
+    worker._drain_spill()
+
+    assert len(client.rows(TABLE)) == 2000
+    assert read_jsonl(worker.dead_letter_file) == [rows[700]]
+    assert not os.path.exists(f"{worker.spill_file}.draining")
+    assert worker.metrics['drain_backoff_s'] == 0.0
+    assert worker.metrics['rejected'] == 1
+
+def test_sink_down_backs_off_after_one_batch(bigquery_sink):
+    client = FakeBigQueryClient(transient_failures=1000)
+    worker = bigquery_sink(client)
+    spill(worker, make_rows(2001))
+
+    worker._drain_spill()
+
+    assert len(client.requests) == 1
+    assert worker.metrics['drain_backoff_s'] == DRAIN_BACKOFF_SECONDS
+    assert read_jsonl(f"{worker.spill_file}.draining") == make_rows(2001)
+
+    worker._drain_spill()  # Still within the backoff
+    assert len(client.requests) == 1
+
+def test_live_rejects_are_dead_lettered_not_spilled(tmp_path):
+    client = FakeBigQueryClient(reject_row=lambda row: row['hr'] < 0)
+    batcher = BigQueryBatcher(client, TABLE, max_workers=1, backoff_seconds=0)
+    worker = SinkWorker("bigquery", lambda rows: batcher.insert_rows(rows)[1:], policy=SPILL,
+                        spill_file=str(tmp_path / "spill.jsonl"),
+                        dead_letter_file=str(tmp_path / "rejected.jsonl"))
+    for row in make_rows(10, bad={3}):
+        worker.put(row)
+    worker.close()
+
+    assert len(client.rows(TABLE)) == 9
+    assert len(read_jsonl(worker.dead_letter_file)) == 1
+    assert read_jsonl(worker.spill_file) == []
@@ -0,0 +1,159 @@
+import json
+import pandas as pd
+import pytest
+from bigquery_batcher import BigQueryBatcher
+from dedup_store import SqliteDedupStore
+from fake_bigquery import FakeBigQueryClient
+from rollups import RollupWriter, batch_key, compaction_sql
+from upload_outbox import UploadOutbox
+
+TABLE = "project.dataset.raw"
+
+def make_rows(count):
+    return [{'id_user': "NODE_e661", 'timestamp': f"2026-10-17T12:00:{i % 60:02d}Z",
+             'hr': 70 + i % 10, 'spo2': 97, 'temp': 36.6, 'humidity': 50.0,
+             'activity': 'RESTING'} for i in range(count)]
+
+def make_batcher(client, **kwargs):
+    kwargs.setdefault('backoff_seconds', 0)
+    return BigQueryBatcher(client, TABLE, **kwargs)
+
+def test_split_respects_row_and_byte_limits():
+    rows = make_rows(10)
+    by_rows = list(make_batcher(FakeBigQueryClient(), max_rows=3).split(rows))
+    assert [len(chunk) for chunk, _ in by_rows] == [3, 3, 3, 1]
+
+    row_bytes = len(json.dumps(rows[0])) + 1  # Rows serialize to the same length
+    by_bytes = list(make_batcher(FakeBigQueryClient(), max_bytes=2 + 3 * row_bytes).split(rows))
+    assert [len(chunk) for chunk, _ in by_bytes] == [3, 3, 3, 1]
+
+def test_chunks_stay_under_client_limits():
+    client = FakeBigQueryClient(max_rows=50)
+    uploaded, failed = make_batcher(client, max_rows=40).insert(make_rows(500))
+
+    assert (uploaded, failed) == (500, [])
+    assert max(request['rows'] for request in client.requests) <= 40
+    assert len(client.rows(TABLE)) == 500
+
+def test_transient_failures_retry_with_same_insert_ids():
+    client = FakeBigQueryClient(transient_failures=2)
+    ids = [f"id-{i}" for i in range(5)]
+    uploaded, failed = make_batcher(client).insert(make_rows(5), row_ids=ids)
+
+    assert (uploaded, failed) == (5, [])
+    assert len(client.requests) == 3
+    assert all(request['row_ids'] == ids for request in client.requests)
+
+def test_transient_failures_give_up_after_max_retries():
+    client = FakeBigQueryClient(transient_failures=10)
+    rows = make_rows(5)
+    uploaded, failed = make_batcher(client, max_retries=2).insert(rows)
+
+    assert uploaded == 0
+    assert failed == rows
+    assert len(client.requests) == 3
+    assert client.rows(TABLE) == []
+
+def test_rejected_rows_fail_and_stopped_rows_are_resent():
+    client = FakeBigQueryClient(reject_row=lambda row: row['hr'] < 0)
+    rows = make_rows(5)
+    rows[2]['hr'] = -1
+    ids = [f"id-{i}" for i in range(5)]
+    uploaded, failed = make_batcher(client).insert(rows, row_ids=ids)
+
+    assert (uploaded, failed) == (4, [rows[2]])
+    assert [request['row_ids'] for request in client.requests] == [ids, ids[:2] + ids[3:]]
+    assert len(client.rows(TABLE)) == 4
+
+def test_resent_rows_are_deduplicated_by_insert_id():
+    client = FakeBigQueryClient()
+    rows = make_rows(5)
+    ids = [f"id-{i}" for i in range(5)]
+    batcher = make_batcher(client)
+    batcher.insert(rows, row_ids=ids)
+    batcher.insert(rows, row_ids=ids)  # Ack lost, batch sent again
+
+    assert len(client.rows(TABLE)) == 5
+
+@pytest.fixture
+def rollup_writer(tmp_path):
+    def build(client):
+        store = SqliteDedupStore(str(tmp_path / "uploaded_ids.db"))
+        outbox = UploadOutbox(store, table="rollup_outbox", marks_uploaded=False)
+        writer = RollupWriter(client, "project", "dataset", "raw", outbox=outbox)
+        for batcher in writer.batchers.values():
+            batcher.backoff_seconds = 0
+        return writer, outbox
+    return build
+
+def test_rollup_partials_survive_failures_and_count_once(rollup_writer):
+    client = FakeBigQueryClient(transient_failures=100)
+    writer, outbox = rollup_writer(client)
+    rows = make_rows(120)
+    row_ids, partials = writer.partials(rows, batch_key([f"raw-{i}" for i in range(120)]))
+    outbox.enqueue(row_ids, partials)
+
+    assert writer.flush() == 0
+    assert outbox.size() == len(partials)
+
+    client.transient_failures = 0
+    assert writer.flush() == len(partials)
+    assert outbox.size() == 0
+
+    outbox.enqueue(row_ids, partials)  # Crash between insert and ack
+    writer.flush()
+    minute = client.rows(writer.table_ids['minute'])
+    assert sum(partial['samples'] for partial in minute) == 120
+
+def test_only_minute_partials_are_streamed(rollup_writer):
+    client = FakeBigQueryClient()
+    writer, outbox = rollup_writer(client)
+    row_ids, partials = writer.partials(make_rows(120), batch_key(["raw-0"]))
+    outbox.enqueue(row_ids, partials)
+    outbox.enqueue(["legacy-hour"], [dict(partials[0], granularity='hour')])  # Queued by an older uploader
+
+    assert writer.flush() == len(partials) + 1
+    assert outbox.size() == 0
+    assert len(client.rows(writer.table_ids['minute'])) == len(partials)
+    assert client.rows(writer.table_ids['hour']) == []
+
+def compaction_windows(client):
+    windows = []
+    for query in client.queries:
+        target = query['sql'].split('`')[1]
+        windows.append((target.rsplit('_', 1)[1], query['params']['window_start'][1],
+                        query['params']['window_end'][1]))
+    return windows
+
+def test_compaction_folds_settled_minutes_and_rebuilds_hours(rollup_writer):
+    client = FakeBigQueryClient()
+    writer, _ = rollup_writer(client)
+    now = pd.Timestamp("2026-10-17T12:34:56Z")
+
+    assert writer.compact(now=now) == 2
+    assert compaction_windows(client) == [
+        ('minute', pd.Timestamp("2026-09-17T10:00:00Z"), pd.Timestamp("2026-10-17T10:00:00Z")),
+        ('hour', pd.Timestamp("2026-09-17T12:00:00Z"), pd.Timestamp("2026-10-17T13:00:00Z")),
+    ]
+    assert writer.compact(now=now) == 0  # Within COMPACT_INTERVAL_SECONDS
+
+    # Same settled hour: only the hour rows are rebuilt
+    writer.next_compaction = 0
+    client.queries.clear()
+    writer.compact(now=now + pd.Timedelta(minutes=5))
+    assert compaction_windows(client) == [
+        ('hour', pd.Timestamp("2026-10-16T12:00:00Z"), pd.Timestamp("2026-10-17T13:00:00Z")),
+    ]
+
+    # Next hour settles: the minute window continues where the last one ended
+    writer.next_compaction = 0
+    client.queries.clear()
+    writer.compact(now=now + pd.Timedelta(hours=1))
+    assert compaction_windows(client)[0] == (
+        'minute', pd.Timestamp("2026-10-17T10:00:00Z"), pd.Timestamp("2026-10-17T11:00:00Z"))
+
+def test_compaction_sql_replaces_only_its_window():
+    sql = compaction_sql("p.d.raw_rollup_hour", "p.d.raw_rollup_minute", 'HOUR')
+    assert "FROM `p.d.raw_rollup_minute`\n        WHERE bucket >= @window_start AND bucket < @window_end" in sql
+    assert "AND stored.bucket >= @window_start AND stored.bucket < @window_end THEN DELETE" in sql
+    assert "TIMESTAMP_TRUNC(bucket, HOUR)" in sql
@@ -0,0 +1,61 @@
+import os
+import pandas as pd
+import pytest
+from fake_bigquery import FakeBigQueryClient
+from parquet_archive import read_archive
+from Uploader import ARCHIVE_BUFFER_SECONDS, CloudUploader
+
+START = pd.Timestamp("2026-10-17T12:00:00")
+
+def append_rows(first, count, node="NODE_e661"):
+    """Append 30 Hz rows to ml_results.csv, with the header on first use"""
+    df = pd.DataFrame({
+        'device_id': node,
+        'ml_timestamp': [(START + pd.Timedelta(seconds=i / 30)).isoformat() for i in range(first, first + count)],
+        'temp': 36.6, 'spo2': 97, 'hr': 75, 'humidity': 50.0,
+        'ml_activity': 'RESTING', 'ml_confidence': 0.9,
+    })
+    df.to_csv("ml_results.csv", mode='a', index=False, header=not os.path.exists("ml_results.csv"))
+
+@pytest.fixture
+def uploader(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    def build():
+        return CloudUploader(client=FakeBigQueryClient(), alert_db=None)
+    return build
+
+def archived_files():
+    return [name for _, _, names in os.walk("archive") for name in names if name.endswith('.parquet')]
+
+def test_archive_buffers_polls_into_one_file(uploader):
+    first = uploader()
+    for second in range(10):  # One poll per second
+        append_rows(second * 30, 30)
+        first.check_new_data()
+    assert archived_files() == []
+    assert not os.path.exists(first.tail_reader.state_file)
+
+    first.archive.buffered_since -= ARCHIVE_BUFFER_SECONDS
+    append_rows(300, 30)
+    first.check_new_data()
+    assert len(archived_files()) == 1
+    assert len(read_archive("archive")) == 330
+    assert os.path.exists(first.tail_reader.state_file)
+
+def test_crash_before_archive_flush_rearchives_the_tail(uploader):
+    first = uploader()
+    append_rows(0, 30)
+    first.check_new_data()
+    first.archive.buffered_since -= ARCHIVE_BUFFER_SECONDS
+    append_rows(30, 30)
+    first.check_new_data()  # Rows 0-59 archived, offset saved
+    append_rows(60, 30)
+    first.check_new_data()  # Rows 60-89 queued but only buffered: crash now
+
+    restarted = uploader()
+    assert restarted.check_new_data().empty  # Already in the outbox
+    restarted.archive.close()
+
+    archived = read_archive("archive")
+    assert len(archived) == 90
+    assert archived['timestamp'].is_unique
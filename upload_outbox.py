@@ -0,0 +1,104 @@
+"""
+📮 UPLOAD OUTBOX
+Durable queue of rows waiting for a BigQuery ack. Lives in the dedup
+store's SQLite (WAL) database so acking a row and recording its ID as
+uploaded happen in one transaction. Derived rows (rollup partials) use a
+second outbox table in the same database and are queued in that same
+transaction, so they are counted exactly once.
+"""
+
+import json
+import time
+
+class UploadOutbox:
+    def __init__(self, dedup_store, table="outbox", marks_uploaded=True):
+        self.dedup_store = dedup_store
+        self.conn = dedup_store.conn
+        self.table = table
+        self.marks_uploaded = marks_uploaded  # Record acked IDs in uploaded_ids
+        self.conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            record_id TEXT NOT NULL UNIQUE,
+            payload TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            enqueued_at REAL NOT NULL
+        )
+        """)
+        self.conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_attempts ON {table} (attempts, seq)"
+        )
+        self.conn.commit()
+
+    def enqueue(self, record_ids, rows):
+        """Durably record rows as pending upload"""
+        with self.conn:
+            self._insert(record_ids, rows)
+
+    def _insert(self, record_ids, rows):
+        now = time.time()
+        self.conn.executemany(
+            f"INSERT OR IGNORE INTO {self.table} (record_id, payload, enqueued_at) VALUES (?, ?, ?)",
+            ((record_id, json.dumps(row, default=str), now)
+             for record_id, row in zip(record_ids, rows))
+        )
+
+    def existing(self, record_ids):
+        """Return the subset of record_ids already waiting in the outbox"""
+        found = set()
+        for start in range(0, len(record_ids), 900):
+            chunk = record_ids[start:start + 900]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT record_id FROM {self.table} WHERE record_id IN ({placeholders})",
+                chunk
+            )
+            found.update(record_id for (record_id,) in rows)
+        return found
+
+    def pending(self, limit=10000):
+        """Oldest pending rows first; rows that keep failing sink to the back"""
+        cursor = self.conn.execute(
+            f"SELECT record_id, payload FROM {self.table} ORDER BY attempts, seq LIMIT ?",
+            (limit,)
+        )
+        record_ids, rows = [], []
+        for record_id, payload in cursor:
+            record_ids.append(record_id)
+            rows.append(json.loads(payload))
+        return record_ids, rows
+
+    def ack(self, record_ids, derived=None):
+        """
+        Commit acknowledged rows: drop from outbox, mark as uploaded.
+        derived=(outbox, record_ids, rows) queues follow-up rows in the same
+        transaction (the other outbox must share this database).
+        """
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                f"DELETE FROM {self.table} WHERE record_id = ?",
+                ((record_id,) for record_id in record_ids)
+            )
+            if self.marks_uploaded:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO uploaded_ids VALUES (?, ?)",
+                    ((record_id, now) for record_id in record_ids)
+                )
+            if derived is not None:
+                outbox, derived_ids, derived_rows = derived
+                outbox._insert(derived_ids, derived_rows)
+        if self.marks_uploaded and self.dedup_store.bloom is not None:
+            for record_id in record_ids:
+                self.dedup_store.bloom.add(record_id)
+
+    def nack(self, record_ids):
+        """Keep rows pending but count the failed attempt"""
+        with self.conn:
+            self.conn.executemany(
+                f"UPDATE {self.table} SET attempts = attempts + 1 WHERE record_id = ?",
+                ((record_id,) for record_id in record_ids)
+            )
+
+    def size(self):
+        return self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]